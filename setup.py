@@ -12,8 +12,12 @@ setup(name='LatexSymbolManager',
            'lsm_test2 = latex_symbol_manager.parsing_structure:main',
            'lsm_table = latex_symbol_manager.create_symbols_table:main',
            'lsm_symbols = latex_symbol_manager.compact_all:main',
-           'lsm_extract = latex_symbol_manager.programs:lsm_extract_main',
-           #'lsm_select = latex_symbol_manager.programs.select_subset:main',
+           'lsm_extract = latex_symbol_manager.programs.extract:main',
+           'lsm_dependents = latex_symbol_manager.programs.dependents:main',
+           'lsm_server = latex_symbol_manager.programs.server:main',
+           'lsm_query = latex_symbol_manager.programs.query:main',
+           'lsm_search = latex_symbol_manager.programs.search:main',
+           'lsm_select = latex_symbol_manager.programs.select_subset:main',
            'lsm_nomenc = latex_symbol_manager.programs.nomenc:main',
            'lsm_collect = latex_symbol_manager.programs.collect.collect:main',
            ]
@@ -1,15 +1,78 @@
+import importlib
 import logging
-logging.basicConfig()
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
-from .lookahead import *
-from .symbol import *
-from .structures import *
-from .parsing import *
-from .parsing_structure import *
+# The names of the package, and the submodule defining each. The
+# submodule is imported when one of its names is first used, so a
+# program only imports what it needs (and yaml, latex_gen and
+# multiprocessing only if it uses them). Logging, and the level of
+# logger, are configured by utils.setup_logging(), called by
+# wrap_script_entry_point(); a library user keeps its own settings.
+_submodules = {
+    # the collector is diagnostics.diagnostics: the package attribute
+    # of that name is the submodule
+    'diagnostics': ['Diagnostics', 'add_diagnostics_options',
+                    'setup_diagnostics'],
+    'lookahead': ['Lookahead'],
+    'scanning': ['VERBATIM_ENVIRONMENTS', 'find_commands', 'iter_commands'],
+    'symbol': ['DEFINITION_TEMPLATE', 'NomenclatureEntry', 'Symbol',
+               'definition_block', 'import_yaml'],
+    'structures': ['CommandDefinition', 'KNOWN_TAGS_SECTIONS',
+                   'KNOWN_TAGS_SYMBOLS', 'NewCommand', 'OtherLine',
+                   'ParsingError', 'SectionHeader', 'SpecialComment',
+                   'SymbolSection', 'Where', 'intern_string'],
+    'parsing': ['comment_regex', 'content_of_comment', 'count_lines',
+                'is_comment', 'is_special_comment', 'newcommand_from_match',
+                'newcommand_regex', 'parse_stream', 'special_comment_regex',
+                'special_comment_start', 'strip_empty',
+                'where_without_text'],
+    'parsing_mmap': ['parse_file_mmap'],
+    'database': ['is_database', 'query_database',
+                 'read_database_definitions', 'write_database'],
+    'parsing_structure': ['add_attribute', 'add_definitions',
+                          'build_symbols', 'collect_definitions',
+                          'create_section', 'load_command', 'parse_symbols',
+                          'read_definitions', 'warning'],
+    'interface': ['parse_all_sections_symbols', 'parse_all_symbols'],
+    'graph': ['SymbolGraph'],
+    'selection': ['SectionSelector', 'parse_patterns'],
+    'section_tree': ['SectionTree'],
+    'symbol_query': ['AttributeIndex', 'parse_query', 'select_symbols'],
+    'search': ['SymbolIndex'],
+    'parallel': ['parse_files_parallel'],
+    'cache': ['SymbolCache', 'load_sections_symbols'],
+    'incremental': ['SymbolLibrary', 'file_stamp', 'watch_files'],
+    'compact_all': ['CompactRenderer', 'watch_compact', 'write_compact',
+                    'write_preamble'],
+    'serialization': ['FORMATS', 'yaml_loader', 'yaml_dumper',
+                      'detect_format', 'read_commands', 'write_commands',
+                      'symbol_record', 'symbol_from_record',
+                      'write_symbol_records', 'read_symbol_records'],
+}
 
-from .interface import *
-from .compact_all import *
+_defined_in = dict((name, module) for module, names in _submodules.items()
+                   for name in names)
 
-from . import utils 
\ No newline at end of file
+__all__ = ['logger'] + sorted(_defined_in)
+
+
+def __getattr__(name):
+    module = _defined_in.get(name)
+    if module is None and not name.startswith('__'):
+        # a submodule not imported yet, such as utils
+        try:
+            return importlib.import_module('.' + name, __name__)
+        except ModuleNotFoundError as e:
+            if e.name != '%s.%s' % (__name__, name):
+                raise
+    if module is None:
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name))
+    submodule = importlib.import_module('.' + module, __name__)
+    value = getattr(submodule, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_defined_in))
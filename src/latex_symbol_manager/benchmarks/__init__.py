@@ -0,0 +1,7 @@
+''' 
+    Benchmarks for the parsing and rendering stages.
+    
+    These are not imported by the package; run them as scripts, e.g.:
+    
+        python -m latex_symbol_manager.benchmarks.bench_parsing
+'''
@@ -0,0 +1,151 @@
+'''
+    Compares the output throughput of lsm_symbols' renderer
+    (CompactRenderer) with the previous implementation, checking that
+    the output is the same.
+'''
+from latex_symbol_manager import (OtherLine, SymbolSection, Symbol,
+    parse_symbols)
+from latex_symbol_manager.compact_all import write_compact
+from optparse import OptionParser, Values
+import io
+import os
+import tempfile
+import time
+
+from .synthetic import synthetic_library
+
+
+def legacy_tex_definition(self, wrapper=None):
+    if wrapper is None:
+        tex = self.tex
+    else:
+        tex = wrapper(self.tex)
+
+    def single_def(cmd):
+
+        if self.nargs:
+            params = '{%s}[%s]{%s}' % (cmd, self.nargs, tex)
+        else:
+            params = '{%s}{%s}' % (cmd, tex)
+
+        s = ('\\ifdefined%s%%\n  \\renewcommand%s%%\n\\else%%\n  '
+             '\\newcommand%s%%\n\\fi\n' % (cmd, params, params))
+        return s
+
+    if isinstance(self.symbol, list):
+        s = "\n".join([single_def(t) for t in self.symbol])
+    else:
+        s = single_def(self.symbol)
+
+    if self.desc:
+        s += '%% %s' % self.desc
+
+    return s
+
+
+def legacy_write_compact(elements, options, out):
+    """ The previous write_compact(): closures for each symbol. """
+
+    def comment(el, s):
+        s = s.replace('\n', ' ')
+        out.write('%% %s: %s\n' % (el.symbol, s))
+
+    for el in elements:
+        if isinstance(el, OtherLine):
+            out.write(el.line)
+            out.write('\n')
+        elif isinstance(el, Symbol):
+
+            if options.select is not None:
+                if not options.select in el.other:
+                    comment(el, 'Skipped because no field %r' % options.select)
+                    continue
+
+            filters = []
+
+            if options.color:
+                if el.nargs == 0:
+                    def highlight(x):
+                        return "{\\color{%s} %s}" % (options.color, x)
+                    filters.append(highlight)
+
+            if options.markfirst:
+                if el.nargs == 0:
+                    boolname = 'used%s' % str(el.symbol[1:])
+
+                    def mark_first(x):
+                        return ("\\markfirst{%s}{%s}{%s}" %
+                                (el.symbol[1:], boolname, x))
+                    filters.append(mark_first)
+
+                    out.write('\\newbool{%s}\\setbool{%s}{false}\n'
+                              % (boolname, boolname))
+
+            def wrapper(x):
+                for f in filters:
+                    x = f(x)
+                return x
+
+            out.write(legacy_tex_definition(el, wrapper=wrapper))
+            out.write('\n')
+
+        elif isinstance(el, SymbolSection):
+            pass
+
+
+def measure(function, elements, options, repeat, filename):
+    best = None
+    for _ in range(repeat):
+        if filename is None:
+            out = io.StringIO()
+            t0 = time.perf_counter()
+            function(elements, options, out)
+            t = time.perf_counter() - t0
+            result = out.getvalue()
+        else:
+            # as lsm_symbols -o
+            t0 = time.perf_counter()
+            with open(filename, 'w', buffering=1 << 20) as out:
+                function(elements, options, out)
+            t = time.perf_counter() - t0
+            with open(filename) as f:
+                result = f.read()
+        best = t if best is None else min(best, t)
+    return best, result
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-n", "--nsymbols", default=100000, type='int')
+    parser.add_option("-r", "--repeat", default=3, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_library(options.nsymbols)
+    elements = list(parse_symbols(io.StringIO(text), 'synthetic'))
+    print('%d symbols, %d elements' % (options.nsymbols, len(elements)))
+
+    fd, filename = tempfile.mkstemp(suffix='.tex')
+    os.close(fd)
+    try:
+        for color, markfirst in [(None, False), ('red', True)]:
+            render_options = Values(dict(select=None, color=color,
+                                         markfirst=markfirst))
+            print('--color %s --markfirst %s' % (color, markfirst))
+            for target in [None, filename]:
+                where = 'to memory' if target is None else 'to file'
+                results = []
+                for name, function in [('legacy', legacy_write_compact),
+                                       ('CompactRenderer', write_compact)]:
+                    t, result = measure(function, elements, render_options,
+                                        options.repeat, target)
+                    results.append(result)
+                    print('  %-16s %-10s %8.3f s %8.1f MB/s' %
+                          (name, where, t, len(result) / t / 1e6))
+                if results[0] != results[1]:
+                    print('  DIFFERENT OUTPUT')
+    finally:
+        os.unlink(filename)
+
+
+if __name__ == '__main__':
+    main()
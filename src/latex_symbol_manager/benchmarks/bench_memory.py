@@ -0,0 +1,113 @@
+'''
+    Memory used by the parsed sections and symbols, compared with the
+    previous representation (per-instance __dict__, and a copy of the
+    line text in every Where).
+'''
+from latex_symbol_manager import parse_all_sections_symbols
+from collections import namedtuple
+from optparse import OptionParser
+import os
+import sys
+import tempfile
+
+from .synthetic import synthetic_library
+
+
+class LegacyWhere:
+    def __init__(self, filename, lineno, text=None):
+        self.filename = filename
+        self.lineno = lineno
+        if text and text[-1] == '\n':
+            text = text[:-1]
+        self.text = text
+
+
+class LegacySymbol:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+LegacySymbolSection = namedtuple('LegacySymbolSection',
+                'name description symbols parent subs where '
+                'definition_order attrs')
+
+
+def to_legacy(sections, symbols):
+    """ Converts to the previous representation, sharing the strings. """
+    def where(w):
+        # each Where used to hold its own copy of the line
+        return LegacyWhere(w.filename, w.lineno, w.text + '\n')
+
+    lsymbols = {}
+    for k, s in symbols.items():
+        lsymbols[k] = LegacySymbol(symbol=s.symbol, tex=s.tex,
+                                   definition_order=s.definition_order,
+                                   nargs=s.nargs, desc=s.desc, long=s.long,
+                                   example=s.example, tag=s.tag,
+                                   where=where(s.where),
+                                   nomenclature=s.nomenclature,
+                                   other=s.other)
+    lsections = {}
+    for k, s in sections.items():
+        ssymbols = dict((c, lsymbols[c]) for c in s.symbols)
+        lsections[k] = LegacySymbolSection(s.name, s.description, ssymbols,
+                                           s.parent, {}, where(s.where),
+                                           s.definition_order, s.attrs)
+    for s in lsections.values():
+        if s.parent is not None:
+            lsections[s.parent].subs[s.name] = s
+    return lsections, lsymbols
+
+
+def deep_sizeof(root):
+    """ Total size of the objects reachable from root, each counted once. """
+    seen = set()
+    todo = [root]
+    total = 0
+    while todo:
+        x = todo.pop()
+        if id(x) in seen or isinstance(x, type):
+            continue
+        seen.add(id(x))
+        total += sys.getsizeof(x)
+        if isinstance(x, dict):
+            todo.extend(x.keys())
+            todo.extend(x.values())
+        elif isinstance(x, (list, tuple, set, frozenset)):
+            todo.extend(x)
+        if hasattr(x, '__dict__'):
+            todo.append(x.__dict__)
+        for k in getattr(type(x), '__slots__', ()):
+            if hasattr(x, k):
+                todo.append(getattr(x, k))
+    return total
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-n", "--nsymbols", default=10000, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_library(options.nsymbols)
+    fd, filename = tempfile.mkstemp(suffix='.tex')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        sections, symbols = parse_all_sections_symbols([filename])
+        legacy = to_legacy(sections, symbols)
+        current = deep_sizeof((sections, symbols))
+        previous = deep_sizeof(legacy)
+    finally:
+        os.unlink(filename)
+
+    per = 10000.0 / options.nsymbols
+    print('source: %d bytes for %d symbols' % (len(text), options.nsymbols))
+    print('previous representation: %10d bytes (%d per 10k symbols)' %
+          (previous, previous * per))
+    print('current representation:  %10d bytes (%d per 10k symbols)' %
+          (current, current * per))
+    print('reduction: %.1f%%' % (100.0 * (previous - current) / previous))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+'''
+    Time of parse_all_sections_symbols on many files as a function
+    of the number of processes, checking that the result is the same
+    as parsing the files in sequence.
+'''
+from latex_symbol_manager import (parse_all_sections_symbols,
+    parse_files_parallel)
+from optparse import OptionParser
+import os
+import shutil
+import tempfile
+import time
+
+from .synthetic import synthetic_library
+
+
+def write_library(dirname, nfiles, nsymbols):
+    """ Writes nfiles files, with distinct symbols and sections. """
+    filenames = []
+    for i in range(nfiles):
+        text = synthetic_library(nsymbols, seed=i)
+        # make the names distinct across files
+        text = text.replace('{\\sym', '{\\f%ssym' % letters(i))
+        text = text.replace('section: sec', 'section: f%d/sec' % i)
+        filename = os.path.join(dirname, 'symbols%03d.tex' % i)
+        with open(filename, 'w') as f:
+            f.write(text)
+        filenames.append(filename)
+    return filenames
+
+
+def letters(i):
+    return ''.join(chr(ord('a') + int(c)) for c in str(i))
+
+
+def summary(sections, symbols):
+    return ([(s.name, s.parent, s.definition_order, list(s.subs))
+             for s in sections.values()],
+            [(s.symbol, s.tag, s.definition_order)
+             for s in symbols.values()])
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-f", "--nfiles", default=16, type='int')
+    parser.add_option("-n", "--nsymbols", default=5000, type='int',
+                      help="Symbols per file.")
+    parser.add_option("--max-jobs", default=os.cpu_count(), type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    dirname = tempfile.mkdtemp()
+    try:
+        filenames = write_library(dirname, options.nfiles, options.nsymbols)
+        print('%d files with %d symbols each (%d CPUs)' %
+              (options.nfiles, options.nsymbols, os.cpu_count()))
+
+        t0 = time.perf_counter()
+        expected = summary(*parse_all_sections_symbols(filenames))
+        sequential = time.perf_counter() - t0
+        print('%-12s %8.3f s' % ('sequential', sequential))
+
+        jobs = 1
+        while jobs <= max(2, options.max_jobs):
+            t0 = time.perf_counter()
+            result = parse_files_parallel(filenames, jobs=jobs)
+            t = time.perf_counter() - t0
+            same = summary(*result) == expected
+            print('%-12s %8.3f s  speedup %5.2f  %s' %
+                  ('jobs=%d' % jobs, t, sequential / t,
+                   'same result' if same else 'DIFFERENT RESULT'))
+            jobs *= 2
+    finally:
+        shutil.rmtree(dirname)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+''' 
+    Compares the throughput of parse_stream/parse_symbols with 
+    the previous implementation (stacked generators and Lookahead).
+'''
+from latex_symbol_manager import (NewCommand, OtherLine, SpecialComment,
+    ParsingError, Where, parse_stream, parse_symbols,
+    parse_all_sections_symbols)
+from latex_symbol_manager.parsing import (is_comment, is_special_comment,
+    content_of_comment)
+from latex_symbol_manager.parsing_structure import (add_attribute,
+    create_section, load_command)
+from optparse import OptionParser
+import io
+import os
+import re
+import tempfile
+import time
+
+from .synthetic import synthetic_library
+
+
+class LegacyLookahead:
+    """ The lookahead used before: list.pop(0) for each element. """
+
+    def __init__(self, iterator):
+        self.iter = iter(iterator)
+        self.buffer = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.buffer:
+            return self.buffer.pop(0)
+        else:
+            return next(self.iter)
+
+    def lookahead(self, n):
+        while n >= len(self.buffer):
+            try:
+                self.buffer.append(next(self.iter))
+            except StopIteration:
+                return None
+        return self.buffer[n]
+
+
+def legacy_count_lines(stream, count=0):
+    legacy_count_lines.count = count
+    for line in stream:
+        yield line
+        legacy_count_lines.count += 1
+
+
+def legacy_strip_empty(stream):
+    for line in stream:
+        if line is not None:
+            yield line
+
+
+def legacy_parse_stream(stream, filename, line_count=0):
+    """ The previous parse_stream, kept here as a reference. """
+    counter = legacy_count_lines(stream, line_count)
+    peek = LegacyLookahead(legacy_strip_empty(counter))
+
+    for line in peek:
+        where = Where(filename, legacy_count_lines.count, line)
+        m = re.match(r'\s*\\newcommand{\\(\w+)}{(.*)}\s*%?(.*)', line)
+        if m:
+            description = m.group(3).replace('%', '')
+            yield NewCommand('\\' + m.group(1), 0, m.group(2),
+                             description, where)
+        else:
+            m = re.match(r'\s*\\newcommand{\\(\w+)}\[(\d*)\]{(.*)}\s*%?(.*)',
+                         line)
+            if m:
+                description = m.group(4).replace('%', '')
+                yield NewCommand('\\' + m.group(1), int(m.group(2)),
+                                 m.group(3), description, where)
+            elif is_special_comment(line):
+                rest = line[line.index('%:') + 2:]
+                if not ':' in rest:
+                    raise ParsingError('No closing ":" found.', where)
+                pos = rest.index(':')
+                tag = rest[:pos]
+                lines = [rest[pos + 1:].strip()]
+                while (peek.lookahead(0)
+                       and is_comment(peek.lookahead(0))
+                       and not is_special_comment(peek.lookahead(0))):
+                    content = content_of_comment(next(peek))
+                    if content:
+                        lines.append(content)
+                yield SpecialComment(tag, lines, where)
+            else:
+                yield OtherLine(line, where)
+
+
+def legacy_parse_symbols(stream, filename):
+    """ 
+        The previous parse_symbols: a second Lookahead over the elements,
+        peeked for the attributes of each section and command.
+    """
+    sections = {}
+    symbols = {}
+    current_section = None
+    peek = LegacyLookahead(legacy_parse_stream(stream, filename))
+
+    def load_attributes():
+        attrs = {}
+        while (isinstance(peek.lookahead(0), SpecialComment) and
+               peek.lookahead(0).tag != 'section'):
+            add_attribute(attrs, next(peek))
+        return attrs
+
+    for el in peek:
+        if isinstance(el, NewCommand):
+            yield load_command(el, current_section, symbols, load_attributes())
+        elif isinstance(el, SpecialComment):
+            name, description = el.lines[0].split(':')
+            current_section = create_section(el, sections, name.strip(),
+                                             description.strip(),
+                                             load_attributes())
+            yield current_section
+        else:
+            yield el
+
+
+def measure(function, text, repeat):
+    best = None
+    for _ in range(repeat):
+        stream = io.StringIO(text)
+        t0 = time.perf_counter()
+        for _ in function(stream, 'synthetic'):
+            pass
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return best
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-n", "--nsymbols", default=20000, type='int')
+    parser.add_option("-r", "--repeat", default=3, type='int')
+    parser.add_option("-p", "--padding", default=0, type='int',
+                      help="Lines of plain text after each symbol.")
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_library(options.nsymbols, padding=options.padding)
+    nlines = text.count('\n')
+    print('%d symbols, %d lines, %d bytes' % 
+          (options.nsymbols, nlines, len(text)))
+
+    cases = [('legacy parse_stream', legacy_parse_stream),
+             ('parse_stream', parse_stream),
+             ('legacy parse_symbols', legacy_parse_symbols),
+             ('parse_symbols', parse_symbols)]
+    for name, function in cases:
+        t = measure(function, text, options.repeat)
+        print('%-35s %8.3f s %12.0f lines/s' % (name, t, nlines / t))
+
+    # From a file, as the programs do
+    fd, filename = tempfile.mkstemp(suffix='.tex')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        for use_mmap in [False, True]:
+            best = None
+            for _ in range(options.repeat):
+                t0 = time.perf_counter()
+                parse_all_sections_symbols([filename], use_mmap=use_mmap)
+                t = time.perf_counter() - t0
+                best = t if best is None else min(best, t)
+            name = 'parse_all_sections_symbols%s' % (' (mmap)' 
+                                                     if use_mmap else '')
+            print('%-35s %8.3f s %12.0f lines/s' % (name, best, nlines / best))
+    finally:
+        os.unlink(filename)
+
+
+if __name__ == '__main__':
+    main()
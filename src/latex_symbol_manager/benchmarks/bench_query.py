@@ -0,0 +1,68 @@
+'''
+    Time of selecting symbols with queries (as lsm_symbols --select
+    does) on a large library: building the AttributeIndex once, then
+    evaluating each query with set operations, compared with testing
+    every symbol for each query. The totals of the index include the
+    time of building it.
+'''
+from latex_symbol_manager import parse_symbols, AttributeIndex
+from optparse import OptionParser
+import io
+import time
+
+from .synthetic import synthetic_library
+
+# query -> the same as a test on each symbol
+QUERIES = [
+    ('deprecated', lambda s: 'deprecated' in s.other),
+    ('notfinal or deprecated',
+     lambda s: 'notfinal' in s.other or 'deprecated' in s.other),
+    ('nargs and not deprecated',
+     lambda s: s.nargs > 0 and not 'deprecated' in s.other),
+    ('section:sec1 and (sort or def)',
+     lambda s: ((s.tag == 'sec1' or s.tag.startswith('sec1/'))
+                and ('sort' in s.other or 'def' in s.other))),
+    ('not (nomenc or example)',
+     lambda s: not ('nomenc' in s.other or 'example' in s.other)),
+]
+
+
+def timed(function):
+    t0 = time.perf_counter()
+    result = function()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-n", "--nsymbols", default=100000, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_library(options.nsymbols, subsections=2,
+                             attributes=True)
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(text), 'synthetic', sections,
+                           symbols, keep_text=False):
+        pass
+    print('%d symbols, %d sections' % (len(symbols), len(sections)))
+
+    t_build, index = timed(lambda: AttributeIndex(symbols, sections))
+    print('%-34s %10s %10s' % ('', 'scan', 'index'))
+    print('%-34s %10s %8.4f s' % ('build the index', '-', t_build))
+    total_scan = 0
+    total_index = t_build
+    for query, test in QUERIES:
+        t_scan, expected = timed(lambda: set(k for k, s in symbols.items()
+                                             if test(s)))
+        t_index, found = timed(lambda: index.select(query))
+        total_scan += t_scan
+        total_index += t_index
+        print('%-34s %8.4f s %8.4f s  %6d %s' %
+              (query, t_scan, t_index, len(found),
+               'ok' if found == expected else 'DIFFERENT'))
+    print('%-34s %8.4f s %8.4f s' % ('total (build + queries)',
+                                      total_scan, total_index))
+
+
+if __name__ == '__main__':
+    main()
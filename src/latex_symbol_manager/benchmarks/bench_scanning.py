@@ -0,0 +1,57 @@
+'''
+    Compares the throughput of the command scanner (scanning.py) with
+    the regular expression used before, on a synthetic document.
+'''
+from latex_symbol_manager.scanning import find_commands
+from latex_symbol_manager.programs.collect.find_commands import (
+    commands_and_includes)
+from optparse import OptionParser
+import re
+import time
+
+from .synthetic import synthetic_document
+
+legacy_command_regex = re.compile(r'(\\\w+)')
+
+
+def legacy_find_commands(s):
+    """ The previous find_all_commands(): the regex on each line. """
+    commands = set()
+    for line in s.splitlines(True):
+        for x in legacy_command_regex.findall(line):
+            commands.add(x)
+    return commands
+
+
+def measure(function, text, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = function(text)
+        t = time.perf_counter() - t0
+        best = t if best is None else min(best, t)
+    return best, result
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-p", "--nparagraphs", default=50000, type='int')
+    parser.add_option("-r", "--repeat", default=3, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_document(options.nparagraphs)
+    mb = len(text) / 1e6
+    print('%d paragraphs, %d lines, %.1f MB' %
+          (options.nparagraphs, text.count('\n'), mb))
+
+    cases = [('legacy regex per line', legacy_find_commands),
+             ('find_commands', lambda s: set(find_commands(s))),
+             ('commands_and_includes', lambda s: commands_and_includes(s)[0])]
+    for name, function in cases:
+        t, commands = measure(function, text, options.repeat)
+        print('%-25s %8.3f s %8.1f MB/s %8d distinct commands' %
+              (name, t, mb / t, len(commands)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+'''
+    Time to build a SymbolIndex on a large synthetic library, and
+    time per query for prefix completion and approximate search.
+'''
+from latex_symbol_manager import SymbolIndex, parse_symbols
+from optparse import OptionParser
+import io
+import random
+import time
+
+from .synthetic import synthetic_library, _letters
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-n", "--nsymbols", default=100000, type='int')
+    parser.add_option("-q", "--nqueries", default=2000, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_library(options.nsymbols)
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(text), 'synthetic', sections,
+                           symbols, keep_text=False):
+        pass
+    print('%d symbols' % len(symbols))
+
+    t0 = time.perf_counter()
+    index = SymbolIndex(symbols)
+    t = time.perf_counter() - t0
+    print('%-28s %8.3f s  (%d words, %d trigrams)' %
+          ('build index', t, len(index.words), len(index.trigrams)))
+
+    rng = random.Random(0)
+
+    def misspell(w):
+        i = rng.randrange(len(w))
+        return w[:i] + rng.choice('abcdefghijklmnopqrstuvwxyz') + w[i + 1:]
+
+    names = [_letters(rng.randrange(options.nsymbols))
+             for _ in range(options.nqueries)]
+    cases = [
+        ('prefix', lambda n: index.complete('sym' + n[:2], limit=20)),
+        ('search exact name', lambda n: index.search('sym' + n)),
+        ('search misspelled name',
+         lambda n: index.search(misspell('sym' + n))),
+        ('search description', lambda n: index.search('function %d'
+                                                      % len(n))),
+    ]
+    for name, query in cases:
+        t0 = time.perf_counter()
+        nresults = 0
+        for n in names:
+            nresults += len(query(n))
+        t = time.perf_counter() - t0
+        print('%-28s %8.1f us/query  %5.1f results/query' %
+              (name, t / len(names) * 1e6, nresults / len(names)))
+
+
+if __name__ == '__main__':
+    main()
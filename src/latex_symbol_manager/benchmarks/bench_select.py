@@ -0,0 +1,110 @@
+'''
+    Time of selecting and coloring the sections of a library with
+    thousands of sections (as lsm_select does), with the patterns
+    compiled by SectionSelector, compared with the previous way:
+    matching each pattern against each name as a substring, and
+    looking up each selected section in the lists of colored ones.
+'''
+from latex_symbol_manager import (parse_symbols, SectionSelector,
+    SectionTree, parse_patterns)
+from latex_symbol_manager.programs.select_subset import (COLORS,
+    write_selected)
+from optparse import OptionParser
+import io
+import time
+
+from .synthetic import synthetic_library
+
+
+def old_select(sections, include, colors):
+    ''' The previous lsm_select: returns the (section, template) pairs. '''
+    def get_sections(which):
+        l = []
+        for x in parse_patterns(which):
+            lx = [sections[k] for k in sections.keys() if x in k]
+            if x == 'all':
+                lx.extend(sections.values())
+            l.extend(lx)
+        return l
+
+    selected = get_sections(include)
+    colored = [(get_sections(colors.get(color, '')), template)
+               for color, template in COLORS]
+    result = []
+    for section in selected:
+        wrapper = None
+        for members, template in colored:
+            if section in members:
+                wrapper = template
+        result.append((section, wrapper))
+    return result
+
+
+def new_select(sections, include, colors):
+    ''' As lsm_select: the selected names and the templates by name. '''
+    tree = SectionTree(sections)
+    selected = SectionSelector(parse_patterns(include), tree).select(sections)
+    templates = {}
+    for color, template in COLORS:
+        selector = SectionSelector(parse_patterns(colors.get(color, '')),
+                                   tree)
+        for name in selector.select(sections):
+            templates[name] = template
+    return selected, templates
+
+
+def timed(function):
+    t0 = time.perf_counter()
+    result = function()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-n", "--nsymbols", default=50000, type='int')
+    parser.add_option("--per-section", default=10, type='int')
+    parser.add_option("--subsections", default=2, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_library(options.nsymbols, options.per_section,
+                             subsections=options.subsections)
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(text), 'synthetic', sections,
+                           symbols, keep_text=False):
+        pass
+    top = [name for name in sections if not '/' in name]
+    print('%d sections (%d top level), %d symbols' %
+          (len(sections), len(top), len(symbols)))
+
+    # many exact names, as a generated list of sections would have
+    exact = ','.join(top[::10])
+    # (the previous way has no wildcards: it cannot run the last one)
+    cases = [
+        ('all, color 1/10 exact', 'all',
+         {'red': exact}),
+        ('1/10 exact, color prefixes', exact,
+         {'blue': 'sec1', 'green': 'sec3/'}),
+        ('globs and regex', 'sec*/sub1,re:sec[0-9]+$',
+         {'red': 'sec?/*', 'green': 're:sec1'}),
+    ]
+    print('%-28s %10s %10s' % ('', 'previous', 'compiled'))
+    for i, (name, include, colors) in enumerate(cases):
+        if i < len(cases) - 1:
+            t_old, _ = timed(lambda: old_select(sections, include, colors))
+            previous = '%8.3f s' % t_old
+        else:
+            previous = '-'
+        t_new, (selected, templates) = timed(
+                            lambda: new_select(sections, include, colors))
+        print('%-28s %10s %8.3f s  (%d selected, %d colored)' %
+              (name, previous, t_new, len(selected), len(templates)))
+
+    out = io.StringIO()
+    selected, templates = new_select(sections, 'all', {'red': exact})
+    t, _ = timed(lambda: write_selected(sections, selected, templates, out))
+    print('%-28s %19.3f s  (%.1f MB)' %
+          ('write all', t, len(out.getvalue()) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
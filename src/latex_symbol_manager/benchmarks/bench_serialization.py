@@ -0,0 +1,85 @@
+'''
+    Round trip and throughput of the formats of serialization: a
+    list of commands as YAML (pure Python, as lsm_collect wrote it
+    before, and with libyaml) and as JSON lines, and the records of
+    the symbols of a synthetic library as JSON lines.
+'''
+from latex_symbol_manager import (parse_symbols, import_yaml, read_commands,
+    write_commands, write_symbol_records, read_symbol_records,
+    symbol_record, yaml_loader, yaml_dumper)
+from optparse import OptionParser
+import io
+import time
+
+from .synthetic import synthetic_library, _letters
+
+
+def timed(function):
+    t0 = time.perf_counter()
+    result = function()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-c", "--ncommands", default=100000, type='int')
+    parser.add_option("-n", "--nsymbols", default=50000, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    yaml = import_yaml()
+    print('libyaml: %s (loader %s, dumper %s)' %
+          (yaml.__with_libyaml__, yaml_loader().__name__,
+           yaml_dumper().__name__))
+
+    commands = ['\\sym' + _letters(i) for i in range(options.ncommands)]
+
+    def pure_yaml_write():
+        out = io.StringIO()
+        out.write(yaml.dump(commands))
+        return out.getvalue()
+
+    def pure_yaml_read(text):
+        return yaml.load(text, Loader=yaml.Loader)
+
+    def write(format):  # @ReservedAssignment
+        out = io.StringIO()
+        write_commands(commands, out, format=format)
+        return out.getvalue()
+
+    cases = [
+        ('yaml (pure Python)', pure_yaml_write, pure_yaml_read),
+        ('yaml', lambda: write('yaml'),
+         lambda text: read_commands(io.StringIO(text))),
+        ('jsonl', lambda: write('jsonl'),
+         lambda text: read_commands(io.StringIO(text))),
+    ]
+    print('%d commands' % len(commands))
+    for name, writer, reader in cases:
+        tw, text = timed(writer)
+        tr, back = timed(lambda: reader(text))
+        print('%-20s write %7.3f s  read %7.3f s  %7.0f kB  %s' %
+              (name, tw, tr, len(text) / 1000.0,
+               'ok' if back == commands else 'DIFFERENT'))
+
+    text = synthetic_library(options.nsymbols)
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(text), 'synthetic', sections,
+                           symbols, keep_text=False):
+        pass
+    ordered = sorted(symbols.values(), key=lambda s: s.definition_order)
+    out = io.StringIO()
+    tw, _ = timed(lambda: write_symbol_records(ordered, out))
+    data = out.getvalue()
+    tr, back = timed(lambda: list(read_symbol_records(io.StringIO(data))))
+    same = [symbol_record(s) for s in back] == [symbol_record(s)
+                                                 for s in ordered]
+    print('%d symbol records' % len(ordered))
+    print('%-20s write %7.3f s  read %7.3f s  %7.0f kB  %s' %
+          ('jsonl', tw, tr, len(data) / 1000.0,
+           'ok' if same else 'DIFFERENT'))
+    print('%-20s %7.0f records/s written, %7.0f records/s read' %
+          ('', len(ordered) / tw, len(ordered) / tr))
+
+
+if __name__ == '__main__':
+    main()
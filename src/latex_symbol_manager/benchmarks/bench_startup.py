@@ -0,0 +1,84 @@
+'''
+    Startup time of each script: a new interpreter importing the
+    module of the script and running it with --help, compared with
+    an interpreter doing nothing. With -v, also lists the slowest
+    imports of each script (python -X importtime).
+'''
+from optparse import OptionParser
+import os
+import subprocess
+import sys
+import time
+
+# script -> module with main()
+SCRIPTS = [
+    ('lsm_table', 'latex_symbol_manager.create_symbols_table'),
+    ('lsm_symbols', 'latex_symbol_manager.compact_all'),
+    ('lsm_extract', 'latex_symbol_manager.programs.extract'),
+    ('lsm_dependents', 'latex_symbol_manager.programs.dependents'),
+    ('lsm_server', 'latex_symbol_manager.programs.server'),
+    ('lsm_query', 'latex_symbol_manager.programs.query'),
+    ('lsm_search', 'latex_symbol_manager.programs.search'),
+    ('lsm_select', 'latex_symbol_manager.programs.select_subset'),
+    ('lsm_nomenc', 'latex_symbol_manager.programs.nomenc'),
+    ('lsm_collect', 'latex_symbol_manager.programs.collect.collect'),
+]
+
+RUN = ('import sys; sys.argv = [%r, "--help"]; '
+       'from %s import main; main()')
+
+
+def run_time(code, env, repeat):
+    """ Best wall time of running python -c code. """
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        t = time.perf_counter() - t0
+        if best is None or t < best:
+            best = t
+    return best
+
+
+def slowest_imports(code, env, n):
+    p = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                       env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.PIPE, universal_newlines=True)
+    imports = []
+    for line in p.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            imports.append((int(parts[1]), parts[2].strip()))
+    imports.sort(reverse=True)
+    return imports[:n]
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-r", "--repeat", default=10, type='int')
+    parser.add_option("-v", "--verbose", default=False, action='store_true')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    # the package as found by this interpreter
+    import latex_symbol_manager
+    src = os.path.dirname(os.path.dirname(latex_symbol_manager.__file__))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([src] + [env.get('PYTHONPATH', '')])
+
+    base = run_time('pass', env, options.repeat)
+    print('%-16s %8.1f ms' % ('python', base * 1000))
+    for script, module in SCRIPTS:
+        if args and not script in args:
+            continue
+        code = RUN % (script, module)
+        t = run_time(code, env, options.repeat)
+        print('%-16s %8.1f ms  (+%.1f ms)' %
+              (script, t * 1000, (t - base) * 1000))
+        if options.verbose:
+            for us, name in slowest_imports(code, env, 8):
+                print('    %8.1f ms  %s' % (us / 1000.0, name))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+'''
+    End to end benchmark of the parsers and of the programs, on a
+    synthetic library (sections with subsections, commands with and
+    without arguments, multi-line attributes, nomenclature entries)
+    and a synthetic document of many chapters using its symbols.
+
+    parse_stream and parse_symbols are timed in this process, with
+    the peak of the memory allocated (tracemalloc); each program is
+    run in a new interpreter, as from the command line, with its peak
+    resident memory. The caches are not used, so that each program
+    parses its inputs. Run with the names of some cases to run only
+    those; with --json, the results are also written to a file, to
+    compare them between versions.
+'''
+from latex_symbol_manager import parse_stream, parse_symbols
+from optparse import OptionParser
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .synthetic import synthetic_library, write_synthetic_document
+
+# Runs main() of a module and writes the peak resident memory of the
+# process to the standard error. On Linux ru_maxrss would also count
+# the memory of the parent before exec(), so VmHWM is used instead.
+RUN = '''
+import sys
+sys.argv = %r
+try:
+    from %s import main
+    main()
+finally:
+    try:
+        with open('/proc/self/status') as f:
+            status = f.read()
+        peak = int(status.split('VmHWM:')[1].split()[0]) * 1024
+    except (OSError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            peak *= 1024
+    sys.stderr.write('\\npeak memory: %%d\\n' %% peak)
+'''
+
+PEAK = 'peak memory: '
+
+
+def program_cases(library, document, outdir):
+    '''
+        Returns the list of (name, script, module, arguments, inputs)
+        of the programs to run; inputs are the files each one reads.
+    '''
+    def out(name):
+        return os.path.join(outdir, name)
+    table = ['--backend', 'string', '--no-cache']
+    return [
+        ('lsm_symbols', 'lsm_symbols', 'latex_symbol_manager.compact_all',
+         ['-o', out('compact.tex'), library], [library]),
+        ('lsm_table --style full', 'lsm_table',
+         'latex_symbol_manager.create_symbols_table',
+         table + ['--style', 'full', '-o', out('full.tex'), library],
+         [library]),
+        ('lsm_table --style minimal', 'lsm_table',
+         'latex_symbol_manager.create_symbols_table',
+         table + ['--style', 'minimal', '-o', out('minimal.tex'), library],
+         [library]),
+        ('lsm_nomenc', 'lsm_nomenc', 'latex_symbol_manager.programs.nomenc',
+         ['--no-cache', library], [library]),
+        ('lsm_extract', 'lsm_extract',
+         'latex_symbol_manager.programs.extract',
+         ['--no-cache', '-m', document, '-o', out('extracted.tex'),
+          library], [library, document]),
+        ('lsm_collect', 'lsm_collect',
+         'latex_symbol_manager.programs.collect.collect',
+         ['--no-cache', document], [document]),
+    ]
+
+
+def input_size(filenames):
+    ''' Bytes of the files, and of the files they \\input (chapter*). '''
+    total = 0
+    for filename in filenames:
+        dirname = os.path.dirname(filename)
+        total += os.path.getsize(filename)
+        if os.path.basename(filename) == 'main.tex':
+            total += sum(os.path.getsize(os.path.join(dirname, f))
+                         for f in os.listdir(dirname)
+                         if f.startswith('chapter'))
+    return total
+
+
+def run_program(script, module, args, env, cwd):
+    '''
+        Runs the program in a new interpreter; returns the wall time
+        and the peak resident memory (bytes) of the process.
+    '''
+    code = RUN % ([script] + args, module)
+    with tempfile.TemporaryFile() as stderr:
+        t0 = time.perf_counter()
+        p = subprocess.run([sys.executable, '-c', code], env=env, cwd=cwd,
+                           stdout=subprocess.DEVNULL, stderr=stderr)
+        t = time.perf_counter() - t0
+        stderr.seek(0)
+        lines = stderr.read().decode('utf-8', 'replace').splitlines()
+    if p.returncode != 0:
+        raise Exception('%s failed:\n%s' % (script, '\n'.join(lines)))
+    peak = [int(l[len(PEAK):]) for l in lines if l.startswith(PEAK)]
+    return t, peak[-1]
+
+
+def run_traced(function):
+    '''
+        Returns the wall time of the function and the peak of the
+        memory it allocates, measured in a second call (tracemalloc
+        slows it down).
+    '''
+    t0 = time.perf_counter()
+    function()
+    t = time.perf_counter() - t0
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return t, peak
+
+
+def main():
+    parser = OptionParser(usage='%prog [options] [case ...]')
+    parser.add_option("-n", "--nsymbols", default=20000, type='int')
+    parser.add_option("--per-section", default=50, type='int',
+                      help="Symbols in each section.")
+    parser.add_option("--subsections", default=2, type='int',
+                      help="Subsections of each section.")
+    parser.add_option("--chapters", default=20, type='int')
+    parser.add_option("--paragraphs", default=200, type='int',
+                      help="Paragraphs in each chapter.")
+    parser.add_option("-r", "--repeat", default=1, type='int',
+                      help="Run each case this many times; report the "
+                      "fastest.")
+    parser.add_option("--json", help="Also write the results to this file.")
+    parser.add_option("--keep", default=False, action='store_true',
+                      help="Do not delete the inputs and outputs.")
+    (options, args) = parser.parse_args()
+
+    # the package as found by this interpreter
+    import latex_symbol_manager
+    src = os.path.dirname(os.path.dirname(latex_symbol_manager.__file__))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([src] + [env.get('PYTHONPATH', '')])
+
+    dirname = tempfile.mkdtemp(prefix='bench_suite')
+    try:
+        text = synthetic_library(options.nsymbols, options.per_section,
+                                 subsections=options.subsections,
+                                 attributes=True)
+        library = os.path.join(dirname, 'library.tex')
+        with open(library, 'w') as f:
+            f.write(text)
+        document = write_synthetic_document(dirname, options.chapters,
+                                            options.paragraphs,
+                                            options.nsymbols)
+        outdir = os.path.join(dirname, 'out')
+        os.mkdir(outdir)
+        print('%d symbols, library %.1f MB, document %.1f MB (%d chapters)'
+              % (options.nsymbols, len(text) / 1e6,
+                 input_size([document]) / 1e6, options.chapters))
+        print('%-28s %8s %10s %12s %9s' %
+              ('', 'time', 'MB/s', 'symbols/s', 'peak MB'))
+
+        def report(name, t, peak, size, nsymbols):
+            print('%-28s %8.3f %10.2f %12s %9.1f' %
+                  (name, t, size / 1e6 / t,
+                   '%.0f' % (nsymbols / t) if nsymbols else '-',
+                   peak / 1e6))
+            results.append({'case': name, 'seconds': t, 'bytes': size,
+                            'symbols': nsymbols, 'peak_bytes': peak})
+
+        def best(function):
+            return min((function() for _ in range(options.repeat)),
+                       key=lambda r: r[0])
+
+        def run_parse_stream():
+            with open(library) as f:
+                for _ in parse_stream(f, library):
+                    pass
+
+        def run_parse_symbols():
+            with open(library) as f:
+                for _ in parse_symbols(f, library, {}, {}):
+                    pass
+
+        results = []
+        for name, function in [('parse_stream', run_parse_stream),
+                               ('parse_symbols', run_parse_symbols)]:
+            if args and not name in args:
+                continue
+            t, peak = best(lambda: run_traced(function))
+            report(name, t, peak, len(text), options.nsymbols)
+
+        for name, script, module, pargs, inputs in program_cases(
+                                                library, document, outdir):
+            if args and not name in args and not script in args:
+                continue
+            t, peak = best(lambda: run_program(script, module, pargs, env,
+                                               dirname))
+            nsymbols = options.nsymbols if library in inputs else 0
+            report(name, t, peak, input_size(inputs), nsymbols)
+
+        if options.json:
+            with open(options.json, 'w') as f:
+                json.dump({'nsymbols': options.nsymbols,
+                           'chapters': options.chapters,
+                           'paragraphs': options.paragraphs,
+                           'results': results}, f, indent=1)
+    finally:
+        if options.keep:
+            print('Files in %s' % dirname)
+        else:
+            shutil.rmtree(dirname)
+
+
+if __name__ == '__main__':
+    main()
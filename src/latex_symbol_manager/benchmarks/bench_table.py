@@ -0,0 +1,66 @@
+'''
+    Time to write the tables of lsm_table for a large synthetic
+    library, with the string backend (table_builder) and, if latex_gen
+    is installed, with latex_gen.
+'''
+from latex_symbol_manager import parse_symbols
+from latex_symbol_manager.table_builder import (write_table_full,
+    write_table_minimal)
+from optparse import OptionParser
+import io
+import time
+
+from .synthetic import synthetic_library
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option("-n", "--nsymbols", default=20000, type='int')
+    parser.add_option("--max-rows", default=None, type='int')
+    (options, args) = parser.parse_args() #@UnusedVariable
+
+    text = synthetic_library(options.nsymbols)
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(text), 'synthetic', sections,
+                           symbols, keep_text=False):
+        pass
+    ordered = sorted(sections.values(), key=lambda s: s.definition_order)
+    key = lambda s: s.definition_order
+    print('%d symbols in %d sections' % (len(symbols), len(sections)))
+
+    cases = [
+        ('string full',
+         lambda out: write_table_full(ordered, out, symbols_sort_key=key,
+                                      max_rows=options.max_rows)),
+        ('string minimal',
+         lambda out: write_table_minimal(ordered, out, symbols_sort_key=key,
+                                         max_rows=options.max_rows)),
+    ]
+    try:
+        # create_symbols_table imports it only when needed
+        import latex_gen  # @UnusedImport
+        from latex_symbol_manager.create_symbols_table import (create_table,
+            create_table_minimal)
+    except ImportError as e:
+        print('Not comparing with latex_gen: %s' % e)
+    else:
+        cases.extend([
+            ('latex_gen full',
+             lambda out: create_table(ordered, out, symbols_sort_key=key)),
+            ('latex_gen minimal',
+             lambda out: create_table_minimal(ordered, out,
+                                              symbols_sort_key=key)),
+        ])
+
+    for name, function in cases:
+        out = io.StringIO()
+        t0 = time.perf_counter()
+        function(out)
+        t = time.perf_counter() - t0
+        result = out.getvalue()
+        print('%-20s %8.3f s %10.0f symbols/s %6d longtables' %
+              (name, t, len(symbols) / t, result.count('\\end{longtable}')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+''' Generation of synthetic symbol libraries and documents. '''
+import os
+import random
+
+__all__ = ['synthetic_library', 'synthetic_document',
+           'write_synthetic_document']
+
+
+def synthetic_library(nsymbols, symbols_per_section=50, padding=0, seed=0,
+                      subsections=0, attributes=False):
+    """ 
+        Returns the text of a symbol library with the given number
+        of symbols, split in sections. 
+        
+        :param padding: number of lines of plain text after each symbol.
+        :param subsections: number of subsections "secN/subM" each
+            section is split in (the section keeps the first part).
+        :param attributes: also add multi-line %:example: blocks,
+            %:def: references, %:deprecated: and %:notfinal: to some
+            symbols and sections. These are drawn with their own
+            random generator, so the rest of the text is the same as
+            without them.
+    """
+    rng = random.Random(seed)
+    arng = random.Random('attributes%d' % seed)
+    part = max(1, symbols_per_section // (subsections + 1))
+    lines = []
+    for i in range(nsymbols):
+        section, k = divmod(i, symbols_per_section)
+        if k == 0:
+            lines.append('%%:section: sec%d: Section number %d\n'
+                         % (section, section))
+            if attributes and arng.random() < 0.1:
+                lines.append('%:notfinal:\n')
+            lines.append('\n')
+            lines.append('Some text describing the section.\n')
+        elif subsections and k % part == 0 and k // part <= subsections:
+            lines.append('%%:section: sec%d/sub%d: Subsection %d of %d\n'
+                         % (section, k // part, k // part, section))
+            if attributes and arng.random() < 0.1:
+                lines.append('%:deprecated:\n')
+            lines.append('\n')
+        name = 'sym%s' % _letters(i)
+        if rng.random() < 0.2:
+            lines.append('\\newcommand{\\%s}[2]{f_{%d}(#1,#2)} '
+                         '%% Function %d\n' % (name, i, i))
+        else:
+            lines.append('\\newcommand{\\%s}{x_{%d}} %% Symbol %d\n'
+                         % (name, i, i))
+        if rng.random() < 0.3:
+            lines.append('%%:nomenc: x_{%d}: the %d-th symbol\n' % (i, i))
+            lines.append('%    with a longer explanation\n')
+        if rng.random() < 0.1:
+            lines.append('%%:sort: %d\n' % i)
+        if attributes:
+            lines.extend(_attribute_lines(arng, name, i))
+        for _ in range(padding):
+            lines.append('Plain text, passed through as it is.\n')
+    return ''.join(lines)
+
+
+def _attribute_lines(rng, name, i):
+    lines = []
+    if rng.random() < 0.2:
+        lines.append('%%:example: $\\%s$ as in\n' % name)
+        lines.append('%%    $\\%s + \\%s = y_{%d}$\n' % (name, name, i))
+    if rng.random() < 0.1:
+        lines.append('%%:def: def:%s\n' % name)
+    if rng.random() < 0.05:
+        lines.append('%:deprecated:\n')
+    if rng.random() < 0.05:
+        lines.append('%:notfinal:\n')
+    return lines
+
+
+def synthetic_document(nparagraphs, nsymbols=1000, seed=0, standalone=True):
+    """
+        Returns the text of a document using the symbols of
+        synthetic_library(nsymbols), with comments, verbatim
+        environments, \\verb and line breaks "\\\\".
+
+        :param standalone: if False, only the paragraphs, without
+            \\documentclass and the document environment.
+    """
+    rng = random.Random(seed)
+    lines = []
+    if standalone:
+        lines.extend(['\\documentclass{article}\n', '\\begin{document}\n'])
+    for i in range(nparagraphs):
+        words = []
+        for _ in range(rng.randint(20, 60)):
+            if rng.random() < 0.15:
+                name = 'sym%s' % _letters(rng.randrange(nsymbols))
+                words.append('$\\%s_{%d}$' % (name, rng.randrange(10)))
+            else:
+                words.append('word')
+        lines.append(' '.join(words) + ' \\\\\n')
+        r = rng.random()
+        if r < 0.2:
+            lines.append('%% \\commented%s and 50\\%% of it\n' % _letters(i))
+        elif r < 0.3:
+            lines.append('\\begin{verbatim}\n\\verbatim%s{x}\n'
+                         '\\end{verbatim}\n' % _letters(i))
+        elif r < 0.35:
+            lines.append('Type \\verb|\\inverb%s| to get it.\n' % _letters(i))
+        lines.append('\n')
+    if standalone:
+        lines.append('\\end{document}\n')
+    return ''.join(lines)
+
+
+def write_synthetic_document(dirname, nchapters, nparagraphs,
+                             nsymbols=1000, seed=0):
+    """
+        Writes in dirname a document made of a main file that
+        \\input's nchapters files of nparagraphs paragraphs each
+        (see synthetic_document()); returns the name of the main file.
+    """
+    lines = ['\\documentclass{article}\n', '\\begin{document}\n']
+    for c in range(nchapters):
+        name = 'chapter%03d' % c
+        text = synthetic_document(nparagraphs, nsymbols, seed=seed + c,
+                                  standalone=False)
+        with open(os.path.join(dirname, name + '.tex'), 'w') as f:
+            f.write(text)
+        lines.append('\\input{%s}\n' % name)
+    lines.append('\\end{document}\n')
+    main = os.path.join(dirname, 'main.tex')
+    with open(main, 'w') as f:
+        f.write(''.join(lines))
+    return main
+
+
+def _letters(i):
+    """ Encodes an integer using only letters (valid in a TeX command). """
+    s = ''
+    while True:
+        s = chr(ord('a') + i % 26) + s
+        i //= 26
+        if i == 0:
+            return s
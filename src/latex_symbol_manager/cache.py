@@ -0,0 +1,256 @@
+from . import logger, Symbol, SymbolSection, NomenclatureEntry, Where
+from .diagnostics import diagnostics
+from .utils import profile
+import gc
+import hashlib
+import marshal
+import os
+import struct
+import sys
+import time
+
+__all__ = [
+    'load_sections_symbols',
+    'SymbolCache',
+]
+
+DEFAULT_CACHE_DIR = '.lsm-cache'
+
+# Change this when encode_sections_symbols() or what the parser
+# produces changes (2: parents of sections of any depth; 3: the
+# diagnostics of the parse are kept).
+CACHE_FORMAT = 3
+
+
+def load_sections_symbols(args, use_cache=True, cache_dir=DEFAULT_CACHE_DIR,
+                          use_mmap=False, jobs=1):
+    '''
+        Same as parse_all_sections_symbols(args), but the result is
+        cached in cache_dir and reused as long as none of the sources
+        changed. Nothing is cached when reading from stdin.
+
+        The diagnostics reported while parsing are cached too, and
+        reported again when the result comes from the cache.
+    '''
+    # here, so that importing DEFAULT_CACHE_DIR does not import the parser
+    from .interface import parse_all_sections_symbols
+    if not args or not use_cache:
+        return parse_all_sections_symbols(args, use_mmap=use_mmap, jobs=jobs)
+
+    cache = SymbolCache(cache_dir)
+    with profile.stage('cache read'):
+        cached = cache.get(args)
+    if cached is not None and cached[1] is None and diagnostics.enabled:
+        cached = None
+    if cached is None:
+        # describe the sources before reading them
+        manifest = [describe_file(os.path.abspath(f)) for f in args]
+        result = parse_all_sections_symbols(args, use_mmap=use_mmap,
+                                            jobs=jobs)
+        # None: not collected, the sources must be parsed again to have them
+        collected = diagnostics.state() if diagnostics.enabled else None
+        with profile.stage('cache write'):
+            cache.put(args, manifest, result, collected)
+    else:
+        result, collected = cached
+        diagnostics.merge(collected or {})
+        profile.count('sections', len(result[0]))
+        profile.count('symbols', len(result[1]))
+    return result
+
+
+class SymbolCache(object):
+    '''
+        A directory with one entry for each list of sources.
+
+        Each entry is a file containing two marshal records: first the
+        list of (path, mtime, size, sha1) of the sources, preceded by
+        its length, then the result of encode_sections_symbols() and
+        the diagnostics (Diagnostics.state()) of the parse.
+        A source whose mtime changed is still considered fresh if its
+        content hash did not change; its new mtime is then written in
+        the manifest, so that it is not hashed again the next time.
+    '''
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=32,
+                 max_age=30 * 24 * 3600):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+    def entry_filename(self, filenames):
+        paths = [os.path.abspath(f) for f in filenames]
+        # marshal's format depends on the Python version
+        key = '\0'.join(['%s' % CACHE_FORMAT, sys.version] + paths)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.lsm')
+
+    def get(self, filenames):
+        '''
+            Returns ((sections, symbols), diagnostics state), or None
+            if missing or stale.
+        '''
+        entry = self.entry_filename(filenames)
+        try:
+            with open(entry, 'rb') as f:
+                n = struct.unpack('<Q', f.read(8))[0]
+                manifest = marshal.loads(f.read(n))
+                stamps = list(manifest)
+                if not self.is_fresh(manifest):
+                    logger.debug('Cache entry %s is stale.' % entry)
+                    return None
+                data = f.read()
+            if manifest != stamps:
+                self.write_entry(entry, manifest, data)
+            # many objects and no cycles: the collector would only slow us
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                encoded, collected = marshal.loads(data)
+                result = decode_sections_symbols(encoded)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        except (IOError, OSError):
+            return None
+        except Exception as e:
+            logger.warning('Ignoring unreadable cache entry %s: %s'
+                           % (entry, e))
+            return None
+        # remember that it was used recently
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+        return result, collected
+
+    def is_fresh(self, manifest):
+        '''
+            True if none of the sources changed. The entries of the
+            sources only touched (same size and hash, other mtime)
+            are replaced in manifest by their new describe_file().
+        '''
+        for i, (path, mtime, size, sha1) in enumerate(manifest):
+            try:
+                st = os.stat(path)
+            except OSError:
+                return False
+            if st.st_mtime_ns == mtime and st.st_size == size:
+                continue
+            if st.st_size != size or file_sha1(path) != sha1:
+                return False
+            manifest[i] = (path, st.st_mtime_ns, size, sha1)
+        return True
+
+    def put(self, filenames, manifest, result, collected):
+        '''
+            Stores the result and the diagnostics state collected while
+            computing it; manifest is a list of describe_file().
+        '''
+        entry = self.entry_filename(filenames)
+        try:
+            data = marshal.dumps((encode_sections_symbols(*result),
+                                  collected))
+        except ValueError as e:
+            # something in the diagnostics that marshal cannot write
+            logger.warning('Could not write cache entry %s: %s' % (entry, e))
+            return
+        if self.write_entry(entry, manifest, data):
+            self.evict()
+
+    def write_entry(self, entry, manifest, data):
+        """ Writes the manifest and data (marshalled); False if failed. """
+        try:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            tmp = '%s.%d.tmp' % (entry, os.getpid())
+            with open(tmp, 'wb') as f:
+                header = marshal.dumps(manifest)
+                f.write(struct.pack('<Q', len(header)))
+                f.write(header)
+                f.write(data)
+            os.replace(tmp, entry)
+        except (IOError, OSError) as e:
+            logger.warning('Could not write cache entry %s: %s' % (entry, e))
+            return False
+        return True
+
+    def evict(self):
+        """ Removes the entries too old and the least recently used ones. """
+        try:
+            names = [n for n in os.listdir(self.directory)
+                     if n.endswith('.lsm')]
+        except OSError:
+            return
+        entries = []
+        for n in names:
+            path = os.path.join(self.directory, n)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except OSError:
+                pass
+        entries.sort(reverse=True)
+        now = time.time()
+        for i, (mtime, path) in enumerate(entries):
+            if i >= self.max_entries or now - mtime > self.max_age:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+def describe_file(path):
+    st = os.stat(path)
+    return (path, st.st_mtime_ns, st.st_size, file_sha1(path))
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def encode_sections_symbols(sections, symbols):
+    """ Converts the parsing result to tuples of builtin types. """
+    def where(w):
+        return (w.filename, w.lineno, w._text, w.offset)
+
+    esymbols = []
+    for s in symbols.values():
+        nomenc = s.nomenclature
+        if nomenc is not None:
+            nomenc = (nomenc.label, nomenc.text)
+        esymbols.append((s.symbol, s.tex, s.definition_order, s.tag, s.desc,
+                         s.long, s.example, s.nargs, where(s.where), nomenc,
+                         s.other))
+    esections = []
+    for s in sections.values():
+        esections.append((s.name, s.description, s.parent, where(s.where),
+                          s.definition_order, s.attrs, list(s.symbols)))
+    return esections, esymbols
+
+
+def decode_sections_symbols(encoded):
+    """ Inverse of encode_sections_symbols(). """
+    esections, esymbols = encoded
+    symbols = {}
+    for (symbol, tex, definition_order, tag, desc,
+         long, example, nargs, where, nomenc, #@ReservedAssignment
+         other) in esymbols:
+        if nomenc is not None:
+            nomenc = NomenclatureEntry(*nomenc)
+        symbols[symbol] = Symbol(symbol, tex, definition_order, tag, desc,
+                                 long, example, nargs, Where(*where), nomenc,
+                                 other)
+    sections = {}
+    for (name, description, parent, where, definition_order, attrs,
+         names) in esections:
+        ssymbols = dict((k, symbols[k]) for k in names)
+        section = SymbolSection(name, description, ssymbols, parent, {},
+                                Where(*where), definition_order, attrs)
+        sections[name] = section
+        if parent is not None:
+            sections[parent].subs[name] = section
+    return sections, symbols
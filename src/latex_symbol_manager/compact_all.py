@@ -1,82 +1,195 @@
-from . import OtherLine, ParsingError, SymbolSection, Symbol, parse_all_symbols
+from . import (logger, OtherLine, ParsingError, SymbolSection, Symbol,
+    parse_all_symbols, add_diagnostics_options,
+    setup_diagnostics, parse_query, select_symbols)
+from .diagnostics import diagnostics
+from .symbol import definition_block
+from .incremental import file_stamp, watch_files
+from .utils import wrap_script_entry_point, UserError, profile
 from optparse import OptionParser
+import io
+import os
 import sys
 
 
 def main():
+    wrap_script_entry_point(lsm_symbols_main, logger)
+
+
+def lsm_symbols_main(args=None):
     parser = OptionParser()
 
-    parser.add_option("--select", help="Select by tag")
+    parser.add_option("--select", help="Select the symbols matching this "
+                      "query, such as 'deprecated or (notfinal and "
+                      "section:dynamics)' (see symbol_query).")
 
     parser.add_option("--color", help="Use this color", default=None)
 
     parser.add_option("--markfirst", help="Mark first command",
                         default=False, action='store_true')
 
-    (options, args) = parser.parse_args() #@UnusedVariable
-
+    parser.add_option("-o", "--output",
+                      help="Write to this file instead of stdout.")
+    parser.add_option("--watch", default=False, action='store_true',
+                      help="Keep running, and write --output again every "
+                      "time a source changes.")
+    add_diagnostics_options(parser)
+
+    (options, args) = parser.parse_args(args) #@UnusedVariable
+    setup_diagnostics(options)
+
+    if options.select is not None:
+        try:
+            parse_query(options.select)
+        except ValueError as e:
+            raise UserError('Invalid --select: %s' % e)
+
+    if options.watch:
+        watch_compact(args, options)
+    elif options.output:
+        with open(options.output, 'w', buffering=1 << 20) as f:
+            write_preamble(options, f)
+            write_compact(parse_all_symbols(args), options, f)
+    else:
+        write_preamble(options, sys.stdout)
+        write_compact(parse_all_symbols(args), options, sys.stdout)
+
+
+def write_preamble(options, out):
     if options.markfirst:
-        sys.stdout.write("""
+        out.write("""
            %\\newcommand{\\markfirst}[3]{#3}
         """)
 
-    out = sys.stdout
-
-    def comment(el, s):
-        s = s.replace('\n', ' ')
-        out.write('%% %s: %s\n' % (el.symbol, s))
-
-    for el in parse_all_symbols(args):
-        if isinstance(el, OtherLine):
-            sys.stdout.write(el.line)
-            sys.stdout.write('\n')
-        elif isinstance(el, Symbol):
-
-            if options.select is not None:
-                if not options.select in el.other:
-                    comment(el, 'Skipped because no field %r' % options.select)
-                    continue
-
-            filters = []
-
-            if options.color:
-                if el.nargs == 0:
-                    def highlight(x):
-                        return "{\\color{%s} %s}" % (options.color, x)
-                    filters.append(highlight)
 
-#            if options.deprecated:
-#                if 'deprecated' in el.other and el.nargs == 0:
-#                    def mark_deprecated(x):
-#                        return "{\\color[rgb]{1,0,0} %s}" % x
-#                    filters.append(highlight)
-
-            if options.markfirst:
-                if el.nargs == 0:
-                    boolname = 'used%s' % str(el.symbol[1:])
-
-                    def mark_first(x):
-                        return ("\\markfirst{%s}{%s}{%s}" %
-                                (el.symbol[1:], boolname, x))
-                    filters.append(mark_first)
-
-                    sys.stdout.write('\\newbool{%s}\\setbool{%s}{false}\n'
-                                     % (boolname, boolname))
-
-            def wrapper(x):
-                for f in filters:
-                    x = f(x)
-                return x
-
-            sys.stdout.write(el.tex_definition(wrapper=wrapper))
-            sys.stdout.write('\n')
-
-        elif isinstance(el, SymbolSection):
-            pass
+def write_compact(elements, options, out):
+    if options.select is None:
+        # the sources are parsed while rendering
+        with profile.stage('parse and render'):
+            CompactRenderer(options).render(elements, profile.output(out))
+        return
+
+    # the query is evaluated on all the symbols at once
+    with profile.stage('parse'):
+        elements = list(elements)
+    with profile.stage('select'):
+        symbols = dict((el.symbol, el) for el in elements
+                       if isinstance(el, Symbol))
+        sections = dict((el.name, el) for el in elements
+                        if isinstance(el, SymbolSection))
+        selected = select_symbols(symbols, options.select, sections)
+    with profile.stage('render'):
+        CompactRenderer(options, selected).render(elements,
+                                                  profile.output(out))
+
+
+class CompactRenderer(object):
+    '''
+        Writes the definitions of the symbols as lsm_symbols does.
+
+        What depends on the options (the wrappers for --color and
+        --markfirst) is decided once here, not for each symbol, and
+        the output is joined in large chunks before being written.
+        If selected (a set of names) is given, the other symbols are
+        skipped.
+    '''
+
+    def __init__(self, options, selected=None, chunk_size=4096):
+        self.select = options.select
+        self.selected = selected
+        self.chunk_size = chunk_size
+        # Applied to the body of the symbols without arguments,
+        # innermost first: color, then markfirst.
+        if options.color:
+            self.color_open = '{\\color{%s} ' % options.color
+            self.color_close = '}'
         else:
-            raise ParsingError('Unknown element: {0}'.format(el), el.where)
-            assert False
+            self.color_open = self.color_close = ''
+        self.markfirst = bool(options.markfirst)
+
+    def render(self, elements, out):
+        parts = []
+        append = parts.append
+        chunk_size = self.chunk_size
+        selected = self.selected
+        for el in elements:
+            if isinstance(el, Symbol):
+                if selected is not None and not el.symbol in selected:
+                    append('%% %s: %s\n' %
+                           (el.symbol, ('Skipped because not selected by '
+                                        '%r' % self.select)
+                            .replace('\n', ' ')))
+                else:
+                    self.add_symbol(el, append)
+            elif isinstance(el, OtherLine):
+                append(el.line)
+                append('\n')
+            elif isinstance(el, SymbolSection):
+                pass
+            else:
+                raise ParsingError('Unknown element: {0}'.format(el),
+                                   el.where)
+            if len(parts) >= chunk_size:
+                out.write(''.join(parts))
+                del parts[:]
+        out.write(''.join(parts))
+
+    def add_symbol(self, el, append):
+        tex = el.tex
+        if el.nargs == 0:
+            tex = self.color_open + tex + self.color_close
+            if self.markfirst:
+                name = str(el.symbol[1:])
+                boolname = 'used' + name
+                tex = ('\\markfirst{' + name + '}{' + boolname + '}{' +
+                       tex + '}')
+                append('\\newbool{' + boolname + '}\\setbool{' + boolname +
+                       '}{false}\n')
+        append(definition_block(el.symbol, el.nargs, tex, el.desc))
+        append('\n')
+
+
+def watch_compact(args, options):
+    '''
+        Each file is converted independently of the others, so we keep
+        the output for each, and convert again only the files changed.
+    '''
+    if not options.output:
+        raise UserError('--watch needs --output.')
+    if not args:
+        raise UserError('--watch needs the source files.')
+
+    # filename -> (stamp, output)
+    converted = {}
+
+    def update(changed):
+        if changed is not None:
+            sys.stderr.write('Changed: %s\n' % ", ".join(changed))
+        # the limits on the messages apply to each update
+        diagnostics.reset()
+        for filename in args:
+            stamp = file_stamp(filename)
+            if filename in converted and converted[filename][0] == stamp:
+                continue
+            out = io.StringIO()
+            try:
+                write_compact(parse_all_symbols([filename]), options, out)
+            except (ParsingError, IOError) as e:
+                sys.stderr.write('%s\n' % e)
+                converted.pop(filename, None)
+                return
+            converted[filename] = (stamp, out.getvalue())
+
+        tmp = options.output + '.tmp'
+        with open(tmp, 'w') as f:
+            write_preamble(options, f)
+            for filename in args:
+                f.write(converted[filename][1])
+        os.replace(tmp, options.output)
+        sys.stderr.write('Written %s\n' % options.output)
+
+    update(None)
+    watch_files(args, update)
+
 
 if __name__ == '__main__':
     main()
-
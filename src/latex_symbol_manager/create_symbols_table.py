@@ -1,15 +1,28 @@
-from latex_gen import (color_rgb, small, verbatim_soft, latex_escape, texttt,
-    emph, latex_fragment)
 from optparse import OptionParser
+import hashlib
+import io
+import marshal
+import os
+import re
 import sys
-from .interface import parse_all_sections_symbols
+from . import (logger, SymbolSection, add_diagnostics_options,
+    setup_diagnostics, parse_query, select_symbols, SectionSelector,
+    SectionTree, parse_patterns)
+from .cache import load_sections_symbols, DEFAULT_CACHE_DIR
+from .diagnostics import diagnostics
+from .incremental import SymbolLibrary, watch_files
+from .table_builder import (write_table_full, write_table_minimal,
+    heading_indent)
+from .utils import wrap_script_entry_point, UserError, profile
 
 
 def raw_appearance(s):
+    from latex_gen import color_rgb, texttt
     return color_rgb(texttt(s), [0.5, 0.5, 0.5])
 
 
 def write_symbol_rows(s, table, write_examples, example_size):
+    from latex_gen import small, verbatim_soft, latex_escape
     if s.nargs == 0:
         with table.row() as row:
             row.cell_tex(raw_appearance(latex_escape(s.symbol)))
@@ -44,6 +57,8 @@ def write_symbol_rows(s, table, write_examples, example_size):
 
 def create_table(sections, output, write_examples=True, example_size='8cm',
                  symbols_sort_key=lambda x: x.symbol.lower()):
+    # latex_gen is only needed by this backend
+    from latex_gen import latex_escape, emph, latex_fragment
 
     with latex_fragment(output) as fragment:
         with fragment.longtable(['l', 'l', 'l']) as table:
@@ -57,10 +72,11 @@ def create_table(sections, output, write_examples=True, example_size='8cm',
 
                 with table.row() as row:
                     head1 = raw_appearance(latex_escape(section.name))
-                    head2 = emph(section.description)
+                    head2 = emph(section.description or '')
 
                     # row.cell_tex(head1)
-                    row.multicolumn_tex(3, 'l', head1 + ' ' + head2)
+                    row.multicolumn_tex(3, 'l', heading_indent(section) +
+                                        head1 + ' ' + head2)
 
                 table.hline()
                 if section.parent is None:
@@ -76,12 +92,14 @@ def create_table(sections, output, write_examples=True, example_size='8cm',
 
 def create_table_minimal(sections, output,
                          symbols_sort_key=lambda x: x.symbol.lower()):
+    from latex_gen import latex_fragment
     with latex_fragment(output) as fragment:
         with fragment.longtable(['c', 'l']) as table:
 
             for section in sections:
                 with table.row() as row:
-                    row.multicolumn_tex(2, 'l', section.description)
+                    row.multicolumn_tex(2, 'l', heading_indent(section) +
+                                        (section.description or ''))
 
                 table.hline()
                 if section.parent is None:
@@ -99,6 +117,12 @@ def create_table_minimal(sections, output,
 
 
 def main():
+    # the messages of our exceptions are enough
+    wrap_script_entry_point(lsm_table_main, logger,
+                            exceptions_no_traceback=(Exception,))
+
+
+def lsm_table_main(args=None):
     parser = OptionParser()
 
     parser.add_option("--sort_sections_alpha",
@@ -110,60 +134,374 @@ def main():
                       default=False, action='store_true')
 
     parser.add_option("--style", help="Type of table", default='full')
+    parser.add_option("--sections", help="Only these sections: comma "
+                      "separated patterns as for lsm_select ('name/' for "
+                      "name and its subsections).")
+    parser.add_option("--select", help="Only the symbols matching this "
+                      "query, such as 'not deprecated' (as lsm_symbols).")
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Always parse the sources, ignoring %s/."
+                      % DEFAULT_CACHE_DIR)
+    parser.add_option("-j", "--jobs", default=1, type='int',
+                      help="Parse the sources, and render the sections "
+                      "with --output-dir, with this many processes "
+                      "(0: one per CPU).")
+
+    parser.add_option("--backend", default='latex_gen',
+                      help="How to write the table: 'latex_gen', or "
+                      "'string' (faster, for large libraries).")
+    parser.add_option("--max-rows", type='int', default=None,
+                      help="Split the table in longtables with at most "
+                      "this many rows (with --backend string).")
+
+    parser.add_option("-o", "--output",
+                      help="Write to this file instead of stdout.")
+    parser.add_option("--output-dir",
+                      help="Write one file for each section in this "
+                      "directory, and index.tex which includes them.")
+    parser.add_option("--watch", default=False, action='store_true',
+                      help="Keep running, and write --output again every "
+                      "time a source changes.")
 
     # TODO: flat option
-
-    (options, args) = parser.parse_args() #@UnusedVariable
-
-    try:
-        sections, symbols = parse_all_sections_symbols(args)
-
-        sys.stderr.write('Loaded %d sections with %d symbols.\n' %
-                         (len(sections), len(symbols)))
-        if not sections or not symbols:
-            raise Exception('Not enough data found.')
-
-        # which = args
-        which = None #XXX add switch
-        if which:
-            selected = dict([(k, v)
-                             for (k, v) in sections.items() if k in which])
-        else:
-            selected = sections
-
-        if not selected:
-            raise Exception('No sections selected (which: %r)' % which)
-
-        ordered = [v for k, v in selected.items()]
-        if options.sort_sections_alpha:
-            key = lambda v: v.name
+    add_diagnostics_options(parser)
+
+    (options, args) = parser.parse_args(args) #@UnusedVariable
+    setup_diagnostics(options)
+    if options.select is not None:
+        try:
+            parse_query(options.select)
+        except ValueError as e:
+            raise UserError('Invalid --select: %s' % e)
+
+    if options.watch:
+        watch_table(args, options)
+    else:
+        sections, symbols = load_sections_symbols(
+                                args, use_cache=options.cache,
+                                use_mmap=options.mmap,
+                                jobs=options.jobs or None)
+        if options.output_dir:
+            written = write_directory(options.output_dir, sections,
+                                      symbols, options)
+            sys.stderr.write('Written %d fragments.\n' % len(written))
+        elif options.output:
+            write_file(options.output, sections, symbols, options)
         else:
-            key = lambda v: v.definition_order
-        ordered.sort(key=key)
-
-        if options.sort_symbols_alpha:
-            key = lambda v: v.symbol.lower
+            write_table(sections, symbols, options, sys.stdout)
+
+
+def write_table(sections, symbols, options, out, index=None):
+    ordered = select_sections(sections, symbols, options, index)
+    check_options(options)
+    with profile.stage('render'):
+        render_sections(ordered, profile.output(out), options.style,
+                        options.backend, options.sort_symbols_alpha,
+                        options.max_rows)
+
+
+def select_sections(sections, symbols, options, index=None):
+    '''
+        Returns the sections to write, in order. index is the
+        AttributeIndex of the symbols for --select, if already built.
+    '''
+    sys.stderr.write('Loaded %d sections with %d symbols.\n' %
+                     (len(sections), len(symbols)))
+    if not sections or not symbols:
+        raise Exception('Not enough data found.')
+
+    which = options.sections
+    if which:
+        # "name/" as the subtree of name in the tree
+        selector = SectionSelector(parse_patterns(which),
+                                   SectionTree(sections))
+        names = selector.select(sections)
+        selected = dict((k, v) for (k, v) in sections.items() if k in names)
+    else:
+        selected = sections
+
+    if not selected:
+        raise Exception('No sections selected (which: %r)' % which)
+
+    if options.select is not None:
+        with profile.stage('select'):
+            names = select_symbols(symbols, options.select, sections,
+                                   index)
+        if not names:
+            raise Exception('No symbols match %r.' % options.select)
+        selected = restrict_sections(selected, names)
+
+    # each section followed by its subsections, at any depth; the
+    # sections at the same level in order of definition, or by name
+    if options.sort_sections_alpha:
+        key = lambda v: v.name
+    else:
+        key = lambda v: v.definition_order
+    return SectionTree(selected, key).ordered()
+
+
+def restrict_sections(sections, names):
+    '''
+        Returns copies of the sections with only the symbols in names,
+        keeping the sections with some of them and their ancestors.
+    '''
+    keep = set()
+    for name, section in sections.items():
+        if not any(k in names for k in section.symbols):
+            continue
+        while name is not None and not name in keep:
+            keep.add(name)
+            name = sections[name].parent if name in sections else None
+    restricted = {}
+    for name in keep:
+        if not name in sections:
+            continue
+        s = sections[name]
+        symbols = dict((k, v) for k, v in s.symbols.items() if k in names)
+        restricted[name] = SymbolSection(s.name, s.description, symbols,
+                                         s.parent, s.subs, s.where,
+                                         s.definition_order, s.attrs)
+    return restricted
+
+
+STYLES = ['full', 'minimal']
+BACKENDS = ['latex_gen', 'string']
+
+
+def check_options(options):
+    if options.style not in STYLES:
+        msg = ('No known style %r. Valid options: %s.' %
+               (options.style, STYLES))
+        raise Exception(msg)
+    if options.backend not in BACKENDS:
+        raise Exception('No known backend %r.' % options.backend)
+    if options.backend == 'latex_gen' and options.max_rows is not None:
+        raise Exception('--max-rows needs --backend string.')
+
+
+def symbol_alpha_key(s):
+    return s.symbol.lower()
+
+
+def symbol_order_key(s):
+    return s.definition_order
+
+
+def render_sections(ordered, out, style, backend, sort_symbols_alpha,
+                    max_rows=None):
+    key = symbol_alpha_key if sort_symbols_alpha else symbol_order_key
+    if backend == 'string':
+        if style == 'full':
+            write_table_full(ordered, out, write_examples=True,
+                             symbols_sort_key=key, max_rows=max_rows)
         else:
-            key = lambda v: v.definition_order
-
-        def full():
-            create_table(ordered, sys.stdout,
+            write_table_minimal(ordered, out, symbols_sort_key=key,
+                                max_rows=max_rows)
+    else:
+        if style == 'full':
+            create_table(ordered, out,
                          write_examples=True, symbols_sort_key=key)
-
-        def minimal():
-            create_table_minimal(ordered, sys.stdout, symbols_sort_key=key)
-
-        styles = {'minimal': minimal, 'full': full}
-        if options.style not in styles:
-            msg = ('No known style %r. Valid options: %s.' %
-                   (options.style, styles.keys()))
-            raise Exception(msg)
-        styles[options.style]()
-
-    except Exception as e:
-        sys.stderr.write(str(e))
-        sys.stderr.write('\n')
-        sys.exit(-1)
+        else:
+            create_table_minimal(ordered, out, symbols_sort_key=key)
+
+
+def render_fragment(section, style, backend, sort_symbols_alpha, max_rows):
+    """ Returns the table of one section (runs in the workers). """
+    out = io.StringIO()
+    render_sections([section], out, style, backend, sort_symbols_alpha,
+                    max_rows)
+    return out.getvalue()
+
+
+def write_directory(dirname, sections, symbols, options, index=None):
+    '''
+        Writes one fragment for each section in dirname, and the file
+        index.tex that \\inputs them in order. The fragments are
+        rendered by a pool of processes; a fragment is written only if
+        its content changed, so that its modification time says
+        whether the section changed. Returns the fragments written.
+
+        The manifest in dirname records for each fragment the hash of
+        what it was rendered from (see fragment_key()): the sections
+        with the same hash are not rendered again, and the fragments
+        deleted are only those in the manifest no longer needed.
+    '''
+    ordered = select_sections(sections, symbols, options, index)
+    check_options(options)
+    if not os.path.exists(dirname):
+        os.makedirs(dirname)
+
+    params = (options.style, options.backend, options.sort_symbols_alpha,
+              options.max_rows)
+    names = fragment_names(ordered)
+    previous = read_fragments_manifest(dirname)
+    keys = {}
+    todo = []
+    for name, s in zip(names, ordered):
+        keys[name] = fragment_key(s, params)
+        if (previous.get(name) != keys[name]
+            or not os.path.exists(os.path.join(dirname, name))):
+            todo.append((name, s))
+    profile.count('fragments unchanged', len(names) - len(todo))
+
+    # no need to send the subsections to the workers
+    shallow = [SymbolSection(s.name, s.description, s.symbols, s.parent, {},
+                             s.where, s.definition_order, s.attrs)
+               for _, s in todo]
+    jobs = options.jobs or None
+    with profile.stage('render'):
+        if jobs == 1 or len(shallow) <= 1:
+            fragments = [render_fragment(s, *params) for s in shallow]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = [executor.submit(render_fragment, s, *params)
+                           for s in shallow]
+                fragments = [f.result() for f in futures]
+
+    written = []
+    with profile.stage('write'):
+        for (name, _), content in zip(todo, fragments):
+            if write_if_changed(os.path.join(dirname, name), content):
+                written.append(name)
+                profile.count('characters written', len(content))
+
+    index = ''.join('\\input{%s}\n' % os.path.join(dirname, name)
+                    for name in names)
+    write_if_changed(os.path.join(dirname, 'index.tex'), index)
+
+    # the fragments we wrote for sections which are no more
+    for name in previous:
+        if not name in keys:
+            try:
+                os.unlink(os.path.join(dirname, name))
+            except OSError:
+                pass
+    write_fragments_manifest(dirname, keys)
+    return written
+
+
+FRAGMENT_PREFIX = 'section-'
+FRAGMENTS_MANIFEST = '.lsm-fragments'
+# Change this when fragment_key() or the rendering changes.
+FRAGMENTS_FORMAT = 1
+
+
+def fragment_key(section, params):
+    '''
+        The hash of what the fragment of the section depends on: the
+        section, its symbols and the rendering options, but not where
+        they are defined, so that editing a section does not render
+        again those after it.
+    '''
+    symbols = [(s.symbol, s.tex, s.definition_order, s.desc, s.long,
+                s.example, s.nargs, s.nomenclature is not None
+                and (s.nomenclature.label, s.nomenclature.text),
+                sorted(s.other.items()))
+               for s in section.symbols.values()]
+    key = (FRAGMENTS_FORMAT, params, section.name, section.description,
+           section.parent, sorted(section.attrs.items()), symbols)
+    return hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+def read_fragments_manifest(dirname):
+    """ Returns the dictionary fragment name -> key written last time. """
+    try:
+        with open(os.path.join(dirname, FRAGMENTS_MANIFEST), 'rb') as f:
+            version, keys = marshal.loads(f.read())
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return {}
+    if version != FRAGMENTS_FORMAT:
+        return {}
+    return keys
+
+
+def write_fragments_manifest(dirname, keys):
+    filename = os.path.join(dirname, FRAGMENTS_MANIFEST)
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(marshal.dumps((FRAGMENTS_FORMAT, keys)))
+    os.replace(tmp, filename)
+
+
+def fragment_names(ordered):
+    """ Returns the file names for the sections, distinct. """
+    names = []
+    used = set()
+    for s in ordered:
+        base = FRAGMENT_PREFIX + re.sub(r'[^A-Za-z0-9_.-]+', '-', s.name)
+        name = base + '.tex'
+        i = 1
+        while name in used:
+            i += 1
+            name = '%s-%d.tex' % (base, i)
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def write_if_changed(filename, content):
+    """ Writes the file unless it has this content already. """
+    try:
+        with open(filename) as f:
+            if f.read() == content:
+                return False
+    except IOError:
+        pass
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(content)
+    os.replace(tmp, filename)
+    return True
+
+
+def write_file(filename, sections, symbols, options, index=None):
+    """ Writes the table to a temporary file, then renames it. """
+    tmp = filename + '.tmp'
+    with open(tmp, 'w') as f:
+        write_table(sections, symbols, options, f, index)
+    os.replace(tmp, filename)
+
+
+def watch_table(args, options):
+    if not options.output and not options.output_dir:
+        raise UserError('--watch needs --output or --output-dir.')
+    if not args:
+        raise UserError('--watch needs the source files.')
+
+    library = SymbolLibrary(args, use_mmap=options.mmap)
+
+    def update(changed):
+        if changed is not None:
+            sys.stderr.write('Changed: %s\n' % ", ".join(changed))
+        # the limits on the messages apply to each update
+        diagnostics.reset()
+        library.refresh()
+        if library.error is not None:
+            # already reported; wait for the next change
+            return
+        try:
+            # kept by the library until the sources change
+            index = None if options.select is None else library.index()
+            if options.output_dir:
+                written = write_directory(options.output_dir,
+                                          library.sections, library.symbols,
+                                          options, index)
+                what = ', '.join(written) or 'nothing'
+            else:
+                write_file(options.output, library.sections, library.symbols,
+                           options, index)
+                what = options.output
+        except Exception as e:
+            sys.stderr.write('%s\n' % e)
+            return
+        sys.stderr.write('Written %s\n' % what)
+
+    update(None)
+    watch_files(args, update)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,278 @@
+from . import (logger, NewCommand, SectionHeader, CommandDefinition, Where)
+from .utils import UserError
+import json
+import os
+import pathlib
+
+__all__ = [
+    'write_database',
+    'read_database_definitions',
+    'is_database',
+    'query_database',
+]
+
+# Change this when the schema changes.
+DATABASE_FORMAT = 1
+
+SQLITE_MAGIC = b'SQLite format 3\0'
+
+SCHEMA = '''
+CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE sections (
+    name TEXT PRIMARY KEY,
+    description TEXT,
+    parent TEXT,
+    definition_order INTEGER,
+    attrs TEXT,
+    filename TEXT,
+    lineno INTEGER,
+    offset INTEGER
+);
+CREATE TABLE symbols (
+    symbol TEXT PRIMARY KEY,
+    definition_order INTEGER,
+    section TEXT,
+    tex TEXT,
+    nargs INTEGER,
+    desc TEXT,
+    example TEXT,
+    nomenc_label TEXT,
+    nomenc_text TEXT,
+    filename TEXT,
+    lineno INTEGER,
+    offset INTEGER
+);
+CREATE TABLE attributes (
+    symbol TEXT,
+    key TEXT,
+    value TEXT,
+    PRIMARY KEY (symbol, key)
+);
+CREATE INDEX symbols_section ON symbols (section);
+CREATE INDEX symbols_filename ON symbols (filename);
+CREATE INDEX symbols_order ON symbols (definition_order);
+CREATE INDEX attributes_key ON attributes (key, value);
+'''
+
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE symbols_fts USING fts5 (symbol UNINDEXED, desc,
+                                             nomenclature);
+'''
+
+
+def is_database(filename):
+    """ True if filename is a SQLite file (as written by write_database). """
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except (IOError, OSError):
+        return False
+
+
+def write_database(sections, symbols, filename, sources=()):
+    '''
+        Writes the result of parse_all_sections_symbols() to a new
+        SQLite database, indexed by section, attribute and file, and
+        with full-text search over description and nomenclature
+        (if SQLite has FTS5).
+    '''
+    import sqlite3
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            fts = True
+        except sqlite3.OperationalError:
+            logger.warning('SQLite without FTS5: text queries will be slow.')
+            fts = False
+
+        info = [('format', str(DATABASE_FORMAT)),
+                ('sources', json.dumps(list(sources))),
+                ('fts', str(int(fts)))]
+        conn.executemany('INSERT INTO info VALUES (?, ?)', info)
+
+        conn.executemany('INSERT INTO sections VALUES '
+                         '(?, ?, ?, ?, ?, ?, ?, ?)',
+            [(s.name, s.description, s.parent, s.definition_order,
+              json.dumps(s.attrs), s.where.filename, s.where.lineno,
+              s.where.offset) for s in sections.values()])
+
+        rows = []
+        attributes = []
+        texts = []
+        for s in symbols.values():
+            nomenc = s.nomenclature
+            label, text = ((nomenc.label, nomenc.text) if nomenc is not None
+                           else (None, None))
+            rows.append((s.symbol, s.definition_order, s.tag, s.tex, s.nargs,
+                         s.desc, s.example, label, text, s.where.filename,
+                         s.where.lineno, s.where.offset))
+            for k, v in s.other.items():
+                attributes.append((s.symbol, k, v))
+            texts.append((s.symbol, s.desc, text))
+        conn.executemany('INSERT INTO symbols VALUES '
+                         '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.executemany('INSERT INTO attributes VALUES (?, ?, ?)',
+                         attributes)
+        if fts:
+            conn.executemany('INSERT INTO symbols_fts VALUES (?, ?, ?)',
+                             texts)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, filename)
+
+
+def connect(filename):
+    """ Opens a database written by write_database(), read-only. """
+    # not imported before: most programs never open a database
+    import sqlite3
+    # as a URI, so that "#", "?" and "%" in the path are quoted
+    uri = pathlib.Path(filename).absolute().as_uri() + '?mode=ro'
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        row = conn.execute("SELECT value FROM info WHERE key='format'")
+        version = row.fetchone()
+    except sqlite3.DatabaseError:
+        version = None
+    if version is None or version[0] != str(DATABASE_FORMAT):
+        conn.close()
+        raise ValueError('%s is not a symbol database of format %d; '
+                         'compile it again.' % (filename, DATABASE_FORMAT))
+    return conn
+
+
+def read_database_definitions(filename):
+    '''
+        Returns the definitions stored in the database, as
+        read_definitions() returns them for a source: adding them
+        with add_definitions() gives the same sections and symbols
+        as parsing the sources.
+    '''
+    conn = connect(filename)
+    try:
+        sections = conn.execute('SELECT name, description, attrs, filename, '
+                                'lineno, offset FROM sections '
+                                'ORDER BY definition_order').fetchall()
+        symbols = conn.execute('SELECT symbol, section, tex, nargs, desc, '
+                               'filename, lineno, offset FROM symbols '
+                               'ORDER BY definition_order').fetchall()
+        attributes = {}
+        for symbol, k, v in conn.execute('SELECT symbol, key, value '
+                                         'FROM attributes'):
+            attributes.setdefault(symbol, {})[k] = v
+    finally:
+        conn.close()
+
+    # The symbols of a section follow its header, but the sections are
+    # numbered when first created: as the parent of a subsection, the
+    # header may come much later. The sections before the next symbol
+    # are created first, those with symbols without description, so
+    # that both orders are the same as in the sources.
+    with_symbols = set(row[1] for row in symbols)
+
+    definitions = []
+    headers = {}
+    for name, description, attrs, filename, lineno, offset in sections:
+        where = Where(filename, lineno, offset=offset)
+        headers[name] = SectionHeader(name, description, json.loads(attrs),
+                                      where)
+    pending = iter(headers.values())
+    created = set()
+
+    def create_until(name):
+        if name in created:
+            return
+        for header in pending:
+            created.add(header.name)
+            if header.name == name:
+                return
+            if header.name in with_symbols:
+                header = SectionHeader(header.name, None, {}, header.where)
+            definitions.append(header)
+
+    current = None
+    for (symbol, section, tex, nargs, desc, filename, lineno,
+         offset) in symbols:
+        if section != current:
+            create_until(section)
+            definitions.append(headers[section])
+            current = section
+        command = NewCommand(symbol, nargs, tex, desc,
+                             Where(filename, lineno, offset=offset))
+        definitions.append(CommandDefinition(command,
+                                             attributes.get(symbol, {})))
+    create_until(None)
+    return definitions
+
+
+def like_escape(s):
+    """ Escapes s for LIKE ... ESCAPE '\\' (\\, % and _ are literal). """
+    return s.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def query_database(filename, section=None, attrs=(), text=None,
+                   source=None):
+    '''
+        Returns (symbol, section, desc, filename, lineno) for the
+        symbols matching all the criteria, in definition order:
+
+        - section: in this section or its subsections;
+        - attrs: list of (key, value) that the symbol has; value
+          None means any value;
+        - text: full-text query over description and nomenclature
+          (FTS5 syntax), or a substring if there is no FTS5;
+        - source: defined in a file whose path ends with this.
+
+        Raises UserError if SQLite cannot run the text query.
+    '''
+    conditions = []
+    params = []
+    if section is not None:
+        conditions.append("(s.section = ? OR s.section LIKE ? ESCAPE '\\')")
+        params.extend([section, like_escape(section) + '/%'])
+    for k, v in attrs:
+        if v is None:
+            conditions.append('EXISTS (SELECT 1 FROM attributes a WHERE '
+                              'a.symbol = s.symbol AND a.key = ?)')
+            params.append(k)
+        else:
+            conditions.append('EXISTS (SELECT 1 FROM attributes a WHERE '
+                              'a.symbol = s.symbol AND a.key = ? '
+                              'AND a.value = ?)')
+            params.extend([k, v])
+    if source is not None:
+        conditions.append("s.filename LIKE ? ESCAPE '\\'")
+        params.append('%' + like_escape(source))
+
+    import sqlite3
+    conn = connect(filename)
+    try:
+        if text is not None:
+            fts = conn.execute("SELECT value FROM info "
+                               "WHERE key='fts'").fetchone()[0] == '1'
+            if fts:
+                conditions.append('s.symbol IN (SELECT symbol FROM '
+                                  'symbols_fts WHERE symbols_fts MATCH ?)')
+                params.append(text)
+            else:
+                conditions.append("(s.desc LIKE ? ESCAPE '\\' "
+                                  "OR s.nomenc_text LIKE ? ESCAPE '\\')")
+                params.extend(['%' + like_escape(text) + '%'] * 2)
+
+        sql = ('SELECT s.symbol, s.section, s.desc, s.filename, s.lineno '
+               'FROM symbols s')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY s.definition_order'
+        try:
+            return conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            # a query that FTS5 cannot parse, such as 'foo AND ('
+            raise UserError('Invalid text query %r: %s' % (text, e))
+    finally:
+        conn.close()
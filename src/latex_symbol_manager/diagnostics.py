@@ -0,0 +1,173 @@
+from . import logger
+import atexit
+import json
+import logging
+
+__all__ = [
+    'Diagnostics',
+    'diagnostics',
+    'add_diagnostics_options',
+    'setup_diagnostics',
+]
+
+
+class Diagnostics(object):
+    '''
+        Collects the warnings and notes about the sources, instead of
+        logging each of them.
+
+        The messages are counted by kind (for example "strange-tag");
+        only the first max_per_kind of each kind are logged (all if
+        None), and kept as examples for summary(). The message is
+        formatted only for those, so a kind reported thousands of
+        times costs little.
+
+        When disabled, report() is a function doing nothing.
+    '''
+
+    def __init__(self, logger, max_per_kind=10):
+        self.logger = logger
+        self.max_per_kind = max_per_kind
+        # If False, the examples are kept but not logged
+        # (in the workers, see parse_files_parallel).
+        self.echo = True
+        self.reset()
+        self.enable()
+
+    def reset(self):
+        # kind -> number of messages
+        self.counts = {}
+        # kind -> level of the first message
+        self.levels = {}
+        # kind -> list of (message, where)
+        self.examples = {}
+
+    def enable(self):
+        self.enabled = True
+        self.report = self.collect
+
+    def disable(self):
+        self.enabled = False
+        self.report = ignore
+
+    def collect(self, kind, msg, *args, **kwargs):
+        '''
+            Reports a message msg % args of the given kind; the
+            keywords are where (a Where) and level (default WARNING).
+        '''
+        n = self.counts.get(kind, 0) + 1
+        self.counts[kind] = n
+        if n == 1:
+            self.levels[kind] = kwargs.get('level', logging.WARNING)
+        limit = self.max_per_kind
+        if limit is not None and n > limit:
+            if n == limit + 1:
+                self.log_suppressed(kind)
+            return
+        if args:
+            msg = msg % args
+        where = kwargs.get('where')
+        if where is not None:
+            where = str(where)
+        self.examples.setdefault(kind, []).append((msg, where))
+        if self.echo:
+            self.log(kwargs.get('level', logging.WARNING), msg, where)
+
+    def log_suppressed(self, kind):
+        if self.echo:
+            self.logger.log(self.levels[kind],
+                            'Not showing more messages of kind %r.' % kind)
+
+    def log(self, level, msg, where):
+        if where is not None:
+            self.logger.log(level, '%s\n @ %s' % (msg, where))
+        else:
+            self.logger.log(level, msg)
+
+    def state(self):
+        """ What was collected, to be given to merge(). """
+        return dict((k, (self.levels[k], n, self.examples.get(k, [])))
+                    for k, n in self.counts.items())
+
+    def merge(self, state):
+        """ Adds what another collector (in a worker) collected. """
+        if not self.enabled:
+            return
+        for kind, (level, count, examples) in state.items():
+            for msg, where in examples:
+                self.collect(kind, msg, level=level, where=where)
+            if count == len(examples):
+                continue
+            before = self.counts.get(kind, 0)
+            self.counts[kind] = before + count - len(examples)
+            self.levels.setdefault(kind, level)
+            limit = self.max_per_kind
+            if limit is not None and before <= limit < self.counts[kind]:
+                self.log_suppressed(kind)
+
+    def summary(self):
+        ''' Returns a dict with, for each kind, count, level and examples. '''
+        kinds = {}
+        for kind, n in sorted(self.counts.items()):
+            kinds[kind] = {
+                'count': n,
+                'level': logging.getLevelName(self.levels[kind]),
+                'examples': [{'message': msg, 'where': where}
+                             for msg, where in self.examples.get(kind, [])],
+            }
+        return {'total': sum(self.counts.values()), 'kinds': kinds}
+
+    def log_summary(self):
+        """ Logs how many messages of each kind were not shown. """
+        for kind, n in sorted(self.counts.items()):
+            shown = len(self.examples.get(kind, []))
+            if n > shown:
+                self.logger.log(self.levels[kind],
+                                '%d messages of kind %r (%d shown).'
+                                % (n, kind, shown))
+
+    def write_summary(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.summary(), f, indent=1)
+            f.write('\n')
+
+
+def ignore(*args, **kwargs):
+    pass
+
+
+# The collector used by the parsing and the programs.
+diagnostics = Diagnostics(logger)
+
+
+def add_diagnostics_options(parser):
+    parser.add_option("--max-messages", type='int', default=10,
+                      help="Log at most this many messages of each kind "
+                      "(-1: all).")
+    parser.add_option("--diagnostics", metavar='FILE',
+                      help="Write a JSON summary of the messages to FILE.")
+    parser.add_option("--no-diagnostics", dest='diagnostics_enabled',
+                      default=True, action='store_false',
+                      help="Do not collect or show the warnings.")
+
+
+def setup_diagnostics(options):
+    '''
+        Configures the collector from the options added by
+        add_diagnostics_options(); the summary is logged (and written)
+        when the program exits.
+    '''
+    if not options.diagnostics_enabled:
+        diagnostics.disable()
+        return
+    if options.max_messages < 0:
+        diagnostics.max_per_kind = None
+    else:
+        diagnostics.max_per_kind = options.max_messages
+    atexit.register(finish_diagnostics, options.diagnostics)
+
+
+def finish_diagnostics(filename):
+    diagnostics.log_summary()
+    if filename:
+        diagnostics.write_summary(filename)
@@ -0,0 +1,209 @@
+__all__ = [
+    'SymbolGraph',
+]
+
+
+class SymbolGraph(object):
+    '''
+        The dependencies among the symbols of a library: for each
+        symbol, the symbols used in its definition (uses) and the
+        symbols whose definition uses it (used_by).
+
+        The graph is built once, scanning each definition only once.
+        Its strongly connected components are found at construction;
+        the closure of each one is computed when first needed and then
+        remembered, so that many queries on a large library are cheap.
+    '''
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        # command -> commands of the library it uses, in definition order
+        self.uses = {}
+        # command -> commands of the library using it, in definition order
+        self.used_by = dict((name, []) for name in symbols)
+        for name, symbol in sorted(symbols.items(),
+                                   key=lambda x: x[1].definition_order):
+            deps = set(symbol.symbol_dependencies())
+            deps.discard(name)
+            deps = [d for d in deps if d in symbols]
+            deps.sort(key=self.definition_order)
+            self.uses[name] = deps
+            for d in deps:
+                self.used_by[d].append(name)
+
+        # components in reverse topological order: a component only
+        # uses the components before it
+        self.components = strongly_connected_components(self.uses)
+        # command -> index in self.components
+        self.component_of = {}
+        for i, component in enumerate(self.components):
+            for name in component:
+                self.component_of[name] = i
+        # index of component -> frozenset of commands it uses, itself too
+        self.closures = {}
+
+    def definition_order(self, name):
+        return self.symbols[name].definition_order
+
+    def closure(self, commands):
+        '''
+            Returns the set of the symbols of the library among commands,
+            and of the symbols they use, directly or not.
+        '''
+        result = set()
+        seen = set()
+        for c in commands:
+            i = self.component_of.get(c)
+            if i is not None and not i in seen:
+                seen.add(i)
+                result.update(self.component_closure(i))
+        return result
+
+    def component_closure(self, index):
+        closures = self.closures
+        if index in closures:
+            return closures[index]
+        # The successors of a component come before it, so computing
+        # the closures in increasing order needs no recursion.
+        todo = [index]
+        needed = set([index])
+        while todo:
+            i = todo.pop()
+            for j in self.successors(i):
+                if not j in closures and not j in needed:
+                    needed.add(j)
+                    todo.append(j)
+        for i in sorted(needed):
+            closure = set(self.components[i])
+            for j in self.successors(i):
+                closure.update(closures[j])
+            closures[i] = frozenset(closure)
+        return closures[index]
+
+    def successors(self, index):
+        component_of = self.component_of
+        result = set()
+        for name in self.components[index]:
+            for d in self.uses[name]:
+                j = component_of[d]
+                if j != index:
+                    result.add(j)
+        return result
+
+    def dependents(self, commands, transitive=True):
+        '''
+            Returns the symbols whose definition uses one of commands,
+            directly or, if transitive is True, through other symbols.
+
+            The result is an ordered dict from each dependent to the
+            command through which it depends: the nearest dependents
+            come first.
+        '''
+        used_by = self.used_by
+        result = {}
+        level = [c for c in commands if c in used_by]
+        seen = set(level)
+        while level:
+            following = []
+            for c in level:
+                for d in used_by[c]:
+                    if not d in seen:
+                        seen.add(d)
+                        result[d] = c
+                        following.append(d)
+            if not transitive:
+                break
+            level = following
+        return result
+
+    def cycles(self, commands=None):
+        '''
+            Returns the groups of symbols that use each other, as lists
+            in definition order; if commands is given, only the groups
+            containing some of them.
+        '''
+        if commands is None:
+            indices = range(len(self.components))
+        else:
+            indices = sorted(set(self.component_of[c] for c in commands
+                                 if c in self.component_of))
+        return [sorted(self.components[i], key=self.definition_order)
+                for i in indices if len(self.components[i]) > 1]
+
+    def topological_order(self, commands):
+        '''
+            Returns the symbols in commands ordered so that each one comes
+            after the symbols it uses; among the ones that do not depend
+            on each other, the order is the definition order. Symbols that
+            use each other (see cycles()) have no such order; they are
+            still listed once each.
+        '''
+        commands = set(c for c in commands if c in self.symbols)
+        order = []
+        done = set()
+        for root in sorted(commands, key=self.definition_order):
+            if root in done:
+                continue
+            done.add(root)
+            # depth-first, emitting a symbol after its dependencies
+            stack = [(root, iter(self.uses[root]))]
+            while stack:
+                name, deps = stack[-1]
+                for d in deps:
+                    if d in commands and not d in done:
+                        done.add(d)
+                        stack.append((d, iter(self.uses[d])))
+                        break
+                else:
+                    stack.pop()
+                    order.append(name)
+        return order
+
+
+def strongly_connected_components(graph):
+    '''
+        Tarjan's algorithm, without recursion. graph is a dict from node
+        to the list of its successors. Returns the components as lists,
+        in reverse topological order.
+    '''
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, successors = work[-1]
+            for s in successors:
+                if not s in index:
+                    index[s] = lowlink[s] = counter
+                    counter += 1
+                    stack.append(s)
+                    on_stack.add(s)
+                    work.append((s, iter(graph[s])))
+                    break
+                elif s in on_stack:
+                    lowlink[node] = min(lowlink[node], index[s])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        n = stack.pop()
+                        on_stack.discard(n)
+                        component.append(n)
+                        if n == node:
+                            break
+                    components.append(component)
+    return components
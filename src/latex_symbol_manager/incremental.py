@@ -0,0 +1,188 @@
+from . import logger, ParsingError
+from .parsing_structure import read_definitions, add_definitions
+from .symbol_query import AttributeIndex
+import os
+import time
+
+__all__ = [
+    'SymbolLibrary',
+    'watch_files',
+]
+
+
+class SymbolLibrary(object):
+    '''
+        The sections and symbols defined by a list of files, kept up to
+        date by refresh().
+
+        For each file we keep the definitions found in it, which do not
+        depend on the other files, and what it added to sections and
+        symbols. When a file changes, only that file is read again;
+        then what the files from it onwards added is removed, and their
+        definitions are added again in order. This gives the same
+        definition_order, parent sections and errors as parsing
+        all the files in sequence.
+    '''
+
+    def __init__(self, filenames, use_mmap=False):
+        self.filenames = list(filenames)
+        self.use_mmap = use_mmap
+        self.sections = {}
+        self.symbols = {}
+        # filename -> (mtime, size) when last read
+        self.stamps = {}
+        # filename -> result of read_definitions()
+        self.definitions = {}
+        # for each file added: (names of sections, names of symbols,
+        # (name, where, attrs) of the sections without description
+        # before, which it defined)
+        self.added = []
+        # The error preventing to add the file after the last one added
+        self.error = None
+        # AttributeIndex of sections and symbols, built by index()
+        self._index = None
+
+    def refresh(self):
+        '''
+            Reads the files that changed since the last call, and
+            updates sections and symbols. Returns the list of files
+            that changed.
+
+            If a file cannot be parsed, the error is kept in self.error,
+            and sections and symbols contain what the files before it
+            define.
+        '''
+        changed = []
+        for filename in self.filenames:
+            stamp = file_stamp(filename)
+            if self.stamps.get(filename) != stamp or stamp is None:
+                changed.append(filename)
+
+        if not changed and self.stamps:
+            return changed
+
+        self._index = None
+        first = len(self.added)
+        for filename in changed:
+            first = min(first, self.filenames.index(filename))
+            self.stamps[filename] = file_stamp(filename)
+            self.definitions.pop(filename, None)
+
+        self.remove_from(first)
+        self.error = None
+        for i in range(first, len(self.filenames)):
+            filename = self.filenames[i]
+            try:
+                if not filename in self.definitions:
+                    logger.debug('Reading %s' % filename)
+                    self.definitions[filename] = \
+                        read_definitions(filename, use_mmap=self.use_mmap)
+                definitions, error = self.definitions[filename]
+                self.add(definitions)
+                if error is not None:
+                    raise error
+            except (ParsingError, ValueError, IOError, OSError) as e:
+                self.error = e
+                logger.error(str(e))
+                self.remove_from(i)
+                break
+        return changed
+
+    def index(self):
+        '''
+            The AttributeIndex of sections and symbols, for
+            select_symbols(); built when first needed after each
+            refresh() that changed something.
+        '''
+        if self._index is None:
+            self._index = AttributeIndex(self.symbols, self.sections)
+        return self._index
+
+    def set_filenames(self, filenames):
+        '''
+            Changes the list of files. What the files from the first
+            that differs onwards added is removed; the next refresh()
+            reads them again.
+        '''
+        filenames = list(filenames)
+        first = 0
+        for old, new in zip(self.filenames, filenames):
+            if old != new:
+                break
+            first += 1
+        if self.error is not None and len(self.added) >= first:
+            # the error of a file that was removed or moved
+            self.error = None
+        self._index = None
+        self.remove_from(first)
+        for filename in self.filenames[first:] + filenames[first:]:
+            self.stamps.pop(filename, None)
+            self.definitions.pop(filename, None)
+        self.filenames = filenames
+
+    def add(self, definitions):
+        nsections = len(self.sections)
+        nsymbols = len(self.symbols)
+        # the ancestors created for subsections, defined maybe later
+        undefined = [(s, s.where, s.attrs) for s in self.sections.values()
+                     if s.description is None]
+        try:
+            for _ in add_definitions(definitions, self.sections,
+                                     self.symbols):
+                pass
+        finally:
+            # dicts keep the order of insertion
+            defined = [(s.name, where, attrs)
+                       for s, where, attrs in undefined
+                       if s.description is not None]
+            self.added.append((list(self.sections)[nsections:],
+                               list(self.symbols)[nsymbols:], defined))
+
+    def remove_from(self, index):
+        """ Removes what was added by the files from index onwards. """
+        while len(self.added) > index:
+            section_names, symbol_names, defined = self.added.pop()
+            # also from the sections of the files before, such as the
+            # parents they created and this file defined
+            for name in symbol_names:
+                symbol = self.symbols.pop(name)
+                section = self.sections.get(symbol.tag)
+                if section is not None:
+                    section.symbols.pop(name, None)
+            for name, where, attrs in defined:
+                section = self.sections[name]
+                section.description = None
+                section.where = where
+                section.attrs = attrs
+            for name in reversed(section_names):
+                section = self.sections.pop(name)
+                parent = self.sections.get(section.parent)
+                if parent is not None:
+                    parent.subs.pop(name, None)
+
+
+def file_stamp(filename):
+    """ Returns (mtime, size), or None if the file does not exist. """
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def watch_files(filenames, callback, interval=0.5):
+    '''
+        Calls callback(changed) every time some of the files change,
+        by polling their modification time. Runs until interrupted.
+    '''
+    stamps = dict((f, file_stamp(f)) for f in filenames)
+    while True:
+        time.sleep(interval)
+        changed = []
+        for f in filenames:
+            stamp = file_stamp(f)
+            if stamp != stamps[f]:
+                stamps[f] = stamp
+                changed.append(f)
+        if changed:
+            callback(changed)
@@ -1,35 +1,85 @@
 import sys
-from .parsing_structure import parse_symbols
+from . import OtherLine
+from .parsing_structure import (parse_symbols, build_symbols, add_definitions,
+    read_definitions)
+from .database import is_database, read_database_definitions
+from .parsing_mmap import parse_file_mmap, newline
+from .parallel import parse_files_parallel
+from .utils import profile
 
 __all__ = [
     'parse_all_symbols',
     'parse_all_sections_symbols',
 ]
 
-def parse_all_symbols(args):
+def parse_all_symbols(args, use_mmap=False):
+    ''' 
+        If use_mmap is True, the files are memory-mapped (see
+        parse_file_mmap); the lines of the OtherLine are decoded, so
+        they are strings either way.
+
+        The files can also be symbol databases (see write_database);
+        these give no OtherLine.
+    '''
     if not args:
         for x in parse_symbols(sys.stdin, 'stdin'):
             yield x
     else:
         for filename in args:
-            with open(filename) as f:
-                for x in parse_symbols(f, filename):
+            if is_database(filename):
+                definitions = read_database_definitions(filename)
+                for x in add_definitions(definitions):
+                    yield x
+            elif use_mmap:
+                elements = decode_other_lines(parse_file_mmap(filename))
+                for x in build_symbols(elements):
                     yield x
+            else:
+                with open(filename) as f:
+                    for x in parse_symbols(f, filename, keep_text=False):
+                        yield x
+
 
+def decode_other_lines(elements, encoding='utf-8'):
+    """ The elements of parse_file_mmap(), with each OtherLine a str. """
+    for el in elements:
+        if isinstance(el, OtherLine):
+            el = OtherLine(newline(str(el.line, encoding)), el.where)
+        yield el
 
-def parse_all_sections_symbols(args):
+
+def parse_all_sections_symbols(args, use_mmap=False, jobs=1):
+    ''' 
+        If jobs is not 1, the files are read by that many processes
+        (None: one per CPU); see parse_files_parallel.
+
+        The files can also be symbol databases (see write_database).
+    '''
     sections = {}
     symbols = {}
 
-    if not args:
+    if args and len(args) > 1 and jobs != 1:
+        sections, symbols = parse_files_parallel(args, jobs=jobs,
+                                                 use_mmap=use_mmap)
+    elif not args:
         #logger.debug('Parsing from stdin...')
-        for _ in parse_symbols(sys.stdin, 'stdin', sections, symbols):
-            pass
+        with profile.stage('parse'):
+            for _ in parse_symbols(sys.stdin, 'stdin', sections, symbols):
+                pass
     else:
         for filename in args:
             #logger.debug('Parsing %s' % filename)
-            with open(filename) as f:
-                for _ in parse_symbols(f, filename, sections, symbols):
+            # the same as parse_symbols(), timing the two steps
+            with profile.stage('parse'):
+                definitions, error = read_definitions(filename,
+                                                      use_mmap=use_mmap)
+            with profile.stage('merge'):
+                for _ in add_definitions(definitions, sections, symbols):
                     pass
+            if error is not None:
+                raise error
+    profile.count('files', len(args or ['stdin']))
+    profile.count('sections', len(sections))
+    profile.count('symbols', len(symbols))
     return sections, symbols
 
@@ -1,26 +1,28 @@
+from collections import deque
 
 
 class Lookahead:
 
     def __init__(self, iterator):
-        self.iter = iterator
-        self.buffer = []
+        self.iter = iter(iterator)
+        self.buffer = deque()
 
     def __iter__(self):
         return self
 
     def next(self): #@ReservedAssignment
         if self.buffer:
-            return self.buffer.pop(0)
+            return self.buffer.popleft()
         else:
-            return self.iter.next()
+            return next(self.iter)
+
+    __next__ = next
 
     def lookahead(self, n):
         """Return an item n entries ahead in the iteration."""
         while n >= len(self.buffer):
             try:
-                self.buffer.append(self.iter.next())
+                self.buffer.append(next(self.iter))
             except StopIteration:
                 return None
         return self.buffer[n]
-
@@ -0,0 +1,92 @@
+from . import SectionHeader, CommandDefinition, NewCommand, Where
+from .diagnostics import diagnostics
+from .parsing_structure import read_definitions, add_definitions
+from .utils import profile
+
+__all__ = [
+    'parse_files_parallel',
+]
+
+
+def parse_files_parallel(filenames, jobs=None, use_mmap=False,
+                         sections=None, symbols=None):
+    '''
+        Same as parse_all_sections_symbols(filenames), but the files are
+        read concurrently by a pool of jobs processes.
+
+        Reading a file does not depend on the other files; the
+        definitions found are then added in the order of the files,
+        so that definition_order, the dummy parent sections and
+        the errors are the same as reading them in sequence. The
+        warnings of the workers are reported here, in the same order.
+    '''
+    if sections is None:
+        sections = {}
+    if symbols is None:
+        symbols = {}
+
+    # imports multiprocessing, which is slow to import
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        futures = [executor.submit(read_encoded_definitions, f, use_mmap)
+                   for f in filenames]
+        for future in futures:
+            with profile.stage('parse'):
+                definitions, error, collected, counters = future.result()
+            diagnostics.merge(collected)
+            for k, n in counters.items():
+                profile.count(k, n)
+            with profile.stage('merge'):
+                definitions = decode_definitions(definitions)
+                for _ in add_definitions(definitions, sections, symbols):
+                    pass
+            if error is not None:
+                raise error
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return sections, symbols
+
+
+def read_encoded_definitions(filename, use_mmap):
+    '''
+        Runs in the worker: read_definitions() with tuples for pickle,
+        and the warnings, which the parent logs, and the counters of
+        the profile, which the parent adds.
+    '''
+    diagnostics.reset()
+    diagnostics.echo = False
+    counters = profile.counters = {}
+    definitions, error = read_definitions(filename, use_mmap=use_mmap)
+    return (encode_definitions(definitions), error, diagnostics.state(),
+            counters)
+
+
+def encode_definitions(definitions):
+    def where(w):
+        return (w.filename, w.lineno, w._text, w.offset)
+
+    encoded = []
+    for d in definitions:
+        if isinstance(d, CommandDefinition):
+            c = d.command
+            encoded.append((c.command, c.nargs, c.body, c.comment,
+                            where(c.where), d.attrs))
+        else:
+            encoded.append((d.name, d.description, d.attrs, where(d.where)))
+    return encoded
+
+
+def decode_definitions(encoded):
+    definitions = []
+    for x in encoded:
+        if len(x) == 6:
+            command, nargs, body, comment, where, attrs = x
+            c = NewCommand(command, nargs, body, comment, Where(*where))
+            definitions.append(CommandDefinition(c, attrs))
+        else:
+            name, description, attrs, where = x
+            definitions.append(SectionHeader(name, description, attrs,
+                                             Where(*where)))
+    return definitions
@@ -1,5 +1,6 @@
 from . import (NewCommand, OtherLine, SpecialComment, ParsingError, Where,
-    Lookahead)
+    intern_string)
+from .utils import profile
 import re
 import sys
 
@@ -26,55 +27,91 @@ def is_special_comment(line):
     return bool(line.lstrip().startswith('%:'))
 
 
-def parse_stream(stream, filename, line_count=0):
+# Both forms of \newcommand (with and without [nargs]) in one pattern.
+newcommand_regex = re.compile(r'\s*\\newcommand{\\(\w+)}(?:\[(\d*)\])?{(.*)}'
+                              r'\s*%?(.*)')
+comment_regex = re.compile(r'\s*%')
+special_comment_regex = re.compile(r'\s*%:')
+
+
+def parse_stream(stream, filename, line_count=0, keep_text=True):
     ''' 
         Parses a tex stream line-by-line and returns objects
         of the kind NewCommand, SpecialComment, OtherLine.
+        
+        If keep_text is False, the Where objects do not hold the text
+        of the line, which is read back from the file if needed.
+        
+        This is a single pass over the stream: lines are numbered
+        as they are read, the only lookahead is the next line, and
+        lines containing neither "\\" nor "%" are passed through
+        without being matched against any pattern.
     '''
-
-    counter = count_lines(stream, line_count)
-    peek = Lookahead(strip_empty(counter))
-
-    for line in peek:
-        where = Where(filename, count_lines.count, line)
-        m = re.match(r'\s*\\newcommand{\\(\w+)}{(.*)}\s*%?(.*)', line)
+    match_newcommand = newcommand_regex.match
+    match_comment = comment_regex.match
+    match_special = special_comment_regex.match
+    filename = intern_string(filename)
+    make_where = Where if keep_text else where_without_text
+
+    numbered = enumerate(stream, line_count)
+    nextline = next(numbered, None)
+    lineno = line_count - 1
+    while nextline is not None:
+        lineno, line = nextline
+        nextline = next(numbered, None)
+
+        if not '\\' in line and not '%' in line:
+            yield OtherLine(line, make_where(filename, lineno, line))
+            continue
+
+        where = make_where(filename, lineno, line)
+        m = match_newcommand(line)
         if m:
-            symbol = '\\' + m.group(1)
-            command = m.group(2)
-            description = m.group(3)
-            description = description.replace('%', '')
-            yield NewCommand(symbol, 0, command, description, where)
+            yield newcommand_from_match(m, where)
+
+        elif match_special(line):
+            tag, lines = special_comment_start(line, where)
+
+            while (nextline is not None
+                   and match_comment(nextline[1])
+                   and not match_special(nextline[1])):
+                # Strip empty comments
+                content = content_of_comment(nextline[1])
+                if content:
+                    lines.append(content)
+                lineno = nextline[0]
+                nextline = next(numbered, None)
+
+            yield SpecialComment(tag, lines, where)
         else:
-            m = re.match(r'\s*\\newcommand{\\(\w+)}\[(\d*)\]{(.*)}\s*%?(.*)',
-                         line)
-            if m:
-                symbol = '\\' + m.group(1)
-                nargs = int(m.group(2))
-                command = m.group(3)
-                description = m.group(4)
-                description = description.replace('%', '')
-                yield NewCommand(symbol, nargs, command, description, where)
-
-            elif is_special_comment(line):
-                rest = line[line.index('%:') + 2:]
-                if not ':' in rest:
-                    raise ParsingError('No closing ":" found.', where)
-                pos = rest.index(':')
-                tag = rest[:pos]
-                lines = [rest[pos + 1:].strip()]
-
-                while (peek.lookahead(0)
-                       and is_comment(peek.lookahead(0))
-                       and not is_special_comment(peek.lookahead(0))):
-                    comment_line = peek.next()
-                    # Strip empty comments
-                    content = content_of_comment(comment_line)
-                    if content:
-                        lines.append(content)
-
-                yield SpecialComment(tag, lines, where)
-            else:
-                yield OtherLine(line, where)
+            yield OtherLine(line, where)
+    profile.count('lines', lineno + 1 - line_count)
+
+
+def where_without_text(filename, lineno, text): #@UnusedVariable
+    return Where(filename, lineno)
+
+
+def newcommand_from_match(m, where):
+    """ Creates the NewCommand from a match of newcommand_regex. """
+    symbol = '\\' + m.group(1)
+    nargs = m.group(2)
+    nargs = 0 if nargs is None else int(nargs)
+    command = m.group(3)
+    description = m.group(4)
+    description = description.replace('%', '')
+    return NewCommand(symbol, nargs, command, description, where)
+
+
+def special_comment_start(line, where):
+    """ Returns the tag and the first line of content of "%:tag: ...". """
+    rest = line[line.index('%:') + 2:]
+    if not ':' in rest:
+        raise ParsingError('No closing ":" found.', where)
+    pos = rest.index(':')
+    tag = intern_string(rest[:pos])
+    lines = [rest[pos + 1:].strip()]
+    return tag, lines
 
 
 def content_of_comment(comment_line):
@@ -0,0 +1,138 @@
+from . import (OtherLine, SpecialComment, Where, intern_string,
+    newcommand_regex, comment_regex, special_comment_regex,
+    newcommand_from_match, special_comment_start, content_of_comment)
+from .utils import profile
+import mmap
+import re
+
+__all__ = ['parse_file_mmap']
+
+# The whitespace of str.strip() in ASCII, and any non-ASCII byte: the
+# lines found are decoded and matched again, as str.
+space = br'[ \t\f\v\x1c-\x1f\x80-\xff]*'
+# Start of the only lines that can become NewCommand or SpecialComment.
+candidate_regex = re.compile(br'^' + space + br'(?:\\newcommand|%)', re.M)
+# The same, for a file whose lines can also end with a lone "\r".
+candidate_cr_regex = re.compile(br'(?:\A|(?<=[\r\n]))' + space +
+                                br'(?:\\newcommand|%)')
+# A comment line that can continue a special comment.
+continuation_regex = re.compile(space + br'%(?!:)')
+lone_cr_regex = re.compile(br'\r(?!\n)')
+line_end_regex = re.compile(br'\r\n?|\n')
+
+
+def parse_file_mmap(filename, other_lines=True, encoding='utf-8'):
+    '''
+        Same as parse_stream(open(filename), filename), but the file is
+        memory-mapped and scanned as bytes: only the lines that can
+        be a NewCommand or a SpecialComment are decoded.
+
+        As in the text mode of open(), the lines end with "\\n",
+        "\\r\\n" or "\\r", and are matched with the whitespace of str.
+
+        The line of an OtherLine is a memoryview of the mapped file
+        (the raw bytes, including the line terminator). The Where
+        objects do not hold the text, only the offset of the line.
+        If other_lines is False, they are skipped altogether and
+        no object is created for them.
+    '''
+    filename = intern_string(filename)
+    with open(filename, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return
+    if profile.enabled:
+        profile.count('lines', data.count(b'\n') + (data[-1:] != b'\n'))
+
+    # The map stays open as long as one of the OtherLine refers to it.
+    view = memoryview(data) if other_lines else None
+    if lone_cr_regex.search(data) is None:
+        search = candidate_regex.search
+        line_end = lf_line_end
+        count_lines = lf_count_lines
+    else:
+        search = candidate_cr_regex.search
+        line_end = universal_line_end
+        count_lines = universal_count_lines
+    match_continuation = continuation_regex.match
+    size = len(data)
+    pos = 0
+    lineno = 0
+    while pos < size:
+        m = search(data, pos)
+        start = size if m is None else m.start()
+
+        if start > pos:
+            if other_lines:
+                while pos < start:
+                    end = line_end(data, pos, start)
+                    yield OtherLine(view[pos:end], Where(filename, lineno,
+                                                        offset=pos))
+                    lineno += 1
+                    pos = end
+            else:
+                lineno += count_lines(data, pos, start)
+                pos = start
+        if m is None:
+            break
+
+        pos = line_end(data, start, size)
+        line = newline(data[start:pos].decode(encoding))
+        where = Where(filename, lineno, offset=start)
+        lineno += 1
+
+        m = newcommand_regex.match(line)
+        if m:
+            yield newcommand_from_match(m, where)
+        elif line.lstrip().startswith('%:'):
+            tag, lines = special_comment_start(line, where)
+            while pos < size and match_continuation(data, pos):
+                end = line_end(data, pos, size)
+                comment_line = newline(data[pos:end].decode(encoding))
+                if (not comment_regex.match(comment_line)
+                        or special_comment_regex.match(comment_line)):
+                    break
+                pos = end
+                lineno += 1
+                content = content_of_comment(comment_line)
+                if content:
+                    lines.append(content)
+            yield SpecialComment(tag, lines, where)
+        elif other_lines:
+            yield OtherLine(view[start:pos], where)
+
+    if view is None:
+        data.close()
+
+
+def lf_line_end(data, start, stop):
+    """ The position after the line starting at start (before stop). """
+    end = data.find(b'\n', start, stop)
+    return stop if end == -1 else end + 1
+
+
+def universal_line_end(data, start, stop):
+    """ Same as lf_line_end(), with "\\r" also a line end. """
+    m = line_end_regex.search(data, start, stop)
+    return stop if m is None else m.end()
+
+
+def lf_count_lines(data, start, stop):
+    """ The number of line ends between start and stop. """
+    return data[start:stop].count(b'\n')
+
+
+def universal_count_lines(data, start, stop):
+    """ Same as lf_count_lines(), with "\\r" also a line end. """
+    return len(line_end_regex.findall(data, start, stop))
+
+
+def newline(line):
+    """ The line with its terminator translated to "\\n". """
+    if line.endswith('\r\n'):
+        return line[:-2] + '\n'
+    if line.endswith('\r'):
+        return line[:-1] + '\n'
+    return line
@@ -1,28 +1,63 @@
 from . import (NewCommand, OtherLine, SpecialComment, SymbolSection, logger,
-    ParsingError, Lookahead, NomenclatureEntry, Symbol, parse_stream,
-    KNOWN_TAGS_SYMBOLS, KNOWN_TAGS_SECTIONS)
+    ParsingError, NomenclatureEntry, Symbol, parse_stream,
+    KNOWN_TAGS_SYMBOLS, SectionHeader, CommandDefinition, parse_file_mmap,
+    is_database, read_database_definitions)
+from .diagnostics import diagnostics
+from .utils import profile
 import sys
 
 
-def warning(s, el=None):
-    if el:
-        logger.warn('Warning: %s\n @ %s' % (s, el.where))
-    else:
-        logger.warn('Warning: %s' % s)
+def warning(kind, s, el=None, *args):
+    ''' Reports 'Warning: ' + s % args to the diagnostics, as kind. '''
+    diagnostics.report(kind, 'Warning: ' + s, *args,
+                       where=el.where if el else None)
 
 
-def parse_symbols(stream, filename, sections=None, symbols=None):
-    current_section = None
-    if sections is None:
-        sections = {}
-    if symbols is None:
-        symbols = {}
+def parse_symbols(stream, filename, sections=None, symbols=None,
+                  keep_text=True):
+    '''
+        Parses a tex stream and returns objects of the kind
+        SymbolSection, Symbol, OtherLine.
+    '''
+    elements = parse_stream(stream, filename, keep_text=keep_text)
+    return build_symbols(elements, sections, symbols)
+
+
+def build_symbols(elements, sections=None, symbols=None):
+    '''
+        Converts the NewCommand, SpecialComment, OtherLine elements
+        of one file into SymbolSection, Symbol, OtherLine.
+    '''
+    return add_definitions(collect_definitions(elements), sections, symbols)
+
+
+def collect_definitions(elements):
+    '''
+        Groups each section and command with its attributes, returning
+        SectionHeader, CommandDefinition and OtherLine.
+
+        The special comments following a section or a command are its
+        attributes; the element is completed when the first element
+        which is not one of its attributes is seen.
+
+        This only depends on the file itself, not on what was defined
+        by other files.
+    '''
+    # The section or command waiting for its attributes
+    pending = None
 
-    peek = Lookahead(parse_stream(stream, filename))
+    for el in elements:
+        if (isinstance(el, SpecialComment) and pending is not None
+            and el.tag != 'section'):
+            add_attribute(pending.attrs, el)
+            continue
+
+        if pending is not None:
+            yield pending
+            pending = None
 
-    for el in peek:
         if isinstance(el, NewCommand):
-            yield load_command(peek, el, current_section, symbols)
+            pending = CommandDefinition(el, {})
 
         elif isinstance(el, SpecialComment):
             if el.tag == 'section':
@@ -32,43 +67,108 @@ def parse_symbols(stream, filename, sections=None, symbols=None):
                 name, description = el.lines[0].split(':')
                 name = name.strip()
                 description = description.strip()
-                current_section = create_section(el, peek, sections,
-                                                 name, description)
-                yield current_section
+                pending = SectionHeader(name, description, {}, el.where)
             else:
-                warning('Floating line', el)
+                warning('floating-line', 'Floating line', el)
 
         elif isinstance(el, OtherLine):
             yield el
         else:
             assert False
 
+    if pending is not None:
+        yield pending
+
+
+def read_definitions(filename, use_mmap=False):
+    '''
+        Returns the definitions in a file (without the OtherLine), 
+        and the error that stopped the reading, or None.
+        
+        Adding the definitions and then raising the error is the same
+        as parsing the file. The file can also be a symbol database
+        (see write_database).
+    '''
+    if is_database(filename):
+        return read_database_definitions(filename), None
+
+    definitions = []
+
+    def collect(elements):
+        for d in collect_definitions(elements):
+            if not isinstance(d, OtherLine):
+                definitions.append(d)
+
+    error = None
+    try:
+        if use_mmap:
+            collect(parse_file_mmap(filename, other_lines=False))
+        else:
+            with open(filename) as f:
+                collect(parse_stream(f, filename, keep_text=False))
+    except (ParsingError, ValueError) as e:
+        # ValueError: for example "[]" as number of arguments
+        error = e
+    if profile.enabled:
+        profile.count('newcommands', sum(1 for d in definitions
+                                         if isinstance(d, CommandDefinition)))
+    return definitions, error
+
+
+def add_definitions(definitions, sections=None, symbols=None):
+    '''
+        Adds the definitions of one file, as returned by 
+        collect_definitions(), to sections and symbols;
+        returns SymbolSection, Symbol, OtherLine.
+        
+        The definitions are not modified, so they can be added again.
+    '''
+    current_section = None
+    if sections is None:
+        sections = {}
+    if symbols is None:
+        symbols = {}
+
+    for d in definitions:
+        if isinstance(d, CommandDefinition):
+            yield load_command(d.command, current_section, symbols,
+                               dict(d.attrs))
+        elif isinstance(d, SectionHeader):
+            current_section = create_section(d, sections, d.name,
+                                             d.description, dict(d.attrs))
+            yield current_section
+        else:
+            yield d
+
 
-def create_section(el, peek, sections, name, description):
+def create_section(el, sections, name, description, attrs=None):
     if name in sections:
-        if sections[name].description is None:
-            # if it was temporary
-            sections[name].description = description
-            return name
+        section = sections[name]
+        if section.description is None:
+            # created as the parent of a subsection defined before it
+            section.description = description
+            section.where = el.where
+            if attrs is not None:
+                section.attrs = attrs
+            return section
         else:
             err = ('Already know section %r from %r.'
                     % (name, sections[name].where))
             raise ParsingError(err, el.where)
 
-    # Check subs
+    # The parent of "a/b/c" is "a/b". The missing ancestors are created
+    # without description, which they get if they are defined later.
     if '/' in name:
-        parent = name.split('/')[0].strip()
+        parent = name.rsplit('/', 1)[0].strip()
         if not parent in sections:
             if False: # tmp disable
-                warning('Creating dummy parent section %r.\n '
-                    'Already know %s.' % (parent, sections.keys()), el)
-            create_section(el, None, sections, parent, '')
+                warning('dummy-section', 'Creating dummy parent section '
+                        '%r.\n Already know %s.', el, parent, sections.keys())
+            create_section(el, sections, parent, None)
     else:
         parent = None
 
-    if peek is not None:
-        attrs = load_attributes(peek, KNOWN_TAGS_SECTIONS)
-    else:
+    if attrs is None:
         attrs = {}
 
     definition_order = len(sections)
@@ -84,15 +184,14 @@ def create_section(el, peek, sections, name, description):
     return section
 
 
-def load_command(peek, el, current_section, symbols):
+def load_command(el, current_section, symbols, other):
     if current_section is None:
         err = 'No section defined yet'
         raise ParsingError(err, el.where)
 
-    other = load_attributes(peek, KNOWN_TAGS_SYMBOLS)
-
     if 'todo' in other:
-        logger.warn('TODO (%s): %s' % (el.command, other['todo']))
+        diagnostics.report('todo', 'TODO (%s): %s', el.command, other['todo'],
+                           where=el.where)
 
     if 'nomenc' in other:
         parts = other['nomenc'].split(':')
@@ -117,8 +216,9 @@ def load_command(peek, el, current_section, symbols):
     for k, v in current_section.attrs.items():
         ok_to_disagree = ['def']
         if k in other and other[k] != v and not k in ok_to_disagree:
-            warning('Note: tag %r = %r disagrees with section (%r)'
-                    % (k, other[k], v), el)
+            warning('tag-disagrees',
+                    'Note: tag %r = %r disagrees with section (%r)', el,
+                    k, other[k], v)
         else:
             other[k] = v
 
@@ -133,17 +233,12 @@ def load_command(peek, el, current_section, symbols):
     return s
 
 
-def load_attributes(peek, known, stop_on=['section']):
-    attrs = {}
-    while (isinstance(peek.lookahead(0), SpecialComment) and
-        not(peek.lookahead(0).tag in stop_on)):
-        sc = peek.next()
-        if not sc.tag in KNOWN_TAGS_SYMBOLS:
-            warning('Found strange tag %r.' % sc.tag, sc)
-        if sc.tag in attrs:
-            warning('Overwriting tag %r.' % sc.tag, sc)
-        attrs[sc.tag] = " ".join(sc.lines).strip()
-    return attrs
+def add_attribute(attrs, sc):
+    if not sc.tag in KNOWN_TAGS_SYMBOLS:
+        warning('strange-tag', 'Found strange tag %r.', sc, sc.tag)
+    if sc.tag in attrs:
+        warning('overwriting-tag', 'Overwriting tag %r.', sc, sc.tag)
+    attrs[sc.tag] = " ".join(sc.lines).strip()
 
 
 def main():
@@ -1,2 +1,20 @@
 from .. import logger
-from .extract import *
+import importlib
+
+# As in the package: each program is imported when first used.
+_defined_in = {
+    'lsm_extract_main': 'extract',
+    'lsm_dependents_main': 'dependents',
+}
+
+__all__ = sorted(_defined_in)
+
+
+def __getattr__(name):
+    module = _defined_in.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
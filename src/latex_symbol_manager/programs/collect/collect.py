@@ -1,6 +1,8 @@
 from optparse import OptionParser
-from . import find_all_commands
-import yaml
+from . import find_all_commands, logger
+from ... import write_commands, FORMATS
+from ...utils import wrap_script_entry_point, profile, UserError
+import sys
 
 usage = """ 
 
@@ -11,18 +13,39 @@ Collects all symbols used by the TeX file and its children.
 
 
 def main():
+    wrap_script_entry_point(lsm_collect_main, logger)
+
+
+def lsm_collect_main(args=None):
     parser = OptionParser(usage)
     #    parser.add_option("--style", help="Type of table", default='full')
-    (options, args) = parser.parse_args() #@UnusedVariable
+    parser.add_option("--no-recursive", dest='recursive', default=True,
+                      action='store_false',
+                      help="Do not follow \\input, \\include, \\subfile.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Scan all the files, ignoring the cache.")
+    parser.add_option("--format", default='yaml',
+                      help="Output format: 'yaml' or 'jsonl' (one JSON "
+                      "string per line).")
+    (options, args) = parser.parse_args(args) #@UnusedVariable
+    if not options.format in FORMATS:
+        raise UserError('No known format %r.' % options.format)
     filenames = args
 
     symbols = set()
-    for filename in filenames:
-        symbols.update(find_all_commands(filename))
+    with profile.stage('scan'):
+        for filename in filenames:
+            symbols.update(find_all_commands(filename,
+                                             recursive=options.recursive,
+                                             cache=options.cache))
+    profile.count('commands', len(symbols))
     what = list(symbols)
-    print('# YAML dump of symbols found in files %s' % filenames)
-    print('# ')
-    print(yaml.dump(what))
+    with profile.stage('write'):
+        if options.format == 'yaml':
+            print('# YAML dump of symbols found in files %s' % filenames)
+            print('# ')
+        write_commands(what, sys.stdout, format=options.format)
 
 if __name__ == '__main__':
     main()
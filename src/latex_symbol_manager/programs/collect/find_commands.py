@@ -1,17 +1,200 @@
+from concurrent.futures import ThreadPoolExecutor
+import marshal
+import os
 import re
 
-# XXX: need to exclude '_'
-command_pattern = r'(\\\w+)'
-command_regex = re.compile(command_pattern)
+from ... import logger
+from ...cache import DEFAULT_CACHE_DIR
+from ...scanning import iter_commands, find_commands
 
-def find_all_commands(filename):
-    """ Finds all TeX commands used in the file. """
+__all__ = [
+    'find_all_commands',
+    'find_all_commands_in_string',
+    'find_includes_in_string',
+]
+
+INCLUDE_COMMANDS = ('\\input', '\\include', '\\subfile')
+
+# the argument of \input{file}, and also of \input file
+include_argument_regex = re.compile(r'\s*(?:\{([^}]*)\}|\s([^\s{}%\\]+))')
+
+# Change this when what scan() finds changes.
+SCANNER_CACHE_FORMAT = 2
+
+
+def find_all_commands(filename, recursive=False, cache=False, jobs=None):
+    """
+        Finds all TeX commands used in the file and, if recursive is
+        True, in the files it includes with \\input, \\include and
+        \\subfile, found as described in resolve_include().
+
+        The files are scanned concurrently by jobs threads. If cache
+        is True, the commands found in each file are remembered in
+        .lsm-cache/ and the file is scanned again only if it changed.
+    """
+    scanner = FileScanner(use_cache=cache)
+    try:
+        if not recursive:
+            return set(scanner.scan(filename)[0])
+        return scanner.scan_tree(filename, jobs=jobs)
+    finally:
+        scanner.save()
+
+
+def find_all_commands_in_string(s, at_letter=False):
+    """ Returns the commands used in s, ignoring comments and verbatim. """
+    return find_commands(s, at_letter)
+
+
+def find_includes_in_string(s, at_letter=False):
+    """ Returns the names of the files included, in order. """
+    return commands_and_includes(s, at_letter)[1]
+
+
+def commands_and_includes(s, at_letter=False):
+    """ Returns the set of commands and the list of includes in s. """
     commands = set()
-    for line in open(filename):
-        for x in command_regex.findall(line):
-            commands.add(x)
-    return commands
+    includes = []
+    match_argument = include_argument_regex.match
+    for name, end in iter_commands(s, at_letter):
+        commands.add(name)
+        if name in INCLUDE_COMMANDS:
+            m = match_argument(s, end)
+            if m is not None:
+                includes.append((m.group(1) or m.group(2)).strip())
+    return commands, includes
+
+
+class FileScanner(object):
+    ''' Scans files for commands and includes, caching the results. '''
+
+    def __init__(self, use_cache=True, cache_dir=DEFAULT_CACHE_DIR):
+        self.use_cache = use_cache
+        self.cache_filename = os.path.join(cache_dir, 'commands.marshal')
+        # path -> (mtime, size, commands, includes)
+        self.results = {}
+        self.changed = False
+        if use_cache:
+            try:
+                with open(self.cache_filename, 'rb') as f:
+                    version, results = marshal.loads(f.read())
+                if version == SCANNER_CACHE_FORMAT:
+                    self.results = results
+            except (IOError, OSError, EOFError, ValueError, TypeError):
+                pass
+
+    def scan(self, filename):
+        """ Returns the list of commands and the list of includes. """
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        known = self.results.get(path)
+        if known is not None and known[:2] == (st.st_mtime_ns, st.st_size):
+            return known[2], known[3]
+
+        with open(path) as f:
+            s = f.read()
+        at_letter = path.endswith(('.sty', '.cls'))
+        commands, includes = commands_and_includes(s, at_letter)
+        commands = sorted(commands)
+        self.results[path] = (st.st_mtime_ns, st.st_size, commands, includes)
+        self.changed = True
+        return commands, includes
+
+    def scan_tree(self, filename, jobs=None):
+        """ Scans the file and, level by level, the files it includes. """
+        main_dir = os.path.dirname(os.path.abspath(filename))
+        commands = set()
+        visited = set()
+        level = [os.path.realpath(filename)]
+        logger_warning = logger.warning
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            visited.update(level)
+            while level:
+                results = list(executor.map(self.scan, level))
+                following = []
+                for parent, (c, includes) in zip(level, results):
+                    commands.update(c)
+                    for name in includes:
+                        child = resolve_include(name, parent, main_dir)
+                        if child is None:
+                            logger_warning('Could not find %r included by %s.'
+                                           % (name, parent))
+                            continue
+                        child = os.path.realpath(child)
+                        # also stops cycles
+                        if not child in visited:
+                            visited.add(child)
+                            following.append(child)
+                level = following
+        return commands
+
+    def save(self):
+        if not self.use_cache or not self.changed:
+            return
+        try:
+            dirname = os.path.dirname(self.cache_filename)
+            if not os.path.exists(dirname):
+                os.makedirs(dirname)
+            # other processes may have saved meanwhile: keep theirs too
+            results = FileScanner(cache_dir=dirname).results
+            results.update(self.results)
+            # and forget the files which are no more
+            results = dict((path, r) for path, r in results.items()
+                           if os.path.exists(path))
+            tmp = '%s.%d.tmp' % (self.cache_filename, os.getpid())
+            with open(tmp, 'wb') as f:
+                f.write(marshal.dumps((SCANNER_CACHE_FORMAT, results)))
+            os.replace(tmp, self.cache_filename)
+        except (IOError, OSError) as e:
+            logger.warning('Could not write %s: %s' % (self.cache_filename, e))
+
+
+def resolve_include(name, parent, main_dir):
+    '''
+        Finds the file included as name by the file parent.
+
+        Like TeX, we try name.tex and name, relative to the directory
+        of the main file, then to the directory of the including file,
+        then in the directories of TEXINPUTS (a trailing "//" means
+        to search the subdirectories too).
+    '''
+    candidates = [name]
+    if not os.path.splitext(name)[1] == '.tex':
+        candidates.insert(0, name + '.tex')
+
+    if os.path.isabs(name):
+        dirs = ['']
+    else:
+        dirs = [main_dir, os.path.dirname(parent)] + texinputs_dirs()
+
+    for d in dirs:
+        for c in candidates:
+            path = os.path.join(d, c)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def texinputs_dirs():
+    texinputs = os.environ.get('TEXINPUTS', '')
+    if not texinputs in _texinputs_dirs:
+        _texinputs_dirs[texinputs] = list_texinputs_dirs(texinputs)
+    return _texinputs_dirs[texinputs]
+
+# TEXINPUTS -> list of directories
+_texinputs_dirs = {}
 
 
-def find_all_commands_in_string(s):
-    return command_regex.findall(s)
+def list_texinputs_dirs(texinputs):
+    dirs = []
+    for entry in texinputs.split(os.pathsep):
+        if not entry:
+            # the default path: nothing of ours there
+            continue
+        if entry.endswith('//'):
+            base = entry.rstrip('/') or '/'
+            for root, _, _ in os.walk(base):
+                dirs.append(root)
+        else:
+            dirs.append(entry)
+    return dirs
@@ -0,0 +1,87 @@
+from .. import (logger, load_sections_symbols, SymbolGraph,
+    add_diagnostics_options, setup_diagnostics)
+from ..cache import DEFAULT_CACHE_DIR
+from ..utils import wrap_script_entry_point, UserError, profile
+from optparse import OptionParser
+import sys
+
+__all__ = ['lsm_dependents_main']
+
+usage = """
+
+    %prog -c '\\state' [-c ...] sources.tex ....
+
+Lists the symbols whose definitions use the given commands, directly
+or through other symbols, grouped by section.
+"""
+
+
+def lsm_dependents_main(args=None):
+    parser = OptionParser(usage)
+    parser.add_option("-c", "--command", dest='commands', default=[],
+                      action='append', help="Command to look for.")
+    parser.add_option("-d", "--direct", default=False, action='store_true',
+                      help="Only the symbols using the commands directly.")
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Always parse the sources, ignoring %s/."
+                      % DEFAULT_CACHE_DIR)
+    parser.add_option("-j", "--jobs", default=1, type='int',
+                      help="Parse the sources with this many processes "
+                      "(0: one per CPU).")
+    add_diagnostics_options(parser)
+    (options, args) = parser.parse_args(args)  # @UnusedVariable
+    setup_diagnostics(options)
+
+    if not options.commands:
+        raise UserError('Please give at least one command with -c.')
+    # allow "-c state" for "-c \state"
+    commands = [c if c.startswith('\\') else '\\' + c
+                for c in options.commands]
+
+    sections, symbols = load_sections_symbols(args, use_cache=options.cache,
+                                              use_mmap=options.mmap,
+                                              jobs=options.jobs or None)
+    logger.info('Loaded %d sections with %d symbols.\n' %
+                (len(sections), len(symbols)))
+
+    with profile.stage('graph'):
+        graph = SymbolGraph(symbols)
+    out = profile.output(sys.stdout)
+    for c in commands:
+        if not c in symbols:
+            logger.warning('%r is not defined by the sources.' % c)
+        with profile.stage('resolve'):
+            dependents = graph.dependents([c], transitive=not options.direct)
+        write_dependents(c, dependents, sections, symbols, out)
+
+
+def write_dependents(command, dependents, sections, symbols, out):
+    """ Writes the result of SymbolGraph.dependents() by section. """
+    out.write('%s: %d dependents\n' % (command, len(dependents)))
+    by_section = {}
+    for name in dependents:
+        by_section.setdefault(symbols[name].tag, []).append(name)
+
+    def section_order(tag):
+        return sections[tag].definition_order
+
+    for tag in sorted(by_section, key=section_order):
+        out.write('  %s\n' % tag)
+        names = sorted(by_section[tag],
+                       key=lambda n: symbols[n].definition_order)
+        for name in names:
+            via = dependents[name]
+            if via == command:
+                out.write('    %s\n' % name)
+            else:
+                out.write('    %s (through %s)\n' % (name, via))
+
+
+def main():
+    wrap_script_entry_point(lsm_dependents_main, logger)
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
-from .. import logger, parse_all_sections_symbols
-from ..utils import wrap_script_entry_point
+from .. import (logger, load_sections_symbols, SymbolGraph,
+    add_diagnostics_options, setup_diagnostics)
+from ..cache import DEFAULT_CACHE_DIR
+from ..utils import wrap_script_entry_point, UserError, profile
 from optparse import OptionParser
-import sys
+import time
 from latex_symbol_manager.programs.collect.find_commands import find_all_commands
 
 
@@ -11,52 +13,135 @@ usage = """
 
     %prog -m main.tex -o compact.tex  sources.tex ....
 
+    %prog -m a.tex -o a-symbols.tex -m b.tex -o b-symbols.tex  sources.tex ...
+
+    %prog --manifest targets.txt  sources.tex ...
+
+With many targets, the sources are parsed only once. In the manifest,
+each line contains a main file and its output; "#" starts a comment.
 """
-def lsm_extract_main():
+
+
+def lsm_extract_main(args=None):
     parser = OptionParser(usage)
-    parser.add_option("-m", "--main")
-    parser.add_option("-o", "--output")
-    (options, args) = parser.parse_args()  # @UnusedVariable
-   
-    main = options.main
-    out = options.output
-    
+    parser.add_option("-m", "--main", dest='mains', default=[],
+                      action='append', help="Main file of a document.")
+    parser.add_option("-o", "--output", dest='outputs', default=[],
+                      action='append',
+                      help="Output for the corresponding -m.")
+    parser.add_option("--manifest",
+                      help="File listing the pairs of main file and output.")
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Always parse the sources, ignoring %s/."
+                      % DEFAULT_CACHE_DIR)
+    parser.add_option("--no-recursive", dest='recursive', default=True,
+                      action='store_false',
+                      help="Do not follow \\input, \\include, \\subfile.")
+    parser.add_option("-j", "--jobs", default=1, type='int',
+                      help="Parse the sources and scan the documents with "
+                      "this many processes (0: one per CPU).")
+    add_diagnostics_options(parser)
+    (options, args) = parser.parse_args(args)  # @UnusedVariable
+    setup_diagnostics(options)
+
+    targets = get_targets(options)
     sources = args
-    
-    
-    f = open(out, 'w')
-    
-    try:
-        sections, symbols = parse_all_sections_symbols(sources)
-
-        logger.info('Loaded %d sections with %d symbols.\n' % 
-                         (len(sections), len(symbols)))
-        if not sections or not symbols:
-            raise Exception('Not enough data found.')
-
-
-        logger.info('Now looking for symbols')
-        commands = find_all_commands(main)
-        logger.info('I found %d commands' % len(commands))
-        
-        done = set()
-        todo = set(commands)
-        while todo:
-            c = todo.pop()
-            if c in done:
-                continue
-            done.add(c)
-            
-            if c in symbols:
-                logger.info('Found command %r' % c)
-                s = symbols[c]
-                f.write(s.tex_definition_short() + '\n')
-                todo.update(s.symbol_dependencies())    
-            else:
-                logger.warning('Not found %r' % c)
-           
-    except:
-        raise
+
+    t0 = time.perf_counter()
+    sections, symbols = load_sections_symbols(sources,
+                                              use_cache=options.cache,
+                                              use_mmap=options.mmap,
+                                              jobs=options.jobs or None)
+
+    logger.info('Loaded %d sections with %d symbols.\n' % 
+                     (len(sections), len(symbols)))
+    if not sections or not symbols:
+        raise Exception('Not enough data found.')
+
+    with profile.stage('graph'):
+        graph = SymbolGraph(symbols)
+    t1 = time.perf_counter()
+
+    logger.info('Now looking for symbols')
+    mains = [main for main, _ in targets]
+    with profile.stage('scan'):
+        found = scan_documents(mains, recursive=options.recursive,
+                               cache=options.cache,
+                               jobs=options.jobs or None)
+    profile.count('documents', len(mains))
+    t2 = time.perf_counter()
+
+    for (main, out), commands in zip(targets, found):
+        logger.info('I found %d commands in %s' % (len(commands), main))
+        write_extract(graph, commands, out)
+    t3 = time.perf_counter()
+
+    if len(targets) > 1:
+        n = len(targets)
+        logger.info('%d documents: library %.3f s, scanning %.3f s, '
+                    'writing %.3f s; %.3f s per document.'
+                    % (n, t1 - t0, t2 - t1, t3 - t2, (t3 - t0) / n))
+
+
+def get_targets(options):
+    """ Returns the list of (main, output) from -m/-o and the manifest. """
+    if len(options.mains) != len(options.outputs):
+        raise UserError('Each -m needs a corresponding -o.')
+    targets = list(zip(options.mains, options.outputs))
+    if options.manifest:
+        with open(options.manifest) as f:
+            for i, line in enumerate(f):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.split()
+                if len(parts) != 2:
+                    raise UserError('%s:%d: expected "main output", got %r.'
+                                    % (options.manifest, i + 1, line))
+                targets.append(tuple(parts))
+    if not targets:
+        raise UserError('Please specify a main file with -m.')
+    return targets
+
+
+def scan_documents(mains, recursive=True, cache=True, jobs=None):
+    """ Returns the commands used by each document, scanned in parallel. """
+    if jobs == 1 or len(mains) == 1:
+        return [find_all_commands(main, recursive=recursive, cache=cache)
+                for main in mains]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(find_all_commands, main,
+                                   recursive=recursive, cache=cache)
+                   for main in mains]
+        return [future.result() for future in futures]
+
+
+def write_extract(graph, commands, filename):
+    """ Writes the definitions of the symbols needed by commands. """
+    symbols = graph.symbols
+    for c in sorted(commands):
+        if not c in symbols:
+            logger.warning('Not found %r' % c)
+
+    with profile.stage('resolve'):
+        needed = graph.closure(commands)
+        cycles = graph.cycles(needed)
+        # each symbol after the ones it uses
+        order = graph.topological_order(needed)
+    for cycle in cycles:
+        logger.warning('These symbols use each other: %s'
+                       % ', '.join(cycle))
+    profile.count('symbols written', len(order))
+
+    with open(filename, 'w') as f:
+        f = profile.output(f)
+        for c in order:
+            logger.info('Found command %r' % c)
+            f.write(symbols[c].tex_definition_short() + '\n')
 
 
 def main():
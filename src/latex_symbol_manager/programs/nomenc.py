@@ -1,20 +1,44 @@
-from .. import logger, parse_all_sections_symbols
-from ..utils import wrap_script_entry_point
+from .. import (logger, load_sections_symbols, add_diagnostics_options,
+    setup_diagnostics, read_commands, parse_query, select_symbols)
+from ..cache import DEFAULT_CACHE_DIR
+from ..diagnostics import diagnostics
+from ..utils import wrap_script_entry_point, UserError, profile
 from optparse import OptionParser
+import logging
 import sys
-import yaml
 
 
 def nomenc_main(args):
     parser = OptionParser()
-    parser.add_option("--only", help="YAML file containing the symbols"
-                      "that must be included.")
+    parser.add_option("--only", help="File containing the symbols "
+                      "that must be included (as written by lsm_collect, "
+                      "YAML or JSON lines).")
+    parser.add_option("--select", help="Only the symbols matching this "
+                      "query, such as 'not deprecated' (as lsm_symbols).")
     parser.add_option("-v", "--verbose",
                       default=False, action='store_true')
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Always parse the sources, ignoring %s/."
+                      % DEFAULT_CACHE_DIR)
+    parser.add_option("-j", "--jobs", default=1, type='int',
+                      help="Parse the sources with this many processes "
+                      "(0: one per CPU).")
+    add_diagnostics_options(parser)
 
     (options, args) = parser.parse_args(args) #@UnusedVariable
-
-    sections, symbols = parse_all_sections_symbols(args)
+    setup_diagnostics(options)
+    if options.select is not None:
+        try:
+            parse_query(options.select)
+        except ValueError as e:
+            raise UserError('Invalid --select: %s' % e)
+
+    sections, symbols = load_sections_symbols(args, use_cache=options.cache,
+                                              use_mmap=options.mmap,
+                                              jobs=options.jobs or None)
     logger.info('Loaded %d sections with %d symbols.\n' % 
                 (len(sections), len(symbols)))
     if not sections or not symbols:
@@ -22,7 +46,7 @@ def nomenc_main(args):
 
     if options.only:
         with open(options.only) as f:
-            only = yaml.load(f)
+            only = read_commands(f)
 
         have = set(symbols.keys())
         used = set(only)
@@ -39,30 +63,39 @@ def nomenc_main(args):
     else:
         only = None
 
-    print_nomenclature(symbols, sys.stdout, skip_empty=False)
+    if options.select is not None:
+        with profile.stage('select'):
+            selected = select_symbols(symbols, options.select, sections)
+        symbols = dict((k, v) for k, v in symbols.items() if k in selected)
+
+    with profile.stage('render'):
+        print_nomenclature(symbols, profile.output(sys.stdout),
+                           skip_empty=False)
 
 
 def print_nomenclature(symbols, stream, skip_empty=True):
-    def warn(s, also_log=True):
+    def warn(kind, s, also_log=True):
         stream.write('%% %s\n' % s)
         if also_log:
-            logger.warn(s)
+            diagnostics.report(kind, s)
 
     for symbol in symbols.values():
         symbol_name = symbol.symbol[1:]
         if 'nomenc-exclude' in symbol.other:
-            warn('Skipping symbol %s because of '
+            warn('nomenc-exclude', 'Skipping symbol %s because of '
                  'nomenc-exclude' % symbol.symbol, False)
             continue
 
         if symbol.nomenclature is None:
             if skip_empty:
-                warn('Skipping symbol %s because of skip_empty.' % 
+                warn('nomenc-empty',
+                     'Skipping symbol %s because of skip_empty.' % 
                      symbol.symbol)
                 continue
 
             if symbol.nargs != 0:
-                warn('Skipping symbol %s because it has args.' % 
+                warn('nomenc-args',
+                     'Skipping symbol %s because it has args.' % 
                      symbol.symbol, False)
                 continue
 
@@ -75,7 +108,8 @@ def print_nomenclature(symbols, stream, skip_empty=True):
         text = text.strip()
         # Add period if not there
         if text and text[-1] != '.':
-            logger.info('Adding period to %r/%r' % (label, text))
+            diagnostics.report('nomenc-period', 'Adding period to %r/%r',
+                               label, text, level=logging.INFO)
             text += '.'
 
         label = '\\nomencLabel{%s}{%s}' % (symbol_name, label)
@@ -99,7 +133,7 @@ def print_nomenclature(symbols, stream, skip_empty=True):
         
         
         if not text:
-            warn('No text for %s' % symbol.symbol)
+            warn('nomenc-no-text', 'No text for %s' % symbol.symbol)
             text = '\\nomencMissExplanation{%s}' % symbol_name
 
         text = '\\nomencText{%s}{%s}{%s}' % (symbol_name, text, ref)
@@ -0,0 +1,117 @@
+from .. import (logger, load_sections_symbols, write_database, query_database,
+    add_diagnostics_options, setup_diagnostics, read_database_definitions,
+    add_definitions, write_symbol_records)
+from ..cache import DEFAULT_CACHE_DIR
+from ..utils import wrap_script_entry_point, UserError, profile
+from optparse import OptionParser
+import sys
+
+__all__ = ['lsm_query_main']
+
+usage = """
+
+    %prog -d symbols.db --compile sources.tex ...
+
+    %prog -d symbols.db [--section S] [--attr key[=value]] [--text words]
+                        [--source file.tex] [--names | --jsonl]
+
+Without criteria, all the symbols are listed: "--jsonl" exports the
+whole database, one JSON object per symbol.
+
+The database can be given instead of the sources to lsm_table,
+lsm_symbols, lsm_nomenc and lsm_extract, which then skip parsing.
+"""
+
+
+def lsm_query_main(args=None):
+    parser = OptionParser(usage)
+    parser.add_option("-d", "--database", help="The symbol database.")
+    parser.add_option("--compile", default=False, action='store_true',
+                      help="Parse the sources and write the database.")
+    parser.add_option("--section",
+                      help="Symbols in this section or its subsections.")
+    parser.add_option("--attr", dest='attrs', default=[], action='append',
+                      help="Symbols with this attribute (\"key\" or "
+                      "\"key=value\").")
+    parser.add_option("--text",
+                      help="Full-text search in description and "
+                      "nomenclature.")
+    parser.add_option("--source",
+                      help="Symbols defined in the file ending with this.")
+    parser.add_option("--names", default=False, action='store_true',
+                      help="Only write the names of the symbols.")
+    parser.add_option("--jsonl", default=False, action='store_true',
+                      help="Write all the fields of the symbols, as JSON "
+                      "lines.")
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Always parse the sources, ignoring %s/."
+                      % DEFAULT_CACHE_DIR)
+    parser.add_option("-j", "--jobs", default=1, type='int',
+                      help="Parse the sources with this many processes "
+                      "(0: one per CPU).")
+    add_diagnostics_options(parser)
+    (options, args) = parser.parse_args(args)  # @UnusedVariable
+    setup_diagnostics(options)
+
+    if not options.database:
+        raise UserError('Please specify the database with -d.')
+
+    if options.compile:
+        if not args:
+            raise UserError('Please give the sources to compile.')
+        sections, symbols = load_sections_symbols(args,
+                                                  use_cache=options.cache,
+                                                  use_mmap=options.mmap,
+                                                  jobs=options.jobs or None)
+        with profile.stage('database write'):
+            write_database(sections, symbols, options.database, sources=args)
+        logger.info('Wrote %d sections with %d symbols to %s.' %
+                    (len(sections), len(symbols), options.database))
+        query = (options.section or options.attrs or options.text or
+                 options.source or options.names or options.jsonl)
+        if not query:
+            return
+    elif args:
+        raise UserError('Sources are only needed with --compile.')
+
+    attrs = []
+    for a in options.attrs:
+        k, _, v = a.partition('=')
+        attrs.append((k, v if _ else None))
+
+    with profile.stage('query'):
+        found = query_database(options.database, section=options.section,
+                               attrs=attrs, text=options.text,
+                               source=options.source)
+    if options.jsonl:
+        write_records(options.database, [row[0] for row in found],
+                      sys.stdout)
+    else:
+        for symbol, section, desc, filename, lineno in found:
+            if options.names:
+                sys.stdout.write('%s\n' % symbol)
+            else:
+                sys.stdout.write('%-20s %-20s %s:%d  %s\n' %
+                                 (symbol, section, filename, lineno + 1,
+                                  desc or ''))
+    logger.info('%d symbols found.' % len(found))
+
+
+def write_records(database, names, out):
+    """ Writes the full records of these symbols of the database. """
+    sections, symbols = {}, {}
+    for _ in add_definitions(read_database_definitions(database), sections,
+                             symbols):
+        pass
+    with profile.stage('write'):
+        write_symbol_records((symbols[n] for n in names), out)
+
+
+def main():
+    wrap_script_entry_point(lsm_query_main, logger)
+
+if __name__ == '__main__':
+    main()
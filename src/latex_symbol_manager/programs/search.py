@@ -0,0 +1,77 @@
+from .. import (logger, load_sections_symbols, SymbolIndex,
+    add_diagnostics_options, setup_diagnostics)
+from ..cache import DEFAULT_CACHE_DIR
+from ..utils import wrap_script_entry_point, UserError, profile
+from optparse import OptionParser
+import sys
+
+__all__ = ['lsm_search_main']
+
+usage = """
+
+    %prog -q "observation space" sources.tex ....
+
+    %prog -p obs sources.tex ....
+
+Finds symbols by approximate words of their name, description and
+nomenclature (-q), or by the beginning of their name (-p).
+"""
+
+
+def lsm_search_main(args=None):
+    parser = OptionParser(usage)
+    parser.add_option("-q", "--query", help="Words to look for.")
+    parser.add_option("-p", "--prefix", help="Beginning of the name.")
+    parser.add_option("-n", "--limit", default=10, type='int',
+                      help="Number of results.")
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Always parse the sources, ignoring %s/."
+                      % DEFAULT_CACHE_DIR)
+    parser.add_option("-j", "--jobs", default=1, type='int',
+                      help="Parse the sources with this many processes "
+                      "(0: one per CPU).")
+    add_diagnostics_options(parser)
+    (options, args) = parser.parse_args(args)  # @UnusedVariable
+    setup_diagnostics(options)
+
+    if options.query is None and options.prefix is None:
+        raise UserError('Please give a query with -q or a prefix with -p.')
+    if options.limit < 1:
+        raise UserError('The number of results (-n) must be at least 1.')
+
+    sections, symbols = load_sections_symbols(args, use_cache=options.cache,
+                                              use_mmap=options.mmap,
+                                              jobs=options.jobs or None)
+    logger.info('Loaded %d sections with %d symbols.\n' %
+                (len(sections), len(symbols)))
+    with profile.stage('index'):
+        index = SymbolIndex(symbols)
+
+    out = sys.stdout
+    if options.prefix is not None:
+        with profile.stage('search'):
+            found = index.complete(options.prefix, limit=options.limit)
+        for name in found:
+            write_symbol(symbols[name], None, out)
+    if options.query is not None:
+        with profile.stage('search'):
+            found = index.search(options.query, limit=options.limit)
+        for score, name in found:
+            write_symbol(symbols[name], score, out)
+
+
+def write_symbol(s, score, out):
+    score = '' if score is None else '%.2f' % score
+    nomenc = '' if s.nomenclature is None else s.nomenclature.text.strip()
+    out.write('%5s %-20s %-20s %s %s\n' %
+              (score, s.symbol, s.tag, (s.desc or '').strip(), nomenc))
+
+
+def main():
+    wrap_script_entry_point(lsm_search_main, logger)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,42 @@
-from .. import parse_all_sections_symbols, logger
+from .. import (logger, load_sections_symbols, SectionSelector,
+    SectionTree, parse_patterns, add_diagnostics_options, setup_diagnostics)
+from ..cache import DEFAULT_CACHE_DIR
+from ..utils import wrap_script_entry_point, UserError, profile
 from optparse import OptionParser
 import sys
 
+__all__ = ['lsm_select_main']
 
-def main():
-    parser = OptionParser()
+usage = """
+
+    %prog --include "dynamics/,re:sensor" --red "dynamics/noise" sources.tex
+
+Writes the definitions of the symbols in the selected sections, in
+the order of the sections, optionally coloring some of them.
+
+Each option takes a comma separated list of patterns:
+
+    all, *          every section
+    name            exactly the section "name"
+    name/           "name" and all its subsections
+    prefix*         the sections whose name starts with prefix
+    a*b?, [ab]*     glob (as in fnmatch)
+    re:expr         regular expression (matched at the beginning)
+
+A section matched by more than one color gets red, then blue, then
+green. It is an error if a pattern matches no section.
+"""
+
+# the later ones take precedence
+COLORS = [
+    ('green', "{\\color[rgb]{0,0.3,0} %s}"),
+    ('blue', "{\\color[rgb]{0,0,0.5} %s}"),
+    ('red', "{\\color[rgb]{0.5,0,0} %s}"),
+]
+
+
+def lsm_select_main(args=None):
+    parser = OptionParser(usage)
 
     parser.add_option("--include",
                       help="Sections to include (comma separated)",
@@ -14,9 +46,25 @@ def main():
     parser.add_option("--red", default="", help="Color these in red")
     parser.add_option("--green", default="", help="Color these in green")
 
-    (options, args) = parser.parse_args() #@UnusedVariable
-
-    sections, symbols = parse_all_sections_symbols(args)
+    parser.add_option("-o", "--output",
+                      help="Write to this file instead of stdout.")
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--no-cache", dest='cache', default=True,
+                      action='store_false',
+                      help="Always parse the sources, ignoring %s/."
+                      % DEFAULT_CACHE_DIR)
+    parser.add_option("-j", "--jobs", default=1, type='int',
+                      help="Parse the sources with this many processes "
+                      "(0: one per CPU).")
+    add_diagnostics_options(parser)
+
+    (options, args) = parser.parse_args(args) #@UnusedVariable
+    setup_diagnostics(options)
+
+    sections, symbols = load_sections_symbols(args, use_cache=options.cache,
+                                              use_mmap=options.mmap,
+                                              jobs=options.jobs or None)
 
     logger.info('Loaded %d sections with %d symbols.\n'
                      % (len(sections), len(symbols)))
@@ -24,56 +72,65 @@ def main():
     if not sections or not symbols:
         raise Exception('Not enough data found.')
 
-    def get_sections(which):
-        if not which:
-            return []
-        names = which.split(',')
-
-        l = []
-        for x in names:
-            lx = []
-            for k in sections.keys():
-                if x in k:
-                    lx.append(sections[k])
-
-            if x == 'all':
-                lx.extend(sections.values())
-            if not lx:
-                raise Exception('Section %s not found in %s'
-                                % (x, sections.keys()))
-
-            l.extend(lx)
-        return l
-
-    # which = args
-    selected = get_sections(options.include)
-    color_blue = get_sections(options.blue)
-    color_red = get_sections(options.red)
-    color_green = get_sections(options.green)
-
-    logger.info('Selected: %s' % selected)
-
-    wrap_red = lambda x: "{\\color[rgb]{0.5,0,0} %s}" % x
-    wrap_blue = lambda x: "{\\color[rgb]{0,0,0.5} %s}" % x
-    wrap_green = lambda x: "{\\color[rgb]{0,0.3,0} %s}" % x
-
-    f = sys.stdout
-
-    if not selected:
-        raise Exception('No sections selected (which: %r)' % options.sections)
-
-    for section in selected:
-        wrapper = None
-        if section in color_green:
-            wrapper = wrap_green
-        if section in color_blue:
-            wrapper = wrap_blue
-        if section in color_red:
-            wrapper = wrap_red
-
-        for symbol in section.symbols.values():
-            f.write(symbol.tex_definition(wrapper=wrapper))
-            f.write('\n')
+    with profile.stage('select'):
+        tree = SectionTree(sections)
+        selected = select_sections(tree, options.include)
+        if not selected:
+            raise UserError('No sections selected (include: %r)'
+                            % options.include)
+        templates = {}
+        for color, template in COLORS:
+            for name in select_sections(tree, getattr(options, color)):
+                templates[name] = template
+
+    logger.info('Selected %d sections.' % len(selected))
+
+    if options.output:
+        with open(options.output, 'w', buffering=1 << 20) as f:
+            write_selected(sections, selected, templates, f)
+    else:
+        write_selected(sections, selected, templates, sys.stdout)
+
+
+def select_sections(tree, which):
+    '''
+        Returns the set of the names of the sections of the SectionTree
+        matching the comma separated patterns in which.
+    '''
+    try:
+        selector = SectionSelector(parse_patterns(which), tree)
+    except ValueError as e:
+        raise UserError(str(e))
+    selected, missing = selector.select_unmatched(tree.order)
+    if missing:
+        raise UserError('No section matches %s.'
+                        % ', '.join(repr(p) for p in missing))
+    return selected
+
+
+def write_selected(sections, selected, templates, out):
+    '''
+        Writes the definitions of the symbols of the selected sections,
+        each section followed by its subsections; the symbols of the
+        sections in templates are wrapped in it (a "%s" template).
+    '''
+    ordered = SectionTree(dict((name, sections[name])
+                               for name in selected)).ordered()
+    nsymbols = 0
+    with profile.stage('write'):
+        write = profile.output(out).write
+        for section in ordered:
+            template = templates.get(section.name)
+            wrapper = None if template is None else template.__mod__
+            for symbol in section.symbols.values():
+                write(symbol.tex_definition(wrapper=wrapper))
+                write('\n')
+            nsymbols += len(section.symbols)
+    profile.count('symbols written', nsymbols)
+
+
+def main():
+    wrap_script_entry_point(lsm_select_main, logger)
 
 
 if __name__ == '__main__':
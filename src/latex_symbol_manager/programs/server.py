@@ -0,0 +1,377 @@
+from .. import logger, SymbolGraph, SymbolLibrary
+from ..scanning import find_commands
+from ..utils import wrap_script_entry_point
+from bisect import bisect_left
+from optparse import OptionParser
+import json
+import re
+import sys
+import time
+
+__all__ = ['SymbolServer', 'lsm_server_main']
+
+usage = """
+
+    %prog sources.tex ....
+
+Serves completion and hover for the symbols defined in the sources,
+speaking JSON-RPC with the framing of the Language Server Protocol
+on stdin/stdout. The sources are read again when they change.
+"""
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# LSP CompletionItemKind
+KIND_FUNCTION = 3
+KIND_VARIABLE = 6
+
+command_prefix_regex = re.compile(r'\\[A-Za-z@]*$')
+command_regex = re.compile(r'\\[A-Za-z@]+')
+
+
+class SymbolServer(object):
+    '''
+        Answers the requests of an editor about the symbols of a
+        SymbolLibrary, which is kept in memory and refreshed at most
+        every refresh_interval seconds.
+
+        handle() takes a JSON-RPC message, as a dict, and returns the
+        response, or None for notifications; it does not do any I/O,
+        so the server can be used without a transport.
+
+        The positions are in UTF-16 code units, as LSP wants by
+        default, converted from and to indices in the lines; if the
+        client accepts "utf-32" (general.positionEncodings), we use
+        that instead, which is the same as the indices.
+
+        Besides the LSP methods (initialize, shutdown, exit,
+        textDocument/didOpen, didChange, didClose, completion, hover),
+        it answers "lsm/extract", with params {"uri": ...} or
+        {"commands": [...]}, returning {"text": ...} with the
+        definitions needed, as lsm_extract writes them.
+    '''
+
+    def __init__(self, library, refresh_interval=0.5, max_completions=200):
+        self.library = library
+        self.refresh_interval = refresh_interval
+        self.max_completions = max_completions
+        # uri -> list of lines
+        self.documents = {}
+        self.last_refresh = None
+        self.running = True
+        # the positions are UTF-16 offsets (else code points)
+        self.utf16 = True
+        # computed from library.symbols when needed
+        self.names = None
+        self.graph = None
+
+        self.methods = {
+            'initialize': self.initialize,
+            'initialized': self.ignore,
+            'shutdown': self.shutdown,
+            'exit': self.exit,
+            'textDocument/didOpen': self.did_open,
+            'textDocument/didChange': self.did_change,
+            'textDocument/didClose': self.did_close,
+            'textDocument/didSave': self.ignore,
+            'textDocument/completion': self.completion,
+            'textDocument/hover': self.hover,
+            'lsm/extract': self.extract,
+        }
+
+    def handle(self, message):
+        """ Returns the response to message, or None if not needed. """
+        if not isinstance(message, dict):
+            return error_response(None, INVALID_REQUEST,
+                                  'Not a request object: %r.' % message)
+        msg_id = message.get('id')
+        method = message.get('method')
+        params = message.get('params') or {}
+        function = self.methods.get(method)
+        if function is None:
+            if msg_id is None or method is None:
+                # notifications we do not know, or responses
+                return None
+            return error_response(msg_id, METHOD_NOT_FOUND,
+                                  'Unknown method %r.' % method)
+        try:
+            result = function(params)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error('Invalid params for %s: %s' % (method, e))
+            if msg_id is None:
+                return None
+            return error_response(msg_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            logger.exception('While handling %s' % method)
+            if msg_id is None:
+                return None
+            return error_response(msg_id, INTERNAL_ERROR, str(e))
+        if msg_id is None:
+            return None
+        return {'jsonrpc': '2.0', 'id': msg_id, 'result': result}
+
+    def refresh(self):
+        """ Reads the sources again if they changed. """
+        now = time.monotonic()
+        if (self.last_refresh is not None and
+            now - self.last_refresh < self.refresh_interval):
+            return
+        self.last_refresh = now
+        if self.library.refresh():
+            if self.library.error is not None:
+                logger.error('Keeping the symbols before the error: %s'
+                             % self.library.error)
+            self.names = None
+            self.graph = None
+
+    def symbols(self):
+        self.refresh()
+        return self.library.symbols
+
+    def sorted_names(self):
+        symbols = self.symbols()
+        if self.names is None:
+            self.names = sorted(symbols)
+        return self.names
+
+    def symbol_graph(self):
+        symbols = self.symbols()
+        if self.graph is None:
+            self.graph = SymbolGraph(symbols)
+        return self.graph
+
+    def ignore(self, params):
+        return None
+
+    def initialize(self, params):
+        general = (params.get('capabilities') or {}).get('general') or {}
+        self.utf16 = not 'utf-32' in (general.get('positionEncodings')
+                                      or [])
+        return {
+            'capabilities': {
+                'positionEncoding': 'utf-16' if self.utf16 else 'utf-32',
+                # full text on each change
+                'textDocumentSync': 1,
+                'completionProvider': {'triggerCharacters': ['\\']},
+                'hoverProvider': True,
+            },
+            'serverInfo': {'name': 'lsm_server'},
+        }
+
+    def shutdown(self, params):
+        return None
+
+    def exit(self, params):
+        self.running = False
+        return None
+
+    def did_open(self, params):
+        doc = params['textDocument']
+        self.documents[doc['uri']] = doc['text'].split('\n')
+
+    def did_change(self, params):
+        uri = params['textDocument']['uri']
+        # we asked for the full text
+        text = params['contentChanges'][-1]['text']
+        self.documents[uri] = text.split('\n')
+
+    def did_close(self, params):
+        self.documents.pop(params['textDocument']['uri'], None)
+
+    def line_at(self, params):
+        uri = params['textDocument']['uri']
+        position = params['position']
+        lines = self.documents.get(uri, [])
+        lineno = position['line']
+        line = lines[lineno] if 0 <= lineno < len(lines) else ''
+        character = position['character']
+        if self.utf16:
+            character = utf16_to_index(line, character)
+        return line, lineno, character
+
+    def make_range(self, line, lineno, start, end):
+        """ The range of line[start:end], in the position encoding. """
+        if self.utf16:
+            start = index_to_utf16(line, start)
+            end = index_to_utf16(line, end)
+        return make_range(lineno, start, end)
+
+    def completion(self, params):
+        line, lineno, character = self.line_at(params)
+        m = command_prefix_regex.search(line[:character])
+        if m is None:
+            return {'isIncomplete': False, 'items': []}
+        prefix = m.group(0)
+
+        names = self.sorted_names()
+        symbols = self.library.symbols
+        replace = self.make_range(line, lineno, m.start(), character)
+        items = []
+        i = bisect_left(names, prefix)
+        while i < len(names) and names[i].startswith(prefix):
+            if len(items) == self.max_completions:
+                return {'isIncomplete': True, 'items': items}
+            s = symbols[names[i]]
+            items.append({
+                'label': s.symbol,
+                'kind': KIND_FUNCTION if s.nargs else KIND_VARIABLE,
+                'detail': s.desc or '',
+                'documentation': {'kind': 'markdown',
+                                  'value': describe_symbol(s)},
+                'textEdit': {'range': replace, 'newText': s.symbol},
+            })
+            i += 1
+        return {'isIncomplete': False, 'items': items}
+
+    def hover(self, params):
+        line, lineno, character = self.line_at(params)
+        for m in command_regex.finditer(line):
+            if m.start() <= character <= m.end():
+                s = self.symbols().get(m.group(0))
+                if s is None:
+                    return None
+                return {'contents': {'kind': 'markdown',
+                                     'value': describe_symbol(s)},
+                        'range': self.make_range(line, lineno, m.start(),
+                                                 m.end())}
+        return None
+
+    def extract(self, params):
+        if 'uri' in params:
+            lines = self.documents[params['uri']]
+            commands = find_commands('\n'.join(lines))
+        else:
+            commands = params['commands']
+        graph = self.symbol_graph()
+        needed = graph.closure(commands)
+        definitions = [graph.symbols[c].tex_definition_short()
+                       for c in graph.topological_order(needed)]
+        return {'text': ''.join(d + '\n' for d in definitions),
+                'cycles': graph.cycles(needed)}
+
+
+def make_range(lineno, start, end):
+    return {'start': {'line': lineno, 'character': start},
+            'end': {'line': lineno, 'character': end}}
+
+
+def utf16_to_index(line, character):
+    """ The index in line of the offset character in UTF-16 units. """
+    if line.isascii():
+        return character
+    # half of a surrogate pair is dropped: the index of that character
+    units = line.encode('utf-16-le')[:2 * character]
+    return len(units.decode('utf-16-le', 'ignore'))
+
+
+def index_to_utf16(line, index):
+    """ The offset in UTF-16 units of line[index]. """
+    if line.isascii():
+        return index
+    return len(line[:index].encode('utf-16-le')) // 2
+
+
+def describe_symbol(s):
+    """ Markdown description of the symbol for hover/completion. """
+    parts = ['`%s`' % s.tex_definition_short()]
+    if s.desc:
+        parts.append(s.desc)
+    if s.nargs:
+        parts.append('Arguments: %d' % s.nargs)
+    if s.example:
+        parts.append('Example: `%s`' % s.example)
+    if s.where is not None:
+        parts.append('Defined in %s, line %d (section %s)'
+                     % (s.where.filename, s.where.lineno + 1, s.tag))
+    return '\n\n'.join(parts)
+
+
+def error_response(msg_id, code, message):
+    return {'jsonrpc': '2.0', 'id': msg_id,
+            'error': {'code': code, 'message': message}}
+
+
+def read_message(stream):
+    '''
+        Reads a message with LSP framing; returns None at the end.
+        Raises ValueError if the headers have no valid Content-Length:
+        they are read, but not the body.
+    '''
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = value.strip()
+    if length is None:
+        raise ValueError('Missing Content-Length header.')
+    # not int(): it would take "-1", and read() everything
+    if not length.isdigit():
+        raise ValueError('Invalid Content-Length header: %r.'
+                         % length.decode('latin-1'))
+    return stream.read(int(length))
+
+
+def write_message(stream, message):
+    body = json.dumps(message).encode('utf-8')
+    stream.write(b'Content-Length: %d\r\n\r\n' % len(body))
+    stream.write(body)
+    stream.flush()
+
+
+def serve(server, instream, outstream):
+    """ Answers the messages on instream until "exit" or the end. """
+    while server.running:
+        try:
+            body = read_message(instream)
+        except ValueError as e:
+            write_message(outstream, error_response(None, PARSE_ERROR,
+                                                    str(e)))
+            continue
+        if body is None:
+            break
+        try:
+            message = json.loads(body.decode('utf-8'))
+        except ValueError as e:
+            write_message(outstream, error_response(None, PARSE_ERROR,
+                                                    str(e)))
+            continue
+        response = server.handle(message)
+        if response is not None:
+            write_message(outstream, response)
+
+
+def lsm_server_main(args=None):
+    parser = OptionParser(usage)
+    parser.add_option("--mmap", default=False, action='store_true',
+                      help="Memory-map the sources and scan them as bytes.")
+    parser.add_option("--interval", default=0.5, type='float',
+                      help="Check the sources for changes at most this "
+                      "often (seconds).")
+    (options, args) = parser.parse_args(args)  # @UnusedVariable
+
+    library = SymbolLibrary(args, use_mmap=options.mmap)
+    library.refresh()
+    logger.info('Loaded %d sections with %d symbols.' %
+                (len(library.sections), len(library.symbols)))
+    server = SymbolServer(library, refresh_interval=options.interval)
+    server.last_refresh = time.monotonic()
+    # stdout is for the protocol; the log goes to stderr
+    serve(server, sys.stdin.buffer, sys.stdout.buffer)
+
+
+def main():
+    wrap_script_entry_point(lsm_server_main, logger)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import re
+
+__all__ = [
+    'iter_commands',
+    'find_commands',
+    'VERBATIM_ENVIRONMENTS',
+]
+
+# Environments whose content is not TeX.
+VERBATIM_ENVIRONMENTS = ('verbatim', 'verbatim*', 'Verbatim', 'Verbatim*',
+                         'lstlisting', 'minted', 'comment')
+
+# A comment, a control word, or a control symbol (\\, \%, \_, ...).
+# A control word is made of letters only: "\alpha_1" is "\alpha".
+token_regex = re.compile(r'%[^\n]*|\\(?:([A-Za-z]+)|.)', re.DOTALL)
+# Same, when "@" is a letter (in .sty files, after \makeatletter).
+token_regex_at = re.compile(r'%[^\n]*|\\(?:([A-Za-z@]+)|.)', re.DOTALL)
+
+# The commands after which the scanning changes.
+SPECIAL_COMMANDS = frozenset(['verb', 'begin', 'makeatletter', 'makeatother'])
+
+begin_verbatim_regex = re.compile(r'\s*\{(%s)\}' %
+                                  '|'.join(re.escape(e)
+                                           for e in VERBATIM_ENVIRONMENTS))
+
+
+def iter_commands(s, at_letter=False):
+    '''
+        Yields (command, end) for each command used in the TeX string s,
+        where end is the position right after the command's name.
+
+        This is a single pass over s which skips the comments, the
+        content of \\verb and of the environments in
+        VERBATIM_ENVIRONMENTS. Control symbols such as "\\\\" or "\\%"
+        are not commands. If at_letter is True, "@" is a letter, as in
+        .sty files; otherwise it is only between \\makeatletter and
+        \\makeatother.
+    '''
+    regex = token_regex_at if at_letter else token_regex
+    pos = 0
+    while True:
+        # finditer() does the scanning; we restart it only after
+        # the few commands that change how what follows is read
+        for m in regex.finditer(s, pos):
+            name = m.group(1)
+            if name is None:
+                # comment or control symbol
+                continue
+            yield '\\' + name, m.end()
+            if name in SPECIAL_COMMANDS:
+                break
+        else:
+            return
+
+        pos = m.end()
+        if name == 'verb':
+            pos = skip_verb(s, pos)
+        elif name == 'begin':
+            v = begin_verbatim_regex.match(s, pos)
+            if v is not None:
+                end = s.find('\\end{%s}' % v.group(1), v.end())
+                pos = len(s) if end == -1 else end
+        elif name == 'makeatletter':
+            regex = token_regex_at
+        elif name == 'makeatother' and not at_letter:
+            regex = token_regex
+
+
+def skip_verb(s, pos):
+    """ Returns the position after the argument of \\verb at pos. """
+    if s.startswith('*', pos):
+        pos += 1
+    if pos >= len(s):
+        return pos
+    end = s.find(s[pos], pos + 1)
+    eol = s.find('\n', pos)
+    # an unterminated \verb ends at the end of the line
+    if end == -1 or (eol != -1 and eol < end):
+        return len(s) if eol == -1 else eol
+    return end + 1
+
+
+def find_commands(s, at_letter=False):
+    """ Returns the list of commands used in s, in order. """
+    return [name for name, _ in iter_commands(s, at_letter)]
@@ -0,0 +1,216 @@
+from bisect import bisect_left
+import heapq
+import re
+
+__all__ = [
+    'SymbolIndex',
+]
+
+word_regex = re.compile(r'[a-z0-9]+')
+
+# How much a match counts, depending on where the word is.
+WEIGHT_NAME = 1.0
+WEIGHT_DESC = 0.6
+WEIGHT_NOMENC = 0.6
+
+
+class SymbolIndex(object):
+    '''
+        An index over the names, descriptions and nomenclature text of
+        the symbols, for completion and approximate search.
+
+        The names are kept sorted, for prefix completion by bisection.
+        The words of the names, descriptions and nomenclature form a
+        vocabulary, with for each word the symbols where it appears,
+        and a trigram index over the vocabulary: a misspelled query
+        word is matched to the words sharing the most trigrams with it,
+        looking only at the rarest trigrams of the query.
+    '''
+
+    def __init__(self, symbols, max_postings=1000, max_candidates=64):
+        self.symbols = symbols
+        self.max_postings = max_postings
+        self.max_candidates = max_candidates
+        self.names = sorted(symbols)
+        # symbol id -> name
+        self.ids = []
+        # word -> word id
+        self.word_ids = {}
+        # word id -> word
+        self.words = []
+        # word id -> list of (symbol id, weight)
+        self.postings = []
+        # trigram -> list of word ids
+        self.trigrams = {}
+
+        for s in sorted(symbols.values(), key=lambda s: s.definition_order):
+            sid = len(self.ids)
+            self.ids.append(s.symbol)
+            self.add_text(sid, s.symbol[1:], WEIGHT_NAME)
+            if s.desc:
+                self.add_text(sid, s.desc, WEIGHT_DESC)
+            if s.nomenclature is not None:
+                self.add_text(sid, s.nomenclature.text, WEIGHT_NOMENC)
+
+        self.sorted_words = sorted(self.word_ids)
+        for postings in self.postings:
+            postings.sort(key=lambda x: (-x[1], x[0]))
+        # word id -> dict, made when needed by posting_dict()
+        self.posting_dicts = {}
+
+    def add_text(self, sid, text, weight):
+        # a symbol counts once per word, with the best weight
+        for w in set(word_regex.findall(text.lower())):
+            wid = self.word_ids.get(w)
+            if wid is None:
+                wid = self.word_ids[w] = len(self.words)
+                self.words.append(w)
+                self.postings.append([])
+                for g in trigrams(w):
+                    self.trigrams.setdefault(g, []).append(wid)
+            postings = self.postings[wid]
+            if postings and postings[-1][0] == sid:
+                if postings[-1][1] < weight:
+                    postings[-1] = (sid, weight)
+            else:
+                postings.append((sid, weight))
+
+    def complete(self, prefix, limit=None):
+        """ Returns the names starting with prefix ("\\" optional). """
+        if not prefix.startswith('\\'):
+            prefix = '\\' + prefix
+        names = self.names
+        result = []
+        i = bisect_left(names, prefix)
+        while i < len(names) and names[i].startswith(prefix):
+            if limit is not None and len(result) == limit:
+                break
+            result.append(names[i])
+            i += 1
+        return result
+
+    def search(self, query, limit=10):
+        '''
+            Returns up to limit (score, name) for the symbols best
+            matching the words of query, best first. Each query word
+            adds to the score of a symbol the similarity (from 0 to 1)
+            of the closest word of the symbol, times the weight of the
+            field where that word is.
+
+            The symbols are collected from the query words matching
+            few symbols (at least from the one matching the fewest);
+            the other words only add to their scores. So a query with
+            some rare word is fast even if its other words (say,
+            "function") appear everywhere.
+        '''
+        terms = []
+        for term in word_regex.findall(query.lower()):
+            matches = sorted(self.similar_words(term), key=lambda x: -x[1])
+            terms.append(matches)
+        if not terms:
+            return []
+        terms.sort(key=self.count_postings)
+
+        if len(terms) == 1:
+            scores = self.collect(terms[0], limit)
+            terms = []
+        else:
+            scores = self.collect(terms.pop(0))
+        # the words matching few symbols also add symbols
+        while terms and self.count_postings(terms[0]) <= self.max_postings:
+            for sid, s in self.collect(terms.pop(0)).items():
+                scores[sid] = scores.get(sid, 0) + s
+        for matches in terms:
+            # the closest words are enough to rank
+            matches = [(w, sim) for w, sim in matches[:8] if sim >= 0.5]
+            for sid in scores:
+                best = 0
+                for wid, similarity in matches:
+                    weight = self.posting_dict(wid).get(sid)
+                    if weight is not None and similarity * weight > best:
+                        best = similarity * weight
+                scores[sid] += best
+
+        # ties in definition order
+        top = heapq.nsmallest(limit, scores.items(),
+                              key=lambda x: (-x[1], x[0]))
+        return [(round(s, 4), self.ids[sid]) for sid, s in top]
+
+    def count_postings(self, matches):
+        return sum(len(self.postings[wid]) for wid, _ in matches)
+
+    def collect(self, matches, limit=None):
+        '''
+            Returns symbol id -> score for the symbols having one of
+            the words in matches, sorted by decreasing similarity.
+            If limit is given, stops when the symbols not seen yet
+            cannot enter the best limit ones.
+        '''
+        if limit is not None and limit <= 0:
+            return {}
+        best = {}
+        for wid, similarity in matches:
+            postings = self.postings[wid]
+            if limit is not None and len(best) >= limit:
+                # the postings are sorted by decreasing weight
+                bound = similarity * postings[0][1]
+                if heapq.nlargest(limit, best.values())[-1] >= bound:
+                    break
+            for sid, weight in postings:
+                s = similarity * weight
+                if s > best.get(sid, 0):
+                    best[sid] = s
+        return best
+
+    def posting_dict(self, wid):
+        """ The postings of the word as a dict symbol id -> weight. """
+        d = self.posting_dicts.get(wid)
+        if d is None:
+            d = self.posting_dicts[wid] = dict(self.postings[wid])
+        return d
+
+    def similar_words(self, term):
+        ''' Returns (word id, similarity) for the words close to term. '''
+        found = {}
+        wid = self.word_ids.get(term)
+        if wid is not None:
+            found[wid] = 1.0
+
+        # words starting with term
+        words = self.sorted_words
+        i = bisect_left(words, term)
+        n = 0
+        while (i < len(words) and words[i].startswith(term) and
+               n < self.max_candidates):
+            w = words[i]
+            if w != term:
+                found[self.word_ids[w]] = 0.5 + 0.4 * len(term) / len(w)
+            i += 1
+            n += 1
+
+        # words sharing trigrams, using the rarest ones
+        grams = trigrams(term)
+        lists = sorted((self.trigrams.get(g, ()) for g in grams), key=len)
+        counts = {}
+        for postings in lists:
+            if not postings:
+                continue
+            if counts and len(postings) > self.max_postings:
+                break
+            for wid in postings:
+                counts[wid] = counts.get(wid, 0) + 1
+        # only the most promising ones are compared exactly
+        candidates = heapq.nlargest(self.max_candidates // 4, counts.items(),
+                                    key=lambda x: x[1])
+        for wid, _ in candidates:
+            other = trigrams(self.words[wid])
+            similarity = len(grams & other) / len(grams | other)
+            if similarity > found.get(wid, 0):
+                found[wid] = similarity
+        return found.items()
+
+
+def trigrams(word):
+    """ The set of trigrams of the word, padded at the ends. """
+    w = '$' + word + '$'
+    return {w[i:i + 3] for i in range(len(w) - 2)}
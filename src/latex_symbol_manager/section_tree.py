@@ -0,0 +1,81 @@
+'''
+    The sections as a tree of any depth ("a/b/c" is a subsection of
+    "a/b"), numbered by a depth-first visit.
+
+    Each section has its position in pre-order and in post-order: b
+    is in the subtree of a if pre[a] <= pre[b] and post[b] <= post[a],
+    and the subtree of a is the slice of the pre-order starting at a
+    of its size, so both are found without walking the tree.
+'''
+
+__all__ = [
+    'SectionTree',
+]
+
+
+def definition_order_key(section):
+    return section.definition_order
+
+
+class SectionTree(object):
+    '''
+        Built from a dictionary name -> SymbolSection; the children of
+        each section are visited in the order given by key (by
+        default, the order of definition). A section whose parent is
+        not in the dictionary is a root.
+    '''
+
+    def __init__(self, sections, key=definition_order_key):
+        self.sections = sections
+        children = {}
+        for s in sorted(sections.values(), key=key):
+            parent = s.parent if s.parent in sections else None
+            children.setdefault(parent, []).append(s.name)
+
+        # the names in pre-order
+        self.order = []
+        # name -> position in pre-order, post-order; depth
+        self.pre = {}
+        self.post = {}
+        self.depth = {}
+        # name -> position in pre-order of its last descendant
+        self.last = {}
+
+        npost = 0
+        # (name, depth, whether its children were visited)
+        roots = children.get(None, [])
+        stack = [(name, 0, False) for name in reversed(roots)]
+        while stack:
+            name, depth, visited = stack.pop()
+            if visited:
+                self.post[name] = npost
+                npost += 1
+                self.last[name] = len(self.order) - 1
+                continue
+            self.pre[name] = len(self.order)
+            self.order.append(name)
+            self.depth[name] = depth
+            stack.append((name, depth, True))
+            for child in reversed(children.get(name, [])):
+                stack.append((child, depth + 1, False))
+
+    def __contains__(self, name):
+        return name in self.pre
+
+    def ordered(self):
+        """ The sections in pre-order: each before its subsections. """
+        return [self.sections[name] for name in self.order]
+
+    def is_ancestor(self, a, b):
+        """ True if b is a or one of its subsections, at any depth. """
+        return self.pre[a] <= self.pre[b] and self.post[b] <= self.post[a]
+
+    def subtree(self, name):
+        """ The names of the section and its subsections, in pre-order. """
+        return self.order[self.pre[name]:self.last[name] + 1]
+
+    def symbols_under(self, name):
+        """ Yields the symbols of the section and of its subsections. """
+        for n in self.subtree(name):
+            for symbol in self.sections[n].symbols.values():
+                yield symbol
@@ -0,0 +1,212 @@
+'''
+    Selection of sections by name, with patterns compiled once.
+
+    A pattern is one of:
+
+    - "all" or "*": every section;
+    - "re:EXPR": the names matched by the regular expression EXPR
+      (at their beginning: end it with "$" to match whole names);
+    - "name/": the section "name" and all its subsections;
+    - "prefix*", with no other wildcard: the names starting with prefix;
+    - a glob with "*", "?" or "[...]" (as in fnmatch);
+    - anything else: exactly that name.
+
+    All the exact names are looked up in one set, the prefixes checked
+    with a single startswith(), and the globs and regular expressions
+    joined in a single regular expression. Given the SectionTree of
+    the sections, "name/" is the slice of its pre-order for the
+    subtree of name, instead of the names starting with "name/".
+'''
+import fnmatch
+import re
+
+__all__ = ['SectionSelector', 'parse_patterns']
+
+WILDCARDS = '*?['
+
+
+def parse_patterns(s):
+    """ The patterns in the comma separated list s (None is empty). """
+    if not s:
+        return []
+    return [p.strip() for p in s.split(',') if p.strip()]
+
+
+def compile_pattern(pattern):
+    '''
+        Returns (kind, value) for the pattern, where kind is 'all',
+        'exact', 'subtree', 'prefix' or 'regex' (value is the text of
+        the regular expression for globs too).
+    '''
+    if pattern in ['all', '*']:
+        return 'all', None
+    if pattern.startswith('re:'):
+        expr = pattern[len('re:'):]
+        try:
+            re.compile(expr)
+        except re.error as e:
+            raise ValueError('Invalid regular expression %r: %s'
+                             % (expr, e))
+        return 'regex', expr
+    if pattern.endswith('/'):
+        return 'subtree', pattern.rstrip('/')
+    if pattern.endswith('*') and not any(c in pattern[:-1]
+                                         for c in WILDCARDS):
+        return 'prefix', pattern[:-1]
+    if any(c in pattern for c in WILDCARDS):
+        return 'regex', fnmatch.translate(pattern)
+    return 'exact', pattern
+
+
+class SectionSelector(object):
+    '''
+        Decides which section names match any of a list of patterns.
+
+        Each regular expression (or glob) is a named group of the
+        joined one, so that a match tells which pattern matched; this
+        gives the patterns matching nothing in the same pass as the
+        selection (see select_unmatched()).
+
+        tree is the SectionTree of the names to select from, if any;
+        then the subtrees are found with it.
+    '''
+
+    def __init__(self, patterns, tree=None):
+        self.patterns = list(patterns)
+        self.tree = tree
+        # (name, index in patterns) of the subtrees found with tree
+        self.subtrees = []
+        self.everything = False
+        self.exact = set()
+        # the index in patterns of each prefix, of each exact name
+        self.prefix_patterns = []
+        self.exact_patterns = {}
+        prefixes = []
+        expressions = []
+        for i, pattern in enumerate(self.patterns):
+            kind, value = compile_pattern(pattern)
+            if kind == 'all':
+                self.everything = True
+            elif kind == 'exact':
+                self.exact.add(value)
+                self.exact_patterns.setdefault(value, []).append(i)
+            elif kind == 'subtree' and tree is not None:
+                self.subtrees.append((value, i))
+            elif kind == 'subtree':
+                self.exact.add(value)
+                self.exact_patterns.setdefault(value, []).append(i)
+                prefixes.append(value + '/')
+                self.prefix_patterns.append((value + '/', i))
+            elif kind == 'prefix':
+                prefixes.append(value)
+                self.prefix_patterns.append((value, i))
+            else:
+                expressions.append('(?P<_%d>%s)' % (i, value))
+        self.prefixes = tuple(prefixes)
+        if expressions:
+            self.regex = re.compile('|'.join(expressions))
+        else:
+            self.regex = None
+
+    def matches(self, name):
+        """ True if the section name matches one of the patterns. """
+        if self.everything or self.matches_name(name):
+            return True
+        tree = self.tree
+        for root, _ in self.subtrees:
+            if root in tree:
+                if name in tree and tree.is_ancestor(root, name):
+                    return True
+            elif name.startswith(root + '/'):
+                return True
+        return False
+
+    def matches_name(self, name):
+        """ Same as matches(), without the subtrees found with tree. """
+        return (name in self.exact or name.startswith(self.prefixes)
+                or (self.regex is not None
+                    and self.regex.match(name) is not None))
+
+    def select(self, names):
+        """ The set of the names (an iterable) that match. """
+        if self.everything:
+            return set(names)
+        if self.subtrees:
+            # iterated again if a root is not in tree
+            names = list(names)
+        if not self.prefixes and self.regex is None:
+            selected = self.exact.intersection(names)
+        else:
+            selected = set(name for name in names if self.matches_name(name))
+        for root, _ in self.subtrees:
+            selected.update(self.subtree(root, names))
+        return selected
+
+    def subtree(self, root, names):
+        """ The names of root and its subsections, found with tree. """
+        if root in self.tree:
+            return self.tree.subtree(root)
+        # not a section (the parser creates the parents): by the names
+        prefix = root + '/'
+        return [name for name in names if name.startswith(prefix)]
+
+    def select_unmatched(self, names):
+        '''
+            Returns the set of the names that match, as select(), and
+            the list of the patterns that match none of them, in order.
+        '''
+        if self.subtrees:
+            names = list(names)
+        selected = set()
+        # indices of the patterns found
+        found = set()
+        # those still to find: a name is checked only against these
+        pending_prefixes = list(self.prefix_patterns)
+        regex_match = None if self.regex is None else self.regex.match
+        for name in names:
+            if name in self.exact:
+                selected.add(name)
+                found.update(self.exact_patterns[name])
+            if name.startswith(self.prefixes):
+                selected.add(name)
+                if pending_prefixes:
+                    for p, i in pending_prefixes:
+                        if name.startswith(p):
+                            found.add(i)
+                    pending_prefixes = [(p, i) for p, i in pending_prefixes
+                                        if not i in found]
+            if regex_match is not None:
+                m = regex_match(name)
+                if m is not None:
+                    selected.add(name)
+                    found.add(int(m.lastgroup[1:]))
+            if self.everything:
+                selected.add(name)
+        for root, i in self.subtrees:
+            names_under = self.subtree(root, names)
+            if names_under:
+                selected.update(names_under)
+                found.add(i)
+        return selected, self._missing(selected, found)
+
+    def _missing(self, selected, found):
+        missing = []
+        for i, pattern in enumerate(self.patterns):
+            if i in found:
+                continue
+            kind, value = compile_pattern(pattern)
+            if kind == 'all':
+                if selected:
+                    continue
+            elif kind == 'regex':
+                # another pattern came first in the joined expression
+                # for the names it matches, which were selected anyway
+                regex = re.compile(value)
+                if any(regex.match(name) for name in selected):
+                    continue
+            missing.append(pattern)
+        return missing
+
+    def unmatched(self, names):
+        """ The patterns that match none of the names, in order. """
+        return self.select_unmatched(names)[1]
@@ -0,0 +1,151 @@
+'''
+    Reading and writing lists of commands (as written by lsm_collect)
+    and symbol records, as YAML or as JSON lines.
+
+    YAML is read and written with the safe loader and dumper of
+    libyaml (CSafeLoader, CSafeDumper) if PyYAML was built with it.
+    In JSON lines, each line is a JSON value: a string for a command,
+    an object for a symbol record; so large lists can be written and
+    read one item at a time. The format of an input is recognized
+    from its first line that is not empty or a "#" comment.
+'''
+from . import Symbol, NomenclatureEntry, Where, import_yaml
+import json
+
+__all__ = [
+    'FORMATS',
+    'yaml_loader',
+    'yaml_dumper',
+    'detect_format',
+    'read_commands',
+    'write_commands',
+    'symbol_record',
+    'symbol_from_record',
+    'write_symbol_records',
+    'read_symbol_records',
+]
+
+FORMATS = ['yaml', 'jsonl']
+
+
+def yaml_loader():
+    """ The fastest safe YAML loader available. """
+    yaml = import_yaml()
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def yaml_dumper():
+    """ The fastest safe YAML dumper available. """
+    yaml = import_yaml()
+    return getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def detect_format(lines):
+    '''
+        Returns 'jsonl' or 'yaml' for the text with these lines,
+        looking at the first one that is not empty or a comment.
+    '''
+    for line in lines:
+        s = line.strip()
+        if not s or s.startswith('#'):
+            continue
+        if s[0] in '"{':
+            return 'jsonl'
+        return 'yaml'
+    return 'yaml'
+
+
+def read_commands(stream):
+    '''
+        Returns the list of commands in the stream, either a YAML list
+        (lsm_collect's default output) or JSON lines.
+    '''
+    # the first lines decide; they are read again afterwards
+    head = []
+    for line in stream:
+        head.append(line)
+        s = line.strip()
+        if s and not s.startswith('#'):
+            break
+    if detect_format(head) == 'jsonl':
+        commands = []
+        for lines in (head, stream):
+            for line in lines:
+                if line.strip() and not line.lstrip().startswith('#'):
+                    commands.append(json.loads(line))
+        return commands
+
+    yaml = import_yaml()
+    commands = yaml.load(''.join(head) + stream.read(), Loader=yaml_loader())
+    if commands is None:
+        return []
+    if not isinstance(commands, list):
+        raise ValueError('Expected a list of commands, got %s.'
+                         % type(commands).__name__)
+    return commands
+
+
+def write_commands(commands, out, format='yaml'):  # @ReservedAssignment
+    """ Writes the commands as a YAML list, or one per line as JSON. """
+    if format == 'jsonl':
+        write = out.write
+        for c in commands:
+            write(json.dumps(c))
+            write('\n')
+    elif format == 'yaml':
+        yaml = import_yaml()
+        yaml.dump(list(commands), out, Dumper=yaml_dumper(),
+                  default_flow_style=False)
+    else:
+        raise ValueError('No known format %r (valid: %s).'
+                         % (format, ', '.join(FORMATS)))
+
+
+def symbol_record(s):
+    ''' The symbol as a dict of JSON values (see symbol_from_record()). '''
+    nomenc = s.nomenclature
+    where = s.where
+    return {
+        'symbol': s.symbol,
+        'section': s.tag,
+        'definition_order': s.definition_order,
+        'nargs': s.nargs,
+        'tex': s.tex,
+        'desc': s.desc,
+        'example': s.example,
+        'nomenclature': (None if nomenc is None
+                         else {'label': nomenc.label, 'text': nomenc.text}),
+        'attrs': s.other,
+        'filename': None if where is None else where.filename,
+        'lineno': None if where is None else where.lineno,
+    }
+
+
+def symbol_from_record(r):
+    """ The Symbol of a record written by symbol_record(). """
+    nomenc = r.get('nomenclature')
+    if nomenc is not None:
+        nomenc = NomenclatureEntry(nomenc['label'], nomenc['text'])
+    where = None
+    if r.get('filename') is not None:
+        where = Where(r['filename'], r['lineno'])
+    return Symbol(r['symbol'], tex=r['tex'],
+                  definition_order=r['definition_order'], tag=r['section'],
+                  desc=r['desc'], example=r['example'], nargs=r['nargs'],
+                  where=where, nomenclature=nomenc, other=r['attrs'])
+
+
+def write_symbol_records(symbols, out):
+    """ Writes the records of the symbols (an iterable), one per line. """
+    write = out.write
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    for s in symbols:
+        write(dumps(symbol_record(s)))
+        write('\n')
+
+
+def read_symbol_records(stream):
+    """ Yields the Symbol for each line written by write_symbol_records(). """
+    for line in stream:
+        if line.strip():
+            yield symbol_from_record(json.loads(line))
@@ -1,4 +1,6 @@
 from collections import namedtuple
+import itertools
+import sys
 
 
 KNOWN_TAGS_SYMBOLS = ['def', 'nomenc', 'nomenc-exclude', 'nosummary',
@@ -11,19 +13,107 @@ NewCommand = namedtuple('NewCommand', 'command nargs body comment where')
 SpecialComment = namedtuple('SpecialComment', 'tag lines where')
 OtherLine = namedtuple('OtherLine', 'line where')
 
-SymbolSection = namedtuple('SymbolSection',
-                'name description symbols parent subs where '
-                'definition_order attrs')
+# A section or a command together with its attributes
+SectionHeader = namedtuple('SectionHeader', 'name description attrs where')
+CommandDefinition = namedtuple('CommandDefinition', 'command attrs')
 
 
-class Where:
-    def __init__(self, filename, lineno, text=None):
+class SymbolSection(object):
+    __slots__ = ('name', 'description', 'symbols', 'parent', 'subs', 'where',
+                 'definition_order', 'attrs')
+
+    def __init__(self, name, description, symbols, parent, subs, where,
+                 definition_order, attrs):
+        self.name = intern_string(name)
+        self.description = description
+        self.symbols = symbols
+        self.parent = intern_string(parent)
+        self.subs = subs
+        self.where = where
+        self.definition_order = definition_order
+        self.attrs = attrs
+
+    @property
+    def depth(self):
+        """ 0 for a section, 1 for a subsection, and so on. """
+        return self.name.count('/')
+
+    def __getstate__(self):
+        return dict((k, getattr(self, k)) for k in SymbolSection.__slots__)
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def __repr__(self):
+        return ('SymbolSection(name=%r, description=%r, symbols=%r, '
+                'parent=%r, subs=%r, where=%r, definition_order=%r, '
+                'attrs=%r)' % (self.name, self.description, self.symbols,
+                               self.parent, self.subs, self.where,
+                               self.definition_order, self.attrs))
+
+
+def intern_string(s):
+    """ Interns s if it is a string (filenames, tags, section names). """
+    if s is None:
+        return None
+    return sys.intern(s)
+
+
+class Where(object):
+    '''
+        A position in a source file.
+
+        The text of the line is either given, or read back from the
+        file when first needed, and kept: at the byte offset if known,
+        otherwise by line number (lineno counts from 0).
+    '''
+    __slots__ = ('filename', 'lineno', '_text', 'offset')
+
+    def __init__(self, filename, lineno, text=None, offset=None):
         self.filename = filename
         self.lineno = lineno
         if text and text[-1] == '\n':
             text = text[:-1]
-        self.text = text
-        
+        self._text = text
+        self.offset = offset
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.read_text()
+        return self._text
+
+    def read_text(self):
+        # the lines end as in the text mode of open(): also with "\r"
+        if self.offset is not None:
+            try:
+                with open(self.filename, 'rb') as f:
+                    f.seek(self.offset)
+                    line = f.readline().split(b'\r', 1)[0]
+            except IOError:
+                return None
+            line = line.decode('utf-8', 'replace')
+        else:
+            # not linecache: it would keep the whole file, and return
+            # the old text after the file is edited
+            try:
+                with open(self.filename, encoding='utf-8',
+                          errors='replace') as f:
+                    line = next(itertools.islice(f, self.lineno, None), '')
+            except IOError:
+                return None
+            if not line:
+                return None
+        return line.rstrip('\n')
+
+    def __getstate__(self):
+        return {'filename': self.filename, 'lineno': self.lineno,
+                'text': self._text, 'offset': self.offset}
+
+    def __setstate__(self, state):
+        self.__init__(state['filename'], state['lineno'],
+                      state.get('text'), state.get('offset'))
 
     def __str__(self):
         return '%s: line %4d: %s' % (self.filename, self.lineno, self.text)
@@ -34,6 +124,8 @@ class Where:
 
 class ParsingError(Exception):
     def __init__(self, error, where):
+        # passing the arguments makes it picklable
+        Exception.__init__(self, error, where)
         self.error = error
         self.where = where
 
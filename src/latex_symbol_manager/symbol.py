@@ -1,22 +1,61 @@
-import yaml
+from .scanning import find_commands
 
 
-class NomenclatureEntry(yaml.YAMLObject):
+class NomenclatureEntry(object):
+    __slots__ = ('label', 'text')
+
     def __init__(self, label, text):
         self.label = label
         self.text = text
 
+    def __getstate__(self):
+        return {'label': self.label, 'text': self.text}
+
+    def __setstate__(self, state):
+        self.label = state['label']
+        self.text = state['text']
+
     def __repr__(self):
         return ('Nom(%r, %r)' % (self.label, self.text))
 
 
 
-class Symbol(yaml.YAMLObject):
+# The definition written by lsm_symbols: it works whether or not
+# the command is already defined.
+DEFINITION_TEMPLATE = ('\\ifdefined%s%%\n  \\renewcommand%s%%\n\\else%%\n  '
+                       '\\newcommand%s%%\n\\fi\n')
+
+
+def definition_block(symbol, nargs, tex, desc=None):
+    """ The text of Symbol.tex_definition(), with the body tex. """
+    if nargs:
+        arguments = '[%s]{%s}' % (nargs, tex)
+    else:
+        arguments = '{' + tex + '}'
+
+    if isinstance(symbol, list):
+        s = "\n".join([DEFINITION_TEMPLATE % (t, '{' + t + '}' + arguments,
+                                              '{' + t + '}' + arguments)
+                       for t in symbol])
+    else:
+        params = '{' + symbol + '}' + arguments
+        s = DEFINITION_TEMPLATE % (symbol, params, params)
+
+    if desc:
+        s += '% ' + desc
+    return s
+
+
+class Symbol(object):
+    # see import_yaml()
     yaml_tag = u'!Symbol'
 
+    __slots__ = ('symbol', 'tex', 'definition_order', 'nargs', 'desc', 'long',
+                 'example', 'tag', 'where', 'nomenclature', 'other')
+
     def __init__(self, symbol, tex, definition_order, tag=None, desc=None,
                  long=None, example=None, nargs=0,  # @ReservedAssignment
-                  where=None, nomenclature=None, other={}):
+                  where=None, nomenclature=None, other=None):
         self.symbol = symbol
         self.tex = tex
         self.definition_order = definition_order
@@ -27,7 +66,14 @@ class Symbol(yaml.YAMLObject):
         self.tag = tag
         self.where = where
         self.nomenclature = nomenclature
-        self.other = other
+        self.other = other if other is not None else {}
+
+    def __getstate__(self):
+        return dict((k, getattr(self, k)) for k in Symbol.__slots__)
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
 
     def __repr__(self):
         return ('Symbol(%r, %r, %r, %r, %r, %r, %r)' % 
@@ -48,30 +94,29 @@ class Symbol(yaml.YAMLObject):
             tex = self.tex
         else:
             tex = wrapper(self.tex)
+        return definition_block(self.symbol, self.nargs, tex, self.desc)
 
-        def single_def(cmd):
+    def symbol_dependencies(self):
+        """ Returns all the commands used by the definition """
+        return find_commands(self.tex)
+    
 
-            if self.nargs:
-                params = '{%s}[%s]{%s}' % (cmd, self.nargs, tex)
-            else:
-                params = '{%s}{%s}' % (cmd, tex)
 
-            s = ('\\ifdefined%s%%\n  \\renewcommand%s%%\n\\else%%\n  '
-                 '\\newcommand%s%%\n\\fi\n' % (cmd, params, params))
-            return s
+def import_yaml():
+    '''
+        Imports yaml, which is slow to import, and registers Symbol
+        for the tag !Symbol, as a yaml.YAMLObject subclass would be.
+    '''
+    import yaml
+    if not Symbol in yaml.Dumper.yaml_representers:
+        yaml.add_representer(Symbol, represent_symbol)
+        yaml.add_constructor(Symbol.yaml_tag, construct_symbol)
+    return yaml
 
-        if isinstance(self.symbol, list):
-            s = "\n".join([single_def(t) for t in self.symbol])
-        else:
-            s = single_def(self.symbol)
 
-        if self.desc:
-            s += '%% %s' % self.desc
+def represent_symbol(dumper, symbol):
+    return dumper.represent_yaml_object(Symbol.yaml_tag, symbol, Symbol)
 
-        return s
 
-    def symbol_dependencies(self):
-        """ Returns all the commands used by the definition """
-        from latex_symbol_manager.programs.collect.find_commands import find_all_commands_in_string
-        return find_all_commands_in_string(self.tex)
-    
+def construct_symbol(loader, node):
+    return loader.construct_yaml_object(node, Symbol)
@@ -0,0 +1,292 @@
+'''
+    Selection of symbols by their attributes, with a small language:
+
+        deprecated                  has the attribute (any %: tag)
+        sort=10, def="def:x y"      the attribute has this value
+        def!=def:x                  has the attribute, another value
+        section:dynamics            in the section or its subsections,
+                                    at any depth
+        section:dyn*, section:re:x  sections matched as by lsm_select
+        nargs, nargs=2, nargs>0     number of arguments (<, <=, >, >=)
+        file:symbols.tex            defined in the file (name, base
+        file:*/chapter*.tex         name, or glob)
+        all                         every symbol
+
+    combined with "and", "or", "not" and parentheses; "not" binds
+    tighter than "and", which binds tighter than "or":
+
+        deprecated or (notfinal and not section:sensors)
+
+    The query is evaluated against an AttributeIndex, built once from
+    the symbols, which keeps for each attribute, section, number of
+    arguments and file the set of the names of its symbols; each term
+    is a set, and the query is computed with set operations. Given the
+    sections too, the subtree of a section is a slice of the pre-order
+    of their SectionTree.
+'''
+from bisect import bisect_left
+import fnmatch
+import os
+import re
+
+from .section_tree import SectionTree
+from .selection import SectionSelector, WILDCARDS
+
+__all__ = [
+    'AttributeIndex',
+    'parse_query',
+    'select_symbols',
+]
+
+token_regex = re.compile(r'\s*(?:(\()|(\))|((?:[^\s()"]|"[^"]*")+))')
+term_regex = re.compile(r'^([A-Za-z][\w-]*)(?:(:|!=|<=|>=|=|<|>)(.*))?$',
+                        re.DOTALL)
+
+KEYWORDS = ['and', 'or', 'not']
+COMPARISONS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def tokenize(query):
+    tokens = []
+    pos = 0
+    query = query.rstrip()
+    while pos < len(query):
+        m = token_regex.match(query, pos)
+        if m is None:
+            raise ValueError('Cannot parse %r at position %d.'
+                             % (query, pos))
+        tokens.append(m.group(m.lastindex))
+        pos = m.end()
+    return tokens
+
+
+def parse_query(query):
+    '''
+        Returns the tree of the query, made of tuples: ('and', a, b),
+        ('or', a, b), ('not', a) and the terms ('all',), ('attr', key),
+        ('value', key, op, value), ('section', pattern),
+        ('nargs', op, n), ('file', pattern). Raises ValueError if the
+        query is not valid.
+    '''
+    tokens = tokenize(query)
+    if not tokens:
+        raise ValueError('Empty query.')
+    tree, pos = _parse_or(tokens, 0)
+    if pos < len(tokens):
+        raise ValueError('Unexpected %r in query %r (missing "and" or '
+                         '"or"?)' % (tokens[pos], query))
+    return tree
+
+
+def _parse_or(tokens, pos):
+    a, pos = _parse_and(tokens, pos)
+    while pos < len(tokens) and tokens[pos] == 'or':
+        b, pos = _parse_and(tokens, pos + 1)
+        a = ('or', a, b)
+    return a, pos
+
+
+def _parse_and(tokens, pos):
+    a, pos = _parse_not(tokens, pos)
+    while pos < len(tokens) and tokens[pos] == 'and':
+        b, pos = _parse_not(tokens, pos + 1)
+        a = ('and', a, b)
+    return a, pos
+
+
+def _parse_not(tokens, pos):
+    if pos < len(tokens) and tokens[pos] == 'not':
+        a, pos = _parse_not(tokens, pos + 1)
+        return ('not', a), pos
+    return _parse_atom(tokens, pos)
+
+
+def _parse_atom(tokens, pos):
+    if pos >= len(tokens):
+        raise ValueError('Query ends too early.')
+    token = tokens[pos]
+    if token == '(':
+        a, pos = _parse_or(tokens, pos + 1)
+        if pos >= len(tokens) or tokens[pos] != ')':
+            raise ValueError('Missing ")".')
+        return a, pos + 1
+    if token == ')' or token in KEYWORDS:
+        raise ValueError('Unexpected %r in query.' % token)
+    return parse_term(token), pos + 1
+
+
+def parse_term(token):
+    m = term_regex.match(token)
+    if m is None:
+        raise ValueError('Invalid term %r.' % token)
+    key, op, value = m.groups()
+    if value is not None:
+        value = value.replace('"', '')
+    if key == 'all' and op is None:
+        return ('all',)
+    if key in ['section', 'file']:
+        if op != ':' or not value:
+            raise ValueError('Use %s:<name> (got %r).' % (key, token))
+        if key == 'section' and value.endswith('/'):
+            # the subtree anyway
+            value = value.rstrip('/')
+        return (key, value)
+    if key == 'nargs':
+        if op is None:
+            return ('nargs', '>', 0)
+        if not op in COMPARISONS or not value.isdigit():
+            raise ValueError('Use nargs=<n> (or <, >...; got %r).' % token)
+        return ('nargs', op, int(value))
+    if op is None:
+        return ('attr', key)
+    if not op in ['=', '!=']:
+        raise ValueError('Only = and != apply to %r (got %r).'
+                         % (key, token))
+    return ('value', key, op, value)
+
+
+class AttributeIndex(object):
+    '''
+        For a dictionary of symbols, the sets of the names of the
+        symbols with each attribute, in each section, with each number
+        of arguments and defined in each file.
+
+        sections (name -> SymbolSection) is optional: without it the
+        subsections are found by their names.
+    '''
+
+    def __init__(self, symbols, sections=None):
+        self.symbols = symbols
+        self.tree = None if sections is None else SectionTree(sections)
+        self.all = set(symbols)
+        # key -> set of names
+        self.attrs = {}
+        # section name -> set of names
+        self.sections = {}
+        # nargs -> set of names
+        self.nargs = {}
+        # filename -> set of names
+        self.files = {}
+        # key -> value -> set of names, made when needed by values()
+        self.attr_values = {}
+
+        for name, s in symbols.items():
+            for k in s.other:
+                self.attrs.setdefault(k, set()).add(name)
+            self.sections.setdefault(s.tag, set()).add(name)
+            self.nargs.setdefault(s.nargs or 0, set()).add(name)
+            filename = None if s.where is None else s.where.filename
+            self.files.setdefault(filename, set()).add(name)
+        self.section_names = sorted(n for n in self.sections
+                                    if n is not None)
+
+    def values(self, key):
+        """ The dictionary value -> names for the attribute key. """
+        if not key in self.attr_values:
+            by_value = {}
+            for name in self.attrs.get(key, ()):
+                value = self.symbols[name].other[key]
+                by_value.setdefault(value, set()).add(name)
+            self.attr_values[key] = by_value
+        return self.attr_values[key]
+
+    def evaluate(self, tree):
+        """ The set of the names of the symbols matching the tree. """
+        kind = tree[0]
+        if kind == 'and':
+            a, b = tree[1], tree[2]
+            # "x and not y" as a difference, without complementing y
+            if b[0] == 'not':
+                return self.evaluate(a) - self.evaluate(b[1])
+            if a[0] == 'not':
+                return self.evaluate(b) - self.evaluate(a[1])
+            return self.evaluate(a) & self.evaluate(b)
+        if kind == 'or':
+            return self.evaluate(tree[1]) | self.evaluate(tree[2])
+        if kind == 'not':
+            return self.all - self.evaluate(tree[1])
+        if kind == 'all':
+            return set(self.all)
+        if kind == 'attr':
+            return set(self.attrs.get(tree[1], ()))
+        if kind == 'value':
+            _, key, op, value = tree
+            by_value = self.values(key)
+            if op == '=':
+                return set(by_value.get(value, ()))
+            return self._union(names for v, names in by_value.items()
+                               if v != value)
+        if kind == 'section':
+            return self._union(self.sections.get(n, ())
+                               for n in self.section_subtree(tree[1]))
+        if kind == 'nargs':
+            _, op, n = tree
+            compare = COMPARISONS[op]
+            return self._union(names for nargs, names in self.nargs.items()
+                               if compare(nargs, n))
+        if kind == 'file':
+            return self._union(names for filename, names
+                               in self.files.items()
+                               if filename is not None
+                               and file_matches(filename, tree[1]))
+        raise ValueError('Unknown term %r.' % (tree,))
+
+    def section_subtree(self, pattern):
+        ''' The names of the sections matching the pattern of section:. '''
+        if (pattern.startswith('re:')
+            or any(c in pattern for c in WILDCARDS)):
+            return SectionSelector([pattern]).select(self.section_names)
+        if self.tree is not None:
+            if not pattern in self.tree:
+                return []
+            return self.tree.subtree(pattern)
+        # the section and the names starting with "pattern/", which
+        # are contiguous in the sorted names
+        found = [pattern] if pattern in self.sections else []
+        prefix = pattern + '/'
+        i = bisect_left(self.section_names, prefix)
+        while (i < len(self.section_names)
+               and self.section_names[i].startswith(prefix)):
+            found.append(self.section_names[i])
+            i += 1
+        return found
+
+    def select(self, query):
+        """ The set of the names of the symbols matching the query. """
+        return self.evaluate(parse_query(query))
+
+    @staticmethod
+    def _union(sets):
+        result = set()
+        for s in sets:
+            result.update(s)
+        return result
+
+
+def file_matches(filename, pattern):
+    basename = os.path.basename(filename)
+    if pattern in [filename, basename]:
+        return True
+    if any(c in pattern for c in WILDCARDS):
+        return (fnmatch.fnmatchcase(filename, pattern)
+                or fnmatch.fnmatchcase(basename, pattern))
+    return False
+
+
+def select_symbols(symbols, query, sections=None, index=None):
+    '''
+        Returns the set of the names of the symbols (a dictionary
+        name -> Symbol) matching the query. Pass the AttributeIndex of
+        the symbols as index to evaluate several queries without
+        building it again (SymbolLibrary.index() keeps one).
+    '''
+    if index is None:
+        index = AttributeIndex(symbols, sections)
+    return index.select(query)
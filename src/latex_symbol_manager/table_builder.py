@@ -0,0 +1,142 @@
+'''
+    Writes the symbol tables of lsm_table directly as strings, without
+    latex_gen: the rows are appended to a list, which is joined and
+    written in large chunks.
+
+    The tables can also be split in several longtables of a bounded
+    number of rows, since a single longtable with thousands of rows
+    can exceed the memory of TeX.
+'''
+
+__all__ = [
+    'write_table_full',
+    'write_table_minimal',
+    'heading_indent',
+]
+
+# The characters special to TeX, and how to write them.
+LATEX_SPECIAL = {
+    '\\': '\\textbackslash{}',
+    '{': '\\{',
+    '}': '\\}',
+    '$': '\\$',
+    '&': '\\&',
+    '#': '\\#',
+    '%': '\\%',
+    '_': '\\_',
+    '^': '\\textasciicircum{}',
+    '~': '\\textasciitilde{}',
+}
+LATEX_ESCAPE_TABLE = str.maketrans(LATEX_SPECIAL)
+
+
+def latex_escape(s):
+    return s.translate(LATEX_ESCAPE_TABLE)
+
+
+def raw_appearance(s):
+    """ Same as create_symbols_table.raw_appearance(). """
+    return '{\\color[rgb]{0.5,0.5,0.5}\\texttt{' + s + '}}'
+
+
+def heading_indent(section):
+    """ The space before the heading of a section: more for each level. """
+    if not section.depth:
+        return ''
+    return '\\hspace*{%dem}' % (2 * section.depth)
+
+
+class LongtableWriter(object):
+    ''' Accumulates rows, starting a new longtable every max_rows rows. '''
+
+    def __init__(self, out, columns, max_rows=None):
+        self.out = out
+        self.begin = '\\begin{longtable}{%s}\n' % ''.join(columns)
+        self.max_rows = max_rows
+        self.nrows = 0
+        self.parts = [self.begin]
+
+    def row(self, *cells):
+        if self.max_rows is not None and self.nrows == self.max_rows:
+            self.parts.append('\\end{longtable}\n')
+            self.flush()
+            self.parts.append(self.begin)
+            self.nrows = 0
+        self.parts.append(' & '.join(cells))
+        self.parts.append(' \\\\\n')
+        self.nrows += 1
+        if len(self.parts) >= 8192:
+            self.flush()
+
+    def hline(self):
+        self.parts.append('\\hline\n')
+
+    def flush(self):
+        self.out.write(''.join(self.parts))
+        del self.parts[:]
+
+    def close(self):
+        self.parts.append('\\end{longtable}\n')
+        self.flush()
+
+
+def write_table_full(sections, out, write_examples=True, example_size='8cm',
+                     symbols_sort_key=lambda x: x.symbol.lower(),
+                     max_rows=None):
+    """ The "full" style of lsm_table (see create_table()). """
+    table = LongtableWriter(out, ['l', 'l', 'l'], max_rows)
+    row = table.row
+    for section in sections:
+        row('', '', '')
+        head1 = raw_appearance(latex_escape(section.name))
+        head2 = '\\emph{%s}' % (section.description or '')
+        row('\\multicolumn{3}{l}{%s%s %s}' %
+            (heading_indent(section), head1, head2))
+        table.hline()
+        if section.parent is None:
+            table.hline()
+
+        symbols = list(section.symbols.values())
+        symbols.sort(key=symbols_sort_key)
+        for s in symbols:
+            desc = s.desc or ''
+            if s.nargs == 0:
+                if not 'nosummary' in s.other:
+                    summary = '$' + s.symbol + '$'
+                else:
+                    summary = '(nosummary)'
+                row(raw_appearance(latex_escape(s.symbol)), summary, desc)
+            else:
+                args = ",".join(['...'] * s.nargs)
+                example = '%s{%s}' % (s.symbol, args)
+                row(raw_appearance(latex_escape(example)), '', desc)
+
+            if s.example and write_examples:
+                box = ('\\fcolorbox[rgb]{0.5,0.5,0.5}{1,1,1}{'
+                       '\\begin{minipage}{%s}%s\\par '
+                       '{\\small \\texttt{%s}}\\end{minipage}}'
+                       % (example_size, s.example, latex_escape(s.example)))
+                row('', '', box)
+    table.close()
+
+
+def write_table_minimal(sections, out,
+                        symbols_sort_key=lambda x: x.symbol.lower(),
+                        max_rows=None):
+    """ The "minimal" style of lsm_table (see create_table_minimal()). """
+    table = LongtableWriter(out, ['c', 'l'], max_rows)
+    row = table.row
+    for section in sections:
+        row('\\multicolumn{2}{l}{%s%s}' %
+            (heading_indent(section), section.description or ''))
+        table.hline()
+        if section.parent is None:
+            table.hline()
+
+        symbols = list(section.symbols.values())
+        symbols.sort(key=symbols_sort_key)
+        for s in symbols:
+            if s.nargs != 0:
+                continue
+            row('$' + s.symbol + '$', s.desc or '')
+    table.close()
@@ -0,0 +1,5 @@
+'''
+    Tests of the package; run them with pytest from the top directory:
+
+        python -m pytest -q
+'''
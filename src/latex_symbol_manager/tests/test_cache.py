@@ -0,0 +1,72 @@
+'''
+    The cache of the parsed sources: freshness of the entries and the
+    diagnostics kept with them.
+'''
+from latex_symbol_manager import SymbolCache, load_sections_symbols
+from latex_symbol_manager.diagnostics import diagnostics
+import marshal
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+SOURCE = r'''
+%:section: s: Section s
+\newcommand{\x}{x} % x
+%:todo: check this
+'''
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_cache')
+        self.cache_dir = os.path.join(self.dirname, 'cache')
+        self.filename = os.path.join(self.dirname, 'symbols.tex')
+        with open(self.filename, 'w') as f:
+            f.write(SOURCE)
+        diagnostics.reset()
+        self.echo = diagnostics.echo
+        diagnostics.echo = False
+
+    def tearDown(self):
+        diagnostics.echo = self.echo
+        diagnostics.reset()
+        shutil.rmtree(self.dirname)
+
+    def load(self):
+        return load_sections_symbols([self.filename],
+                                     cache_dir=self.cache_dir)
+
+    def test_diagnostics_of_a_hit(self):
+        self.load()
+        first = diagnostics.state()
+        self.assertEqual(list(first), ['todo'])
+        diagnostics.reset()
+        sections, symbols = self.load()
+        self.assertEqual(list(symbols), ['\\x'])
+        self.assertEqual(diagnostics.state(), first)
+
+    def test_touched_source_is_not_hashed_again(self):
+        self.load()
+        cache = SymbolCache(self.cache_dir)
+        os.utime(self.filename, ns=(1, 10 ** 9))
+        self.assertIsNotNone(cache.get([self.filename]))
+        # the new mtime is in the manifest now: no hash needed next time
+        entry = cache.entry_filename([self.filename])
+        with open(entry, 'rb') as f:
+            n = struct.unpack('<Q', f.read(8))[0]
+            manifest = marshal.loads(f.read(n))
+        self.assertEqual(manifest[0][1], 10 ** 9)
+
+    def test_changed_source(self):
+        self.load()
+        with open(self.filename, 'a') as f:
+            f.write('\\newcommand{\\y}{y} % y\n')
+        sections, symbols = self.load()
+        self.assertEqual(sorted(symbols), ['\\x', '\\y'])
+
+
+if __name__ == '__main__':
+    unittest.main()
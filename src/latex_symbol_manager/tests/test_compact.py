@@ -0,0 +1,91 @@
+'''
+    CompactRenderer: the output of lsm_symbols, written in chunks
+    while the sources are read.
+'''
+from latex_symbol_manager import parse_symbols
+from latex_symbol_manager.compact_all import CompactRenderer
+from latex_symbol_manager.benchmarks.synthetic import synthetic_library
+import io
+import unittest
+
+LIBRARY = r'''
+%:section: s: Section s
+\newcommand{\x}{x} % x
+\newcommand{\f}[1]{f(#1)} % f
+'''
+
+
+class Options(object):
+    select = None
+    color = None
+    markfirst = False
+
+
+class Writer(object):
+    ''' Records the writes in log. '''
+
+    def __init__(self, log):
+        self.log = log
+        self.parts = []
+
+    def write(self, s):
+        self.log.append('write')
+        self.parts.append(s)
+
+
+def elements(text, log=None):
+    for el in parse_symbols(io.StringIO(text), 'symbols.tex'):
+        if log is not None:
+            log.append('element')
+        yield el
+
+
+class CompactTest(unittest.TestCase):
+
+    def render(self, text, options=None, selected=None, chunk_size=4096):
+        out = io.StringIO()
+        renderer = CompactRenderer(options or Options(), selected,
+                                   chunk_size)
+        renderer.render(elements(text), out)
+        return out.getvalue()
+
+    def test_streaming(self):
+        text = synthetic_library(100, subsections=1)
+        log = []
+        writer = Writer(log)
+        CompactRenderer(Options(), chunk_size=16).render(
+            elements(text, log), writer)
+        # written along the way, in more than one chunk
+        self.assertGreater(len(writer.parts), 1)
+        last = max(i for i, x in enumerate(log) if x == 'element')
+        self.assertLess(log.index('write'), last)
+        self.assertEqual(''.join(writer.parts), self.render(text))
+
+    def test_definitions(self):
+        output = self.render(LIBRARY)
+        self.assertIn('\\newcommand{\\x}{x}', output)
+        self.assertIn('\\newcommand{\\f}[1]{f(#1)}', output)
+
+    def test_color_and_markfirst(self):
+        options = Options()
+        options.color = 'red'
+        options.markfirst = True
+        output = self.render(LIBRARY, options)
+        self.assertIn('\\newbool{usedx}\\setbool{usedx}{false}\n', output)
+        self.assertIn('\\newcommand{\\x}'
+                      '{\\markfirst{x}{usedx}{{\\color{red} x}}}', output)
+        # only the symbols without arguments
+        self.assertIn('\\newcommand{\\f}[1]{f(#1)}', output)
+
+    def test_selected(self):
+        options = Options()
+        options.select = 'nargs'
+        output = self.render(LIBRARY, options, selected={'\\f'})
+        self.assertIn("% \\x: Skipped because not selected by 'nargs'\n",
+                      output)
+        self.assertNotIn('\\newcommand{\\x}', output)
+        self.assertIn('\\newcommand{\\f}', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
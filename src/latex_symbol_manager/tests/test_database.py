@@ -0,0 +1,63 @@
+'''
+    The SQLite database: the definitions read back give the same
+    symbols, in the same order, as parsing the sources.
+'''
+from latex_symbol_manager import (parse_all_sections_symbols,
+    write_database, read_database_definitions, add_definitions)
+from latex_symbol_manager.serialization import symbol_record
+import os
+import shutil
+import tempfile
+import unittest
+
+# "a" is created as the parent of "a/b", and defined by the second file
+SOURCES = [r'''
+%:section: a/b: Subsection b
+\newcommand{\y}{y} % y
+%:sort: 10
+%:section: c: Section c
+\newcommand{\w}[1]{w(#1)} % w
+%:section: d: No symbols
+''', r'''
+%:section: a: Section a
+\newcommand{\x}{\y} % x
+%:section: e/f: Under a placeholder
+\newcommand{\v}{v} % v
+''']
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_database')
+        self.filenames = []
+        for i, source in enumerate(SOURCES):
+            filename = os.path.join(self.dirname, 'g%d.tex' % i)
+            with open(filename, 'w') as f:
+                f.write(source)
+            self.filenames.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_same_as_the_parse(self):
+        sections, symbols = parse_all_sections_symbols(self.filenames)
+        self.assertEqual(list(symbols), ['\\y', '\\w', '\\x', '\\v'])
+        database = os.path.join(self.dirname, 'symbols.db')
+        write_database(sections, symbols, database, self.filenames)
+
+        read_sections, read_symbols = {}, {}
+        for _ in add_definitions(read_database_definitions(database),
+                                 read_sections, read_symbols):
+            pass
+        self.assertEqual([symbol_record(s) for s in read_symbols.values()],
+                         [symbol_record(s) for s in symbols.values()])
+        self.assertEqual(
+            [(s.name, s.description, s.parent, s.definition_order,
+              list(s.symbols)) for s in read_sections.values()],
+            [(s.name, s.description, s.parent, s.definition_order,
+              list(s.symbols)) for s in sections.values()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+'''
+    The collector of the warnings: the limit of messages of each kind,
+    and its use by the parser whatever was imported first.
+'''
+from latex_symbol_manager.diagnostics import Diagnostics
+import logging
+import os
+import subprocess
+import sys
+import unittest
+
+import latex_symbol_manager
+
+
+class CapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger('test_diagnostics')
+        self.logger.propagate = False
+        self.records = []
+        self.handler = logging.Handler()
+        self.handler.emit = self.records.append
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_max_per_kind(self):
+        d = Diagnostics(self.logger, max_per_kind=2)
+        for i in range(5):
+            d.report('strange-tag', 'tag %d', i)
+        d.report('todo', 'once')
+        state = d.state()
+        self.assertEqual(state['strange-tag'][1], 5)
+        self.assertEqual([m for m, _ in state['strange-tag'][2]],
+                         ['tag 0', 'tag 1'])
+        self.assertEqual(state['todo'][1], 1)
+        # two messages, then one saying that the others are hidden
+        messages = [r.getMessage() for r in self.records]
+        self.assertEqual(messages[:2], ['tag 0', 'tag 1'])
+        self.assertIn('Not showing more', messages[2])
+        self.assertEqual(messages[3:], ['once'])
+
+    def test_no_limit(self):
+        d = Diagnostics(self.logger, max_per_kind=None)
+        d.echo = False
+        for i in range(20):
+            d.report('k', 'm')
+        self.assertEqual(len(d.state()['k'][2]), 20)
+        self.assertEqual(self.records, [])
+
+    def test_merge(self):
+        worker = Diagnostics(self.logger, max_per_kind=2)
+        worker.echo = False
+        for i in range(4):
+            worker.report('k', 'm%d', i)
+        main = Diagnostics(self.logger, max_per_kind=2)
+        main.echo = False
+        main.report('k', 'first')
+        main.merge(worker.state())
+        self.assertEqual(main.state()['k'][1], 5)
+        self.assertEqual(len(main.state()['k'][2]), 2)
+
+    def test_disabled(self):
+        d = Diagnostics(self.logger)
+        d.disable()
+        d.report('k', 'm')
+        self.assertEqual(d.state(), {})
+
+
+# parses a file with a warning, after importing the submodule first
+SCRIPT = r'''
+import io, sys
+from latex_symbol_manager.diagnostics import Diagnostics
+from latex_symbol_manager.diagnostics import diagnostics
+from latex_symbol_manager import parse_symbols
+diagnostics.echo = False
+text = '%:section: s: S\n\\newcommand{\\x}{x} % x\n%:todo: later\n'
+for _ in parse_symbols(io.StringIO(text), 'x.tex'):
+    pass
+print(sorted(diagnostics.state()))
+'''
+
+
+class ImportOrderTest(unittest.TestCase):
+
+    def test_submodule_imported_first(self):
+        src = os.path.dirname(os.path.dirname(latex_symbol_manager.__file__))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([src] + [p for p in
+            [env.get('PYTHONPATH')] if p])
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT],
+                                         env=env)
+        self.assertEqual(output.decode().strip(), "['todo']")
+
+
+if __name__ == '__main__':
+    unittest.main()
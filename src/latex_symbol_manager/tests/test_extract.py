@@ -0,0 +1,88 @@
+'''
+    lsm_extract: the definitions needed by documents, each after the
+    ones it uses, for many documents at once.
+'''
+from latex_symbol_manager import parse_symbols, SymbolGraph
+from latex_symbol_manager.programs.extract import (lsm_extract_main,
+    write_extract, get_targets)
+from latex_symbol_manager.utils import UserError
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+LIBRARY = r'''
+%:section: s: Section s
+\newcommand{\a}{\b + \c} % a
+\newcommand{\b}{b} % b
+\newcommand{\c}{\b'} % c
+\newcommand{\d}{d} % d
+'''
+
+
+class Options(object):
+    mains = []
+    outputs = []
+    manifest = None
+
+
+class ExtractTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_extract')
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def write(self, name, text):
+        filename = os.path.join(self.dirname, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def read_commands(self, filename):
+        ''' The commands defined in an output, in order. '''
+        with open(filename) as f:
+            return [line.split('}')[0].split('{')[1]
+                    for line in f if line.strip()]
+
+    def test_order(self):
+        symbols = {}
+        for _ in parse_symbols(io.StringIO(LIBRARY), 'symbols.tex', {},
+                               symbols):
+            pass
+        out = os.path.join(self.dirname, 'out.tex')
+        write_extract(SymbolGraph(symbols), {'\\a', '\\frac'}, out)
+        self.assertEqual(self.read_commands(out), ['\\b', '\\c', '\\a'])
+
+    def test_targets(self):
+        options = Options()
+        options.mains = ['a.tex']
+        options.outputs = ['a-symbols.tex']
+        options.manifest = self.write('targets.txt',
+                                      '# main output\n\n'
+                                      'b.tex b-symbols.tex  # second\n')
+        self.assertEqual(get_targets(options),
+                         [('a.tex', 'a-symbols.tex'),
+                          ('b.tex', 'b-symbols.tex')])
+        options.outputs = []
+        self.assertRaises(UserError, get_targets, options)
+
+    def test_batch(self):
+        library = self.write('symbols.tex', LIBRARY)
+        self.write('part.tex', '$\\d$\n')
+        doc1 = self.write('doc1.tex', '$\\c$ \\input{part}\n')
+        doc2 = self.write('doc2.tex', '$\\a + \\d$ % \\c\n')
+        out1 = os.path.join(self.dirname, 'doc1-symbols.tex')
+        out2 = os.path.join(self.dirname, 'doc2-symbols.tex')
+        manifest = self.write('targets.txt', '%s %s\n' % (doc2, out2))
+        lsm_extract_main(['-m', doc1, '-o', out1, '--manifest', manifest,
+                          '--no-cache', library])
+        self.assertEqual(self.read_commands(out1), ['\\b', '\\c', '\\d'])
+        self.assertEqual(self.read_commands(out2),
+                         ['\\b', '\\c', '\\a', '\\d'])
+
+
+if __name__ == '__main__':
+    unittest.main()
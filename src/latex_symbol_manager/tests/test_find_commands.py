@@ -0,0 +1,81 @@
+'''
+    lsm_collect: the scanner of the documents, its cache, and where
+    the included files are found.
+'''
+from latex_symbol_manager.programs.collect.find_commands import (
+    FileScanner, resolve_include)
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class FindCommandsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_find_commands')
+        self.cache_dir = os.path.join(self.dirname, 'cache')
+        self.texinputs = os.environ.get('TEXINPUTS')
+
+    def tearDown(self):
+        if self.texinputs is None:
+            os.environ.pop('TEXINPUTS', None)
+        else:
+            os.environ['TEXINPUTS'] = self.texinputs
+        shutil.rmtree(self.dirname)
+
+    def write(self, name, text):
+        filename = os.path.join(self.dirname, name)
+        if not os.path.exists(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def test_cache(self):
+        main = self.write('main.tex', '\\alpha \\input{part} % \\gamma\n')
+        part = self.write('part.tex', '\\beta \\input{main}\n')
+        scanner = FileScanner(cache_dir=self.cache_dir)
+        self.assertEqual(scanner.scan(main), (['\\alpha', '\\input'],
+                                              ['part']))
+        # and the cycle back to main
+        self.assertEqual(scanner.scan_tree(main),
+                         {'\\alpha', '\\beta', '\\input'})
+        scanner.save()
+
+        scanner = FileScanner(cache_dir=self.cache_dir)
+        self.assertEqual(scanner.scan(main), (['\\alpha', '\\input'],
+                                              ['part']))
+        self.assertFalse(scanner.changed)
+
+        # a different size: scanned again
+        self.write('main.tex', '\\alpha \\delta\n')
+        self.assertEqual(scanner.scan(main), (['\\alpha', '\\delta'], []))
+        self.assertTrue(scanner.changed)
+        # the files removed are forgotten
+        os.unlink(part)
+        scanner.save()
+        scanner = FileScanner(cache_dir=self.cache_dir)
+        self.assertEqual(sorted(scanner.results), [os.path.abspath(main)])
+
+    def test_resolve_include(self):
+        main = self.write('doc/main.tex', '')
+        here = self.write('doc/chapter.tex', '')
+        deep = self.write('lib/a/b/macros.tex', '')
+        flat = self.write('other/flat.tex', '')
+        self.write('other/sub/hidden.tex', '')
+        os.environ['TEXINPUTS'] = os.pathsep.join([
+            os.path.join(self.dirname, 'lib') + '//',
+            os.path.join(self.dirname, 'other'), ''])
+        main_dir = os.path.dirname(main)
+
+        self.assertEqual(resolve_include('chapter', main, main_dir), here)
+        self.assertEqual(resolve_include('macros', main, main_dir), deep)
+        self.assertEqual(resolve_include('flat.tex', main, main_dir), flat)
+        # without "//", not in the subdirectories
+        self.assertIsNone(resolve_include('hidden', main, main_dir))
+        self.assertIsNone(resolve_include('missing', main, main_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
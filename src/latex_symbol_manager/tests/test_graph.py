@@ -0,0 +1,107 @@
+'''
+    SymbolGraph: the symbols used by others, with a cycle, and the
+    symbols using them.
+'''
+from latex_symbol_manager import parse_symbols
+from latex_symbol_manager.graph import SymbolGraph
+from latex_symbol_manager.programs.dependents import write_dependents
+import io
+import unittest
+
+# \b and \c use each other
+LIBRARY = r'''
+%:section: s: Section s
+\newcommand{\a}{a} % a
+\newcommand{\b}{\a\c} % b
+\newcommand{\c}{\b} % c
+%:section: t: Section t
+\newcommand{\d}[1]{\c{#1}} % d
+\newcommand{\e}{\mathrm{e}} % e
+'''
+
+
+def load(sections=None):
+    symbols = {}
+    for _ in parse_symbols(io.StringIO(LIBRARY), 'symbols.tex', sections,
+                           symbols):
+        pass
+    return symbols
+
+
+class GraphTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = SymbolGraph(load())
+
+    def test_uses(self):
+        self.assertEqual(self.graph.uses['\\b'], ['\\a', '\\c'])
+        self.assertEqual(self.graph.uses['\\e'], [])
+        self.assertEqual(self.graph.used_by['\\c'], ['\\b', '\\d'])
+
+    def test_closure(self):
+        self.assertEqual(self.graph.closure(['\\d']),
+                         {'\\a', '\\b', '\\c', '\\d'})
+        self.assertEqual(self.graph.closure(['\\c']), {'\\a', '\\b', '\\c'})
+        self.assertEqual(self.graph.closure(['\\a', '\\e', '\\mathrm']),
+                         {'\\a', '\\e'})
+        # remembered, and the same again
+        self.assertEqual(self.graph.closure(['\\d']),
+                         {'\\a', '\\b', '\\c', '\\d'})
+
+    def test_cycles(self):
+        self.assertEqual(self.graph.cycles(), [['\\b', '\\c']])
+        self.assertEqual(self.graph.cycles(['\\c']), [['\\b', '\\c']])
+        self.assertEqual(self.graph.cycles(['\\a', '\\d']), [])
+
+    def test_topological_order(self):
+        order = self.graph.topological_order(['\\e', '\\d', '\\c', '\\b',
+                                              '\\a', '\\missing'])
+        self.assertEqual(order, ['\\a', '\\c', '\\b', '\\d', '\\e'])
+        # each symbol after those it uses, except in the cycle
+        for name in order:
+            for d in self.graph.uses[name]:
+                if not {name, d} == {'\\b', '\\c'}:
+                    self.assertLess(order.index(d), order.index(name))
+        self.assertEqual(self.graph.topological_order(['\\d', '\\a']),
+                         ['\\a', '\\d'])
+
+
+class DependentsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sections = {}
+        cls.symbols = load(cls.sections)
+        cls.graph = SymbolGraph(cls.symbols)
+
+    def test_direct(self):
+        self.assertEqual(self.graph.dependents(['\\a'], transitive=False),
+                         {'\\b': '\\a'})
+        self.assertEqual(self.graph.dependents(['\\e', '\\mathrm']), {})
+
+    def test_transitive(self):
+        # the nearest first, each with the symbol it uses
+        dependents = self.graph.dependents(['\\a'])
+        self.assertEqual(list(dependents.items()),
+                         [('\\b', '\\a'), ('\\c', '\\b'),
+                          ('\\d', '\\c')])
+        # in a cycle, not the command itself
+        self.assertEqual(self.graph.dependents(['\\c']),
+                         {'\\b': '\\c', '\\d': '\\c'})
+
+    def test_write(self):
+        out = io.StringIO()
+        write_dependents('\\a', self.graph.dependents(['\\a']),
+                         self.sections, self.symbols, out)
+        self.assertEqual(out.getvalue(),
+                         '\\a: 3 dependents\n'
+                         '  s\n'
+                         '    \\b\n'
+                         '    \\c (through \\b)\n'
+                         '  t\n'
+                         '    \\d (through \\c)\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+'''
+    SymbolLibrary: after each change of the sources, the same
+    sections and symbols as parsing all of them again.
+'''
+from latex_symbol_manager import SymbolLibrary, parse_all_sections_symbols
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def describe(sections, symbols):
+    ''' What must be the same, comparable with assertEqual. '''
+    dsections = [(s.name, s.description, s.parent, s.definition_order,
+                  list(s.symbols), sorted(s.subs))
+                 for s in sections.values()]
+    dsymbols = [(s.symbol, s.tex, s.tag, s.desc, s.definition_order)
+                for s in symbols.values()]
+    return sorted(dsections), dsymbols
+
+
+class LibraryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_incremental')
+        # far from the current time, so each write changes the stamp
+        self.time = 10 ** 9
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def write(self, name, text):
+        filename = os.path.join(self.dirname, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        self.time += 10
+        os.utime(filename, (self.time, self.time))
+        return filename
+
+    def check(self, library):
+        changed = library.refresh()
+        self.assertIsNone(library.error)
+        expected = parse_all_sections_symbols(library.filenames)
+        self.assertEqual(describe(library.sections, library.symbols),
+                         describe(*expected))
+        return changed
+
+    def test_parent_defined_by_a_later_file(self):
+        # g1 creates "a" as the parent of "a/b"; g2 defines it
+        g1 = self.write('g1.tex', '%:section: a/b: B\n'
+                        '\\newcommand{\\y}{y} % y\n')
+        g2 = self.write('g2.tex', '%:section: a: A\n'
+                        '\\newcommand{\\x}{\\y} % x\n')
+        library = SymbolLibrary([g1, g2])
+        self.check(library)
+        self.assertEqual(list(library.sections['a'].symbols), ['\\x'])
+
+        self.write('g2.tex', '%:section: a: A\n\\newcommand{\\z}{z} % z\n')
+        self.assertEqual(self.check(library), [g2])
+        self.assertEqual(list(library.sections['a'].symbols), ['\\z'])
+        self.assertEqual(library.sections['a'].description, 'A')
+
+        # g1 changes: g2 is added again on top of it
+        self.write('g1.tex', '%:section: a/b: B\n'
+                   '\\newcommand{\\w}{w} % w\n')
+        self.check(library)
+        self.assertEqual(list(library.sections['a'].symbols), ['\\z'])
+
+        # and without the definition, "a" is a placeholder again
+        self.write('g2.tex', '%:section: c: C\n')
+        self.check(library)
+        self.assertIsNone(library.sections['a'].description)
+        self.assertEqual(library.sections['a'].symbols, {})
+
+    def test_add_edit_remove_files(self):
+        g1 = self.write('g1.tex', '%:section: a: A\n'
+                        '\\newcommand{\\x}{x} % x\n')
+        g2 = self.write('g2.tex', '%:section: a/b: B\n'
+                        '\\newcommand{\\y}{\\x} % y\n')
+        g3 = self.write('g3.tex', '%:section: c/d: D\n'
+                        '\\newcommand{\\z}{z} % z\n')
+        library = SymbolLibrary([g1])
+        self.check(library)
+
+        library.set_filenames([g1, g2])
+        self.assertEqual(self.check(library), [g2])
+        self.assertEqual(list(library.symbols), ['\\x', '\\y'])
+
+        self.write('g1.tex', '%:section: a: A\n'
+                   '\\newcommand{\\w}{w} % w\n'
+                   '\\newcommand{\\x}{x} % x\n')
+        self.assertEqual(self.check(library), [g1])
+
+        # in the middle, and before the file with the error
+        self.write('g2.tex', '%:section: a: Again\n')
+        library.set_filenames([g1, g3, g2])
+        library.refresh()
+        self.assertEqual(list(library.symbols), ['\\w', '\\x', '\\z'])
+        self.assertIsNotNone(library.error)
+
+        library.set_filenames([g1, g3])
+        self.check(library)
+        library.set_filenames([g3])
+        self.check(library)
+        self.assertEqual(list(library.sections), ['c', 'c/d'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+'''
+    Memory footprint of the parsed sections and symbols, as allocated
+    according to tracemalloc, per 10k symbols of a synthetic library.
+'''
+from latex_symbol_manager import parse_all_sections_symbols
+from latex_symbol_manager.benchmarks.synthetic import synthetic_library
+import gc
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+NSYMBOLS = 10000
+
+# About 6.8 MB with slotted objects and lazy line text; the previous
+# representation needed about 16 MB.
+MAX_BYTES_PER_10K = 8 * 1000 * 1000
+
+
+def traced_bytes(function):
+    ''' Returns the result of function and the bytes it still holds. '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = function()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+class MemoryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dirname = tempfile.mkdtemp(prefix='test_memory')
+        cls.filename = os.path.join(cls.dirname, 'symbols.tex')
+        with open(cls.filename, 'w') as f:
+            f.write(synthetic_library(NSYMBOLS))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dirname)
+
+    def parse(self):
+        return parse_all_sections_symbols([self.filename])
+
+    def test_bytes_per_10k_symbols(self):
+        (sections, symbols), nbytes = traced_bytes(self.parse)
+        self.assertEqual(len(symbols), NSYMBOLS)
+        per_10k = nbytes * 10000.0 / NSYMBOLS
+        self.assertLess(per_10k, MAX_BYTES_PER_10K,
+                        '%d bytes per 10k symbols' % per_10k)
+
+    def test_line_text_not_kept(self):
+        sections, symbols = self.parse()
+        for s in symbols.values():
+            self.assertIsNone(s.where._text)
+        s = symbols['\\syma']
+        self.assertTrue(s.where.text.startswith('\\newcommand{\\syma}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+'''
+    Parsing the files with a pool of processes gives the same as
+    parsing them in sequence, errors and warnings included.
+'''
+from latex_symbol_manager import parse_all_sections_symbols, ParsingError
+from latex_symbol_manager.diagnostics import diagnostics
+from latex_symbol_manager.serialization import symbol_record
+import os
+import shutil
+import tempfile
+import unittest
+
+SOURCES = [r'''
+%:section: a/b: Subsection b
+\newcommand{\y}{y} % y
+%:todo: first
+''', r'''
+%:section: a: Section a
+\newcommand{\x}{\y} % x
+%:sort: 10
+''', r'''
+%:section: c: Section c
+\newcommand{\w}[2]{w(#1, #2)} % w
+%:todo: second
+''']
+
+
+class ParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_parallel')
+        self.filenames = []
+        for i, source in enumerate(SOURCES):
+            self.filenames.append(self.write('g%d.tex' % i, source))
+        diagnostics.reset()
+        self.echo = diagnostics.echo
+        diagnostics.echo = False
+
+    def tearDown(self):
+        diagnostics.echo = self.echo
+        diagnostics.reset()
+        shutil.rmtree(self.dirname)
+
+    def write(self, name, text):
+        filename = os.path.join(self.dirname, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def parse(self, filenames, jobs):
+        ''' The records of the symbols, the sections and the warnings. '''
+        diagnostics.reset()
+        sections, symbols = {}, {}
+        error = None
+        try:
+            sections, symbols = parse_all_sections_symbols(filenames,
+                                                           jobs=jobs)
+        except ParsingError as e:
+            error = (e.error, e.where.filename, e.where.lineno)
+        return ([symbol_record(s) for s in symbols.values()],
+                [(s.name, s.description, s.parent, s.definition_order,
+                  list(s.symbols), list(s.subs)) for s in sections.values()],
+                diagnostics.state(), error)
+
+    def test_same_as_sequential(self):
+        sequential = self.parse(self.filenames, 1)
+        self.assertEqual(len(sequential[0]), 3)
+        self.assertEqual(sorted(sequential[2]), ['todo'])
+        self.assertEqual(self.parse(self.filenames, 2), sequential)
+
+    def test_same_error(self):
+        # the section of the second file again
+        duplicate = self.write('dup.tex', '%:section: a: Again\n')
+        filenames = self.filenames + [duplicate]
+        sequential = self.parse(filenames, 1)
+        self.assertEqual(sequential[3][1:], (duplicate, 0))
+        self.assertEqual(self.parse(filenames, 2), sequential)
+
+
+if __name__ == '__main__':
+    unittest.main()
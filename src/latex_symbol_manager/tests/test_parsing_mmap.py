@@ -0,0 +1,103 @@
+'''
+    The memory-mapped parser gives the same elements as the text one.
+'''
+from latex_symbol_manager import (parse_all_symbols,
+    parse_all_sections_symbols, OtherLine)
+from latex_symbol_manager.compact_all import CompactRenderer
+from latex_symbol_manager.benchmarks.synthetic import synthetic_library
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class Options(object):
+    select = None
+    color = None
+    markfirst = False
+
+
+class ParseMmapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_parsing_mmap')
+        self.filename = os.path.join(self.dirname, 'symbols.tex')
+        text = synthetic_library(200, subsections=1, attributes=True)
+        # also with DOS line ends in part of the file
+        half = len(text) // 2
+        text = text[:half] + text[half:].replace('\n', '\r\n')
+        with open(self.filename, 'w', newline='') as f:
+            f.write(text)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def render(self, use_mmap):
+        out = io.StringIO()
+        elements = parse_all_symbols([self.filename], use_mmap=use_mmap)
+        CompactRenderer(Options()).render(elements, out)
+        return out.getvalue()
+
+    def test_other_lines_are_strings(self):
+        lines = [el.line for el in parse_all_symbols([self.filename],
+                                                     use_mmap=True)
+                 if isinstance(el, OtherLine)]
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertIsInstance(line, str)
+            self.assertFalse(line.endswith('\r\n'))
+
+    def test_compact_output_is_the_same(self):
+        self.assertEqual(self.render(True), self.render(False))
+
+
+class LinesTest(unittest.TestCase):
+    ''' What str.strip() and the text mode of open() do. '''
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_parsing_mmap')
+        self.filename = os.path.join(self.dirname, 'symbols.tex')
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def parse(self, text):
+        with open(self.filename, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        result = []
+        for use_mmap in [False, True]:
+            elements = parse_all_symbols([self.filename], use_mmap=use_mmap)
+            result.append([(type(el).__name__, el.where.lineno,
+                            el.where.text) for el in elements])
+            # without the OtherLine
+            sections, symbols = parse_all_sections_symbols(
+                [self.filename], use_mmap=use_mmap)
+            result.append([(s.symbol, s.where.lineno, s.where.text)
+                           for s in symbols.values()])
+        self.assertEqual(result[2:], result[:2])
+        return result[2]
+
+    def test_non_ascii_indentation(self):
+        elements = self.parse('\xa0%:section: s: S\n'
+                              '\u3000\\newcommand{\\x}{x} % x\n'
+                              '\xe9% not a tag\n')
+        self.assertEqual([kind for kind, _, _ in elements],
+                         ['SymbolSection', 'Symbol', 'OtherLine'])
+
+    def test_lone_carriage_return(self):
+        elements = self.parse('%:section: s: S\r'
+                              'text\r\n'
+                              '\\newcommand{\\x}{x} % x\r'
+                              '%:sort: 1\r'
+                              '% continued\r'
+                              '\\newcommand{\\y}{y} % y\n')
+        self.assertEqual(elements,
+                         [('SymbolSection', 0, '%:section: s: S'),
+                          ('OtherLine', 1, 'text'),
+                          ('Symbol', 2, '\\newcommand{\\x}{x} % x'),
+                          ('Symbol', 5, '\\newcommand{\\y}{y} % y')])
+
+
+if __name__ == '__main__':
+    unittest.main()
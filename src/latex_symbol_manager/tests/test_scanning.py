@@ -0,0 +1,45 @@
+'''
+    iter_commands(): the commands used in TeX, without the comments,
+    the verbatim text and the control symbols.
+'''
+from latex_symbol_manager.scanning import iter_commands, find_commands
+import unittest
+
+
+class ScanningTest(unittest.TestCase):
+
+    def test_commands(self):
+        s = '\\alpha_1 + \\\\ \\% \\beta{x} % \\gamma\n\\delta'
+        self.assertEqual(find_commands(s),
+                         ['\\alpha', '\\beta', '\\delta'])
+        self.assertEqual(list(iter_commands('a \\x{}')), [('\\x', 4)])
+
+    def test_verb(self):
+        self.assertEqual(find_commands('\\verb|\\a| \\b \\verb*+\\c+ \\d'),
+                         ['\\verb', '\\b', '\\verb', '\\d'])
+        # unterminated: up to the end of the line
+        self.assertEqual(find_commands('\\verb|\\a\n\\b'), ['\\verb', '\\b'])
+        self.assertEqual(find_commands('\\verb'), ['\\verb'])
+
+    def test_verbatim_environments(self):
+        s = ('\\begin{verbatim}\\a % \\b\n\\end{verbatim} \\c '
+             '\\begin {lstlisting}\\d\\end{lstlisting}'
+             '\\begin{itemize}\\e\\end{itemize}')
+        self.assertEqual(find_commands(s),
+                         ['\\begin', '\\end', '\\c', '\\begin', '\\end',
+                          '\\begin', '\\e', '\\end'])
+        # never closed: nothing after it
+        self.assertEqual(find_commands('\\begin{comment}\\a'), ['\\begin'])
+
+    def test_at_letter(self):
+        s = '\\a@b \\makeatletter \\c@d \\makeatother \\e@f'
+        self.assertEqual(find_commands(s),
+                         ['\\a', '\\makeatletter', '\\c@d', '\\makeatother',
+                          '\\e'])
+        self.assertEqual(find_commands(s, at_letter=True),
+                         ['\\a@b', '\\makeatletter', '\\c@d',
+                          '\\makeatother', '\\e@f'])
+
+
+if __name__ == '__main__':
+    unittest.main()
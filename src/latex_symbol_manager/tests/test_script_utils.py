@@ -0,0 +1,37 @@
+'''
+    The options that wrap_script_entry_point removes for all scripts.
+'''
+from latex_symbol_manager.utils import UserError
+from latex_symbol_manager.utils.script_utils import (debug_option,
+    profile_options)
+import logging
+import unittest
+
+
+class OptionsTest(unittest.TestCase):
+
+    def test_debug(self):
+        self.assertEqual(debug_option(['a', '--debug', 'b']),
+                         (['a', 'b'], logging.DEBUG))
+        self.assertEqual(debug_option(['a']), (['a'], logging.INFO))
+
+    def test_profile(self):
+        self.assertEqual(profile_options(['--profile', 'a']),
+                         (['a'], '-', None))
+        self.assertEqual(profile_options(['--profile=r.json',
+                                          '--cprofile', 'c.prof', 'a']),
+                         (['a'], 'r.json', 'c.prof'))
+        self.assertEqual(profile_options(['a', '--cprofile=c.prof']),
+                         (['a'], None, 'c.prof'))
+        for args in [['--cprofile'], ['--cprofile', '--', 'a']]:
+            self.assertRaises(UserError, profile_options, args)
+
+    def test_not_after_double_dash(self):
+        args = ['a', '--', '--debug', '--profile', '--cprofile=c.prof']
+        rest, level = debug_option(['--debug'] + args)
+        self.assertEqual((rest, level), (args, logging.DEBUG))
+        self.assertEqual(profile_options(rest), (args, None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
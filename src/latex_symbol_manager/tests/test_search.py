@@ -0,0 +1,46 @@
+'''
+    SymbolIndex: completion and search, with any limit.
+'''
+from latex_symbol_manager import parse_symbols
+from latex_symbol_manager.search import SymbolIndex
+import io
+import unittest
+
+LIBRARY = r'''
+%:section: s: Section s
+\newcommand{\velocity}{v} % Velocity of the particle
+\newcommand{\vel}{V} % Velocity of the frame
+\newcommand{\mass}{m} % Mass of the particle
+'''
+
+
+class SearchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        symbols = {}
+        for _ in parse_symbols(io.StringIO(LIBRARY), 'symbols.tex', {},
+                               symbols):
+            pass
+        cls.index = SymbolIndex(symbols)
+
+    def test_search(self):
+        names = [name for _, name in self.index.search('velocity', 10)]
+        self.assertEqual(sorted(names), ['\\vel', '\\velocity'])
+        self.assertEqual(len(self.index.search('particle velocity', 1)), 1)
+
+    def test_no_results(self):
+        for limit in [0, -1]:
+            self.assertEqual(self.index.search('velocity', limit), [])
+            self.assertEqual(self.index.search('mass particle', limit), [])
+        matches = self.index.similar_words('velocity')
+        self.assertEqual(self.index.collect(matches, 0), {})
+
+    def test_complete(self):
+        self.assertEqual(self.index.complete('vel'), ['\\vel', '\\velocity'])
+        self.assertEqual(self.index.complete('\\vel', limit=1), ['\\vel'])
+        self.assertEqual(self.index.complete('vel', limit=0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
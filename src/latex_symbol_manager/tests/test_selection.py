@@ -0,0 +1,98 @@
+'''
+    The patterns of lsm_select and lsm_table --sections.
+'''
+from latex_symbol_manager import (SectionSelector, SectionTree,
+    SymbolSection, parse_patterns)
+import unittest
+
+NAMES = ['a', 'a/b', 'a/b/c', 'ab', 'c/d', 'x1', 'x2']
+
+
+class SelectionTest(unittest.TestCase):
+
+    def select(self, which):
+        return SectionSelector(parse_patterns(which)).select(NAMES)
+
+    def test_parse_patterns(self):
+        self.assertEqual(parse_patterns(' a, b/ ,,re:x '), ['a', 'b/', 're:x'])
+        self.assertEqual(parse_patterns(None), [])
+
+    def test_kinds(self):
+        self.assertEqual(self.select('all'), set(NAMES))
+        self.assertEqual(self.select('a'), {'a'})
+        self.assertEqual(self.select('a/'), {'a', 'a/b', 'a/b/c'})
+        self.assertEqual(self.select('a*'), {'a', 'a/b', 'a/b/c', 'ab'})
+        self.assertEqual(self.select('x?,c/*'), {'x1', 'x2', 'c/d'})
+        self.assertEqual(self.select('re:a/b'), {'a/b', 'a/b/c'})
+        self.assertEqual(self.select('re:a/b$'), {'a/b'})
+
+    def test_invalid_regex(self):
+        self.assertRaises(ValueError, SectionSelector, ['re:('])
+
+    def test_unmatched_in_order(self):
+        selector = SectionSelector(['zz', 'a/', 're:y', 'x*', 'q?'])
+        selected, missing = selector.select_unmatched(NAMES)
+        self.assertEqual(selected, selector.select(NAMES))
+        self.assertEqual(missing, ['zz', 're:y', 'q?'])
+        self.assertEqual(selector.unmatched(NAMES), missing)
+
+    def test_overlapping_patterns_all_found(self):
+        # each name is matched by several patterns of each kind
+        selector = SectionSelector(['re:x', 'x?', 're:x1', 'a*', 'a/',
+                                    'a', 'all'])
+        selected, missing = selector.select_unmatched(NAMES)
+        self.assertEqual(selected, set(NAMES))
+        self.assertEqual(missing, [])
+
+    def test_subtree_of_a_leaf(self):
+        selector = SectionSelector(['ab/'])
+        self.assertEqual(selector.select_unmatched(NAMES), ({'ab'}, []))
+
+    def test_nothing_to_match(self):
+        self.assertEqual(SectionSelector(['all', 'a']).unmatched([]),
+                         ['all', 'a'])
+
+
+
+def make_tree(names):
+    sections = {}
+    for i, name in enumerate(names):
+        parent = name.rsplit('/', 1)[0] if '/' in name else None
+        sections[name] = SymbolSection(name, name, {}, parent, {}, None, i,
+                                       {})
+    return SectionTree(sections)
+
+
+class TreeSelectionTest(unittest.TestCase):
+    ''' The same selections, with "name/" found in the SectionTree. '''
+
+    def setUp(self):
+        self.tree = make_tree(NAMES)
+
+    def selector(self, which):
+        return SectionSelector(parse_patterns(which), self.tree)
+
+    def test_same_as_by_names(self):
+        for which in ['a/', 'a/b/', 'ab/', 'a/,x*', 're:x,c/', 'all,a/',
+                      'a,ab', 'q/']:
+            expected = SectionSelector(parse_patterns(which)).select(NAMES)
+            self.assertEqual(self.selector(which).select(NAMES), expected)
+            self.assertEqual(
+                self.selector(which).select_unmatched(NAMES),
+                SectionSelector(parse_patterns(which)).select_unmatched(
+                    NAMES))
+
+    def test_matches(self):
+        selector = self.selector('a/b/')
+        self.assertEqual([n for n in NAMES if selector.matches(n)],
+                         ['a/b', 'a/b/c'])
+        self.assertFalse(selector.matches('unknown'))
+
+    def test_subtree_is_a_slice(self):
+        self.assertEqual(self.tree.subtree('a'), ['a', 'a/b', 'a/b/c'])
+        self.assertTrue(self.tree.is_ancestor('a', 'a/b/c'))
+        self.assertFalse(self.tree.is_ancestor('a', 'ab'))
+
+
+if __name__ == '__main__':
+    unittest.main()
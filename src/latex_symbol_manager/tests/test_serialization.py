@@ -0,0 +1,74 @@
+'''
+    The lists of commands and the symbol records, as YAML or JSON
+    lines: the format recognized, and what is read back.
+'''
+from latex_symbol_manager import parse_symbols
+from latex_symbol_manager.serialization import (detect_format,
+    read_commands, write_commands, symbol_record, write_symbol_records,
+    read_symbol_records)
+import io
+import unittest
+
+LIBRARY = r'''
+%:section: s: Section s
+\newcommand{\x}{x} % x
+%:nomenc: x:The x
+\newcommand{\f}[2]{f(#1, #2)} % f
+%:example: \f{a}{b}
+%:sort: 10
+'''
+
+COMMANDS = ['\\alpha', '\\beta', '\\"o', '\\#']
+
+
+class DetectFormatTest(unittest.TestCase):
+
+    def test_detect(self):
+        self.assertEqual(detect_format(['"\\\\alpha"\n']), 'jsonl')
+        self.assertEqual(detect_format(['{"symbol": "\\\\x"}']), 'jsonl')
+        self.assertEqual(detect_format(['- \\alpha\n']), 'yaml')
+        # the comments and empty lines are skipped
+        self.assertEqual(detect_format(['# "x"\n', '\n', '  "a"\n']),
+                         'jsonl')
+        self.assertEqual(detect_format(['# {\n', '- a\n']), 'yaml')
+        self.assertEqual(detect_format([]), 'yaml')
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def round_trip(self, commands, format):  # @ReservedAssignment
+        out = io.StringIO()
+        write_commands(commands, out, format)
+        text = out.getvalue()
+        if commands:
+            # (empty, it is read as YAML: the same empty list)
+            self.assertEqual(detect_format(text.splitlines()), format)
+        return read_commands(io.StringIO(text))
+
+    def test_commands(self):
+        for format in ['jsonl', 'yaml']:  # @ReservedAssignment
+            self.assertEqual(self.round_trip(COMMANDS, format), COMMANDS)
+            self.assertEqual(self.round_trip([], format), [])
+        self.assertRaises(ValueError, write_commands, COMMANDS,
+                          io.StringIO(), 'xml')
+
+    def test_comments(self):
+        text = '# from lsm_collect\n\n"\\\\a"\n# more\n"\\\\b"\n'
+        self.assertEqual(read_commands(io.StringIO(text)), ['\\a', '\\b'])
+
+    def test_symbol_records(self):
+        symbols = {}
+        for _ in parse_symbols(io.StringIO(LIBRARY), 'symbols.tex', {},
+                               symbols):
+            pass
+        out = io.StringIO()
+        write_symbol_records(symbols.values(), out)
+        read = list(read_symbol_records(io.StringIO(out.getvalue())))
+        self.assertEqual([symbol_record(s) for s in read],
+                         [symbol_record(s) for s in symbols.values()])
+        self.assertEqual(read[0].nomenclature.text, 'The x')
+        self.assertEqual(read[1].other['sort'], '10')
+
+
+if __name__ == '__main__':
+    unittest.main()
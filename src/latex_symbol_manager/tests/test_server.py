@@ -0,0 +1,227 @@
+'''
+    SymbolServer.handle() with JSON-RPC messages in memory: the
+    requests of an editor and the responses, without a transport.
+'''
+from latex_symbol_manager import SymbolLibrary
+from latex_symbol_manager.programs.server import (SymbolServer, serve,
+    write_message, read_message, PARSE_ERROR, INVALID_REQUEST,
+    METHOD_NOT_FOUND, INVALID_PARAMS, utf16_to_index, index_to_utf16)
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+SOURCE = r'''
+%:section: s: Section s
+\newcommand{\alpha}{a} % The first
+\newcommand{\alphabet}[1]{A_{#1}} % The alphabet
+\newcommand{\beta}{\alpha'} % The second
+'''
+
+URI = 'file:///doc.tex'
+# a character out of the BMP (two UTF-16 units) before the commands
+TEXT = 'x = \\alpha\n\U0001d538 + \\beta + \\alp'
+
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_server')
+        filename = os.path.join(self.dirname, 'symbols.tex')
+        with open(filename, 'w') as f:
+            f.write(SOURCE)
+        library = SymbolLibrary([filename])
+        library.refresh()
+        self.server = SymbolServer(library, refresh_interval=3600)
+        self.server.last_refresh = float('inf')
+        self.nid = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def request(self, method, params=None):
+        self.nid += 1
+        response = self.server.handle({'jsonrpc': '2.0', 'id': self.nid,
+                                       'method': method, 'params': params})
+        self.assertEqual(response['id'], self.nid)
+        return response
+
+    def notify(self, method, params=None):
+        response = self.server.handle({'jsonrpc': '2.0', 'method': method,
+                                       'params': params})
+        self.assertIsNone(response)
+
+    def initialize(self, encodings=None):
+        capabilities = {}
+        if encodings is not None:
+            capabilities['general'] = {'positionEncodings': encodings}
+        result = self.request('initialize',
+                              {'capabilities': capabilities})['result']
+        self.notify('initialized', {})
+        self.notify('textDocument/didOpen',
+                    {'textDocument': {'uri': URI, 'languageId': 'latex',
+                                      'version': 1, 'text': TEXT}})
+        return result['capabilities']
+
+    def position(self, line, character):
+        return {'textDocument': {'uri': URI},
+                'position': {'line': line, 'character': character}}
+
+    def test_initialize(self):
+        capabilities = self.initialize()
+        self.assertEqual(capabilities['positionEncoding'], 'utf-16')
+        self.assertTrue(capabilities['hoverProvider'])
+        self.assertEqual(capabilities['completionProvider'],
+                         {'triggerCharacters': ['\\']})
+
+    def test_completion(self):
+        self.initialize()
+        # after "\alp" at the end of the second line, whose first
+        # character is 2 units
+        end = len(TEXT.split('\n')[1]) + 1
+        result = self.request('textDocument/completion',
+                              self.position(1, end))['result']
+        self.assertFalse(result['isIncomplete'])
+        labels = [item['label'] for item in result['items']]
+        self.assertEqual(labels, ['\\alpha', '\\alphabet'])
+        edit = result['items'][0]['textEdit']
+        self.assertEqual(edit['range'],
+                         {'start': {'line': 1, 'character': end - 4},
+                          'end': {'line': 1, 'character': end}})
+        self.assertEqual(result['items'][1]['detail'].strip(),
+                         'The alphabet')
+
+    def test_completion_outside_a_command(self):
+        self.initialize()
+        result = self.request('textDocument/completion',
+                              self.position(0, 2))['result']
+        self.assertEqual(result, {'isIncomplete': False, 'items': []})
+
+    def test_hover_utf16(self):
+        self.initialize()
+        # "\beta" starts at index 4 of the line, offset 5 in UTF-16
+        result = self.request('textDocument/hover',
+                              self.position(1, 6))['result']
+        self.assertIn('The second', result['contents']['value'])
+        self.assertEqual(result['range'],
+                         {'start': {'line': 1, 'character': 5},
+                          'end': {'line': 1, 'character': 10}})
+
+    def test_hover_utf32(self):
+        capabilities = self.initialize(['utf-32', 'utf-16'])
+        self.assertEqual(capabilities['positionEncoding'], 'utf-32')
+        result = self.request('textDocument/hover',
+                              self.position(1, 5))['result']
+        self.assertEqual(result['range']['start']['character'], 4)
+
+    def test_hover_nothing(self):
+        self.initialize()
+        self.assertIsNone(self.request('textDocument/hover',
+                                       self.position(0, 0))['result'])
+
+    def test_did_change(self):
+        self.initialize()
+        self.notify('textDocument/didChange',
+                    {'textDocument': {'uri': URI, 'version': 2},
+                     'contentChanges': [{'text': '\\beta'}]})
+        result = self.request('textDocument/hover',
+                              self.position(0, 1))['result']
+        self.assertIn('The second', result['contents']['value'])
+
+    def test_extract(self):
+        self.initialize()
+        result = self.request('lsm/extract', {'commands': ['\\beta']})
+        text = result['result']['text']
+        # the definitions needed, each before its users
+        self.assertLess(text.index('\\alpha'), text.index('\\beta'))
+
+    def test_errors(self):
+        self.initialize()
+        response = self.request('no/such/method', {})
+        self.assertEqual(response['error']['code'], METHOD_NOT_FOUND)
+        response = self.request('textDocument/hover', {})
+        self.assertEqual(response['error']['code'], INVALID_PARAMS)
+        # unknown notifications are ignored
+        self.notify('$/cancelRequest', {'id': 1})
+
+    def test_shutdown_exit(self):
+        self.initialize()
+        self.assertIsNone(self.request('shutdown')['result'])
+        self.assertTrue(self.server.running)
+        self.notify('exit')
+        self.assertFalse(self.server.running)
+
+    def test_serve(self):
+        messages = [
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize',
+             'params': {'capabilities': {}}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'shutdown'},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+            {'jsonrpc': '2.0', 'id': 3, 'method': 'shutdown'},
+        ]
+        instream = io.BytesIO()
+        for message in messages:
+            write_message(instream, message)
+        instream.seek(0)
+        outstream = io.BytesIO()
+        serve(self.server, instream, outstream)
+        outstream.seek(0)
+        ids = []
+        while True:
+            body = read_message(outstream)
+            if body is None:
+                break
+            ids.append(json.loads(body.decode('utf-8'))['id'])
+        # nothing after exit
+        self.assertEqual(ids, [1, 2])
+
+    def serve(self, instream):
+        outstream = io.BytesIO()
+        serve(self.server, io.BytesIO(instream), outstream)
+        outstream.seek(0)
+        responses = []
+        while True:
+            body = read_message(outstream)
+            if body is None:
+                return responses
+            responses.append(json.loads(body.decode('utf-8')))
+
+    def test_serve_invalid_content_length(self):
+        instream = io.BytesIO()
+        write_message(instream, {'jsonrpc': '2.0', 'id': 1,
+                                 'method': 'shutdown'})
+        for length in [b'abc', b'-1']:
+            responses = self.serve(b'Content-Length: %s\r\n\r\n' % length
+                                   + instream.getvalue())
+            self.assertEqual([r.get('id') for r in responses], [None, 1])
+            self.assertEqual(responses[0]['error']['code'], PARSE_ERROR)
+            self.assertIn('Content-Length', responses[0]['error']['message'])
+
+    def test_serve_not_an_object(self):
+        instream = io.BytesIO()
+        for message in [[1, 2], 'initialize', None,
+                        {'jsonrpc': '2.0', 'id': 1, 'method': 'shutdown'}]:
+            write_message(instream, message)
+        responses = self.serve(instream.getvalue())
+        self.assertEqual([r['error']['code'] for r in responses[:3]],
+                         [INVALID_REQUEST] * 3)
+        self.assertEqual([r['id'] for r in responses], [None] * 3 + [1])
+        self.assertIsNone(responses[3]['result'])
+
+
+class PositionEncodingTest(unittest.TestCase):
+
+    def test_conversions(self):
+        line = 'a\U0001d538b\u00e9c'
+        # units: a=0, the pair=1,2, b=3, e acute=4, c=5
+        self.assertEqual([index_to_utf16(line, i) for i in range(6)],
+                         [0, 1, 3, 4, 5, 6])
+        self.assertEqual([utf16_to_index(line, u) for u in range(7)],
+                         [0, 1, 1, 2, 3, 4, 5])
+        self.assertEqual(utf16_to_index('abc', 2), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
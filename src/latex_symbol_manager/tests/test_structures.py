@@ -0,0 +1,37 @@
+'''
+    Where: the text of the line, read back from the file once.
+'''
+from latex_symbol_manager import Where
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class WhereTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_structures')
+        self.filename = os.path.join(self.dirname, 'symbols.tex')
+        with open(self.filename, 'w') as f:
+            f.write('first\nsecond\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_given(self):
+        self.assertEqual(Where(self.filename, 0, 'given\n').text, 'given')
+
+    def test_read_once(self):
+        by_offset = Where(self.filename, 1, offset=6)
+        by_lineno = Where(self.filename, 1)
+        self.assertEqual(by_offset.text, 'second')
+        self.assertEqual(by_lineno.text, 'second')
+        os.unlink(self.filename)
+        self.assertEqual(by_offset.text, 'second')
+        self.assertEqual(by_lineno.text, 'second')
+        self.assertIsNone(Where(self.filename, 1).text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+'''
+    The query language of symbol_query: tokens, precedence of the
+    operators, the comparisons, and section: as a subtree.
+'''
+from latex_symbol_manager import (parse_symbols, parse_query,
+    select_symbols, AttributeIndex)
+from latex_symbol_manager.symbol_query import tokenize
+import io
+import unittest
+
+LIBRARY = r'''
+%:section: a: Section a
+\newcommand{\x}{x} % x
+%:sort: 10
+\newcommand{\f}[2]{f(#1, #2)} % f
+%:deprecated:
+%:section: a/b: Subsection b
+\newcommand{\y}{y} % y
+%:def: def:x y
+%:section: a/b/c: Subsubsection c
+\newcommand{\g}[1]{g(#1)} % g
+%:sort: 20
+%:notfinal:
+%:section: ab: Not a subsection of a
+\newcommand{\z}{z} % z
+%:def: def:z
+'''
+
+
+def load():
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(LIBRARY), 'symbols.tex', sections,
+                           symbols):
+        pass
+    return sections, symbols
+
+
+class TokenizeTest(unittest.TestCase):
+
+    def test_parentheses_and_words(self):
+        self.assertEqual(tokenize('(a or b)and not c'),
+                         ['(', 'a', 'or', 'b', ')', 'and', 'not', 'c'])
+
+    def test_quoted_values_keep_spaces(self):
+        self.assertEqual(tokenize(' def="def:x y" and sort '),
+                         ['def="def:x y"', 'and', 'sort'])
+
+    def test_empty(self):
+        self.assertEqual(tokenize('   '), [])
+        self.assertRaises(ValueError, parse_query, '  ')
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_terms(self):
+        self.assertEqual(parse_query('all'), ('all',))
+        self.assertEqual(parse_query('sort'), ('attr', 'sort'))
+        self.assertEqual(parse_query('sort=10'), ('value', 'sort', '=', '10'))
+        self.assertEqual(parse_query('def!=def:z'),
+                         ('value', 'def', '!=', 'def:z'))
+        self.assertEqual(parse_query('def="def:x y"'),
+                         ('value', 'def', '=', 'def:x y'))
+        self.assertEqual(parse_query('section:a/'), ('section', 'a'))
+        self.assertEqual(parse_query('file:*.tex'), ('file', '*.tex'))
+
+    def test_nargs(self):
+        self.assertEqual(parse_query('nargs'), ('nargs', '>', 0))
+        for op in ['=', '!=', '<', '<=', '>', '>=']:
+            self.assertEqual(parse_query('nargs%s2' % op), ('nargs', op, 2))
+        self.assertRaises(ValueError, parse_query, 'nargs=x')
+        self.assertRaises(ValueError, parse_query, 'nargs:2')
+
+    def test_precedence(self):
+        # not, then and, then or
+        self.assertEqual(parse_query('a or b and not c'),
+                         ('or', ('attr', 'a'),
+                          ('and', ('attr', 'b'), ('not', ('attr', 'c')))))
+        self.assertEqual(parse_query('(a or b) and c'),
+                         ('and', ('or', ('attr', 'a'), ('attr', 'b')),
+                          ('attr', 'c')))
+        self.assertEqual(parse_query('not not a'),
+                         ('not', ('not', ('attr', 'a'))))
+
+    def test_left_associative(self):
+        self.assertEqual(parse_query('a and b and c'),
+                         ('and', ('and', ('attr', 'a'), ('attr', 'b')),
+                          ('attr', 'c')))
+
+    def test_errors(self):
+        for query in ['a b', 'a and', '(a or b', 'a)', 'or a', 'sort<2',
+                      'section', 'section:', 'file=x', '=a']:
+            self.assertRaises(ValueError, parse_query, query)
+
+
+class SelectTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sections, cls.symbols = load()
+
+    def select(self, query, sections=True):
+        return select_symbols(self.symbols, query,
+                              self.sections if sections else None)
+
+    def test_attributes(self):
+        self.assertEqual(self.select('all'), set(self.symbols))
+        self.assertEqual(self.select('sort'), {'\\x', '\\g'})
+        self.assertEqual(self.select('sort=20'), {'\\g'})
+        self.assertEqual(self.select('def="def:x y"'), {'\\y'})
+
+    def test_not_equal_needs_the_attribute(self):
+        self.assertEqual(self.select('sort!=20'), {'\\x'})
+        self.assertEqual(self.select('def!=def:z'), {'\\y'})
+
+    def test_nargs(self):
+        self.assertEqual(self.select('nargs'), {'\\f', '\\g'})
+        self.assertEqual(self.select('nargs=0'), {'\\x', '\\y', '\\z'})
+        self.assertEqual(self.select('nargs>=1'), {'\\f', '\\g'})
+        self.assertEqual(self.select('nargs<2'),
+                         {'\\x', '\\y', '\\z', '\\g'})
+        self.assertEqual(self.select('nargs!=1'),
+                         {'\\x', '\\y', '\\z', '\\f'})
+
+    def test_operators(self):
+        self.assertEqual(self.select('sort or deprecated and nargs=2'),
+                         {'\\x', '\\g', '\\f'})
+        self.assertEqual(self.select('(sort or deprecated) and not nargs'),
+                         {'\\x'})
+        self.assertEqual(self.select('not sort and not def'), {'\\f'})
+
+    def test_section_subtree(self):
+        # "ab" is not under "a", though its name starts with it
+        for sections in [True, False]:
+            self.assertEqual(self.select('section:a', sections),
+                             {'\\x', '\\f', '\\y', '\\g'})
+            self.assertEqual(self.select('section:a/', sections),
+                             {'\\x', '\\f', '\\y', '\\g'})
+            self.assertEqual(self.select('section:a/b', sections),
+                             {'\\y', '\\g'})
+            self.assertEqual(self.select('section:missing', sections),
+                             set())
+
+    def test_section_patterns(self):
+        self.assertEqual(self.select('section:a*'), set(self.symbols))
+        self.assertEqual(self.select('section:re:a$'), {'\\x', '\\f'})
+        self.assertEqual(self.select('section:re:.*/c'), {'\\g'})
+
+    def test_file(self):
+        self.assertEqual(self.select('file:symbols.tex'), set(self.symbols))
+        self.assertEqual(self.select('file:*.sty'), set())
+
+    def test_index_reused(self):
+        index = AttributeIndex(self.symbols, self.sections)
+        self.assertEqual(select_symbols(self.symbols, 'sort', index=index),
+                         {'\\x', '\\g'})
+        self.assertEqual(index.select('notfinal'), {'\\g'})
+
+
+if __name__ == '__main__':
+    unittest.main()
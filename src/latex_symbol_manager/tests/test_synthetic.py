@@ -0,0 +1,107 @@
+'''
+    The synthetic libraries and documents of the benchmarks, and a
+    short run of the benchmark suite.
+'''
+from latex_symbol_manager import parse_symbols
+from latex_symbol_manager.benchmarks import bench_suite
+from latex_symbol_manager.benchmarks.synthetic import (synthetic_library,
+    synthetic_document, write_synthetic_document)
+from latex_symbol_manager.scanning import find_commands
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+
+def load(text):
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(text), 'library.tex', sections,
+                           symbols):
+        pass
+    return sections, symbols
+
+
+class SyntheticTest(unittest.TestCase):
+
+    def test_library(self):
+        text = synthetic_library(120, symbols_per_section=50,
+                                 subsections=2)
+        self.assertEqual(text, synthetic_library(120, subsections=2))
+        sections, symbols = load(text)
+        self.assertEqual(len(symbols), 120)
+        self.assertEqual(sorted(s for s in sections if not '/' in s),
+                         ['sec0', 'sec1', 'sec2'])
+        self.assertEqual(sorted(sections['sec0'].subs),
+                         ['sec0/sub1', 'sec0/sub2'])
+        self.assertTrue(any(s.nargs == 2 for s in symbols.values()))
+
+    def test_attributes(self):
+        plain = load(synthetic_library(300, subsections=1))[1]
+        sections, symbols = load(synthetic_library(300, subsections=1,
+                                                   attributes=True))
+        # the same symbols, some with more attributes
+        self.assertEqual([(s.symbol, s.tex) for s in symbols.values()],
+                         [(s.symbol, s.tex) for s in plain.values()])
+        for attribute in ['def', 'deprecated', 'notfinal']:
+            self.assertTrue(any(attribute in s.other
+                                for s in symbols.values()))
+        self.assertTrue(any(s.example for s in symbols.values()))
+
+    def test_document(self):
+        symbols = load(synthetic_library(50))[1]
+        text = synthetic_document(30, nsymbols=50)
+        used = set(find_commands(text))
+        self.assertTrue(used & set(symbols))
+        # what is commented or verbatim is not a command
+        self.assertFalse([c for c in used
+                          if c.startswith(('\\commented', '\\inverb',
+                                           '\\verbatim'))])
+        self.assertFalse(used - set(symbols) - {'\\documentclass',
+                         '\\begin', '\\end', '\\verb'})
+
+    def test_chapters(self):
+        dirname = tempfile.mkdtemp(prefix='test_synthetic')
+        try:
+            main = write_synthetic_document(dirname, 3, 5, nsymbols=50)
+            with open(main) as f:
+                text = f.read()
+            self.assertEqual(text.count('\\input{chapter'), 3)
+            self.assertTrue(os.path.exists(os.path.join(dirname,
+                                                        'chapter002.tex')))
+        finally:
+            shutil.rmtree(dirname)
+
+
+class SuiteTest(unittest.TestCase):
+
+    def test_run(self):
+        dirname = tempfile.mkdtemp(prefix='test_synthetic')
+        results = os.path.join(dirname, 'results.json')
+        argv = sys.argv
+        sys.argv = ['bench_suite', '-n', '200', '--chapters', '2',
+                    '--paragraphs', '5', '--json', results,
+                    'parse_symbols', 'lsm_symbols']
+        try:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                bench_suite.main()
+            with open(results) as f:
+                report = json.load(f)
+        finally:
+            sys.argv = argv
+            shutil.rmtree(dirname)
+        self.assertEqual(report['nsymbols'], 200)
+        self.assertEqual([r['case'] for r in report['results']],
+                         ['parse_symbols', 'lsm_symbols'])
+        for r in report['results']:
+            self.assertGreater(r['seconds'], 0)
+            self.assertGreater(r['peak_bytes'], 0)
+        self.assertIn('lsm_symbols', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+'''
+    lsm_table with the string backend: the rows, the escaping, and
+    the longtables of bounded size; and a file for each section.
+'''
+from latex_symbol_manager import parse_symbols, SectionTree
+from latex_symbol_manager.create_symbols_table import (lsm_table_main,
+    write_directory)
+from latex_symbol_manager.table_builder import (write_table_full,
+    write_table_minimal)
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+LIBRARY = r'''
+%:section: a_b: Section $a$
+\newcommand{\x}{x} % x
+%:example: \x^2
+\newcommand{\f}[1]{f(#1)} % f
+%:section: a_b/c: Sub
+\newcommand{\y}{y} % y
+%:nosummary:
+'''
+
+
+def load(text=LIBRARY):
+    sections, symbols = {}, {}
+    for _ in parse_symbols(io.StringIO(text), 'symbols.tex', sections,
+                           symbols):
+        pass
+    return sections, symbols
+
+
+def ordered_sections():
+    sections = load()[0]
+    return SectionTree(sections, lambda s: s.definition_order).ordered()
+
+
+class Options(object):
+    sections = None
+    select = None
+    sort_sections_alpha = False
+    sort_symbols_alpha = False
+    style = 'full'
+    backend = 'string'
+    max_rows = None
+    jobs = 1
+
+
+class StringBackendTest(unittest.TestCase):
+
+    def test_full(self):
+        out = io.StringIO()
+        write_table_full(ordered_sections(), out)
+        text = out.getvalue()
+        lines = text.splitlines()
+        self.assertEqual(lines[0], '\\begin{longtable}{lll}')
+        self.assertEqual(lines[-1], '\\end{longtable}')
+        # the names escaped, each section indented by its depth
+        self.assertIn('\\multicolumn{3}{l}{{\\color[rgb]{0.5,0.5,0.5}'
+                      '\\texttt{a\\_b}} \\emph{Section $a$}} \\\\', lines)
+        self.assertIn('\\multicolumn{3}{l}{\\hspace*{2em}'
+                      '{\\color[rgb]{0.5,0.5,0.5}\\texttt{a\\_b/c}} '
+                      '\\emph{Sub}} \\\\', lines)
+        # sorted by name
+        self.assertLess(text.index('\\texttt{\\textbackslash{}f\\{...\\}}'),
+                        text.index('\\texttt{\\textbackslash{}x}'))
+        self.assertIn('{\\small \\texttt{\\textbackslash{}x'
+                      '\\textasciicircum{}2}}', text)
+        self.assertIn('\\texttt{\\textbackslash{}y}} & (nosummary) &  y',
+                      text)
+
+    def test_minimal_max_rows(self):
+        out = io.StringIO()
+        write_table_minimal(ordered_sections(), out, max_rows=2)
+        text = out.getvalue()
+        self.assertEqual(text.count('\\begin{longtable}{cl}'), 2)
+        self.assertEqual(text.count('\\end{longtable}'), 2)
+        for table in text.split('\\end{longtable}')[:-1]:
+            self.assertLessEqual(table.count(' \\\\\n'), 2)
+        # only the symbols without arguments
+        self.assertNotIn('\\f', text)
+        self.assertIn('$\\y$ &  y \\\\\n', text)
+
+    def test_program(self):
+        dirname = tempfile.mkdtemp(prefix='test_table')
+        try:
+            source = os.path.join(dirname, 'symbols.tex')
+            with open(source, 'w') as f:
+                f.write(LIBRARY)
+            output = os.path.join(dirname, 'table.tex')
+            lsm_table_main(['--backend', 'string', '--style', 'minimal',
+                            '--no-cache', '-o', output, source])
+            out = io.StringIO()
+            write_table_minimal(ordered_sections(), out,
+                                symbols_sort_key=lambda s:
+                                s.definition_order)
+            with open(output) as f:
+                self.assertEqual(f.read(), out.getvalue())
+            # only the string backend splits the tables
+            self.assertRaises(Exception, lsm_table_main,
+                              ['--max-rows', '10', '--no-cache', '-o',
+                               output, source])
+        finally:
+            shutil.rmtree(dirname)
+
+
+class DirectoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp(prefix='test_table')
+        self.output = os.path.join(self.dirname, 'tables')
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def write(self, text):
+        sections, symbols = load(text)
+        return write_directory(self.output, sections, symbols, Options())
+
+    def read(self, name):
+        with open(os.path.join(self.output, name)) as f:
+            return f.read()
+
+    def test_fragments(self):
+        self.assertEqual(self.write(LIBRARY),
+                         ['section-a_b.tex', 'section-a_b-c.tex'])
+        self.assertEqual(self.read('index.tex'),
+                         ''.join('\\input{%s}\n'
+                                 % os.path.join(self.output, name)
+                                 for name in ['section-a_b.tex',
+                                              'section-a_b-c.tex']))
+        out = io.StringIO()
+        write_table_full(ordered_sections()[1:], out,
+                         symbols_sort_key=lambda s: s.definition_order)
+        self.assertEqual(self.read('section-a_b-c.tex'), out.getvalue())
+
+        # nothing changed: nothing written
+        self.assertEqual(self.write(LIBRARY), [])
+        # only the fragment of the section edited
+        self.assertEqual(self.write(LIBRARY.replace('% y', '% yy')),
+                         ['section-a_b-c.tex'])
+
+    def test_removed_sections(self):
+        self.write(LIBRARY)
+        # a file of the user, in the same directory
+        with open(os.path.join(self.output, 'section-mine.tex'), 'w') as f:
+            f.write('mine')
+        self.write(LIBRARY.split('%:section: a_b/c')[0])
+        self.assertEqual(sorted(n for n in os.listdir(self.output)
+                                if n.endswith('.tex')),
+                         ['index.tex', 'section-a_b.tex',
+                          'section-mine.tex'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,3 @@
 from .script_utils import *
-from .col_logging import *
\ No newline at end of file
+from .col_logging import *
+from .profiling import *
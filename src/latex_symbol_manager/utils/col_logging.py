@@ -1,12 +1,32 @@
 import logging
-logging.basicConfig()
 import platform
 
-__all__ = []
+__all__ = ['setup_logging']
+
+
+def setup_logging(level=logging.INFO):
+    '''
+        Configures the root logger, with colors on terminals, and sets
+        the level of the logger of the package; called by the scripts
+        (see wrap_script_entry_point).
+    '''
+    logging.getLogger('latex_symbol_manager').setLevel(level)
+    if getattr(setup_logging, 'done', False):
+        return
+    setup_logging.done = True
+    logging.basicConfig()
+    if platform.system() != 'Windows':
+        emit2 = add_coloring_to_emit_ansi(logging.StreamHandler.emit)
+        logging.StreamHandler.emit = emit2
+
 
 def add_coloring_to_emit_ansi(fn):
     # add methods we need to the class
     def new(*args):
+        stream = getattr(args[0], 'stream', None)
+        if not getattr(stream, 'isatty', lambda: False)():
+            # no colors in files and pipes
+            return fn(*args)
         levelno = args[1].levelno
         if(levelno >= 50):
             color = '\x1b[31m'  # red
@@ -21,10 +41,8 @@ def add_coloring_to_emit_ansi(fn):
         else:
             color = '\x1b[0m'  # normal
 
-        args[1].msg = color + str(args[1].msg) + '\x1b[0m'  # normal
-        return fn(*args)
+        # a copy: the record may go to other handlers
+        record = logging.makeLogRecord(args[1].__dict__)
+        record.msg = color + str(record.msg) + '\x1b[0m'  # normal
+        return fn(args[0], record)
     return new
-
-if platform.system() != 'Windows':
-    emit2 = add_coloring_to_emit_ansi(logging.StreamHandler.emit)
-    logging.StreamHandler.emit = emit2
\ No newline at end of file
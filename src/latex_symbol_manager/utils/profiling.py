@@ -0,0 +1,137 @@
+import json
+import sys
+import time
+
+__all__ = ['profile', 'Profile']
+
+
+class Profile(object):
+    '''
+        Wall and CPU time of the stages of a program (parse, merge,
+        graph, render, write...) and counters (lines, sections,
+        symbols...).
+
+        A stage is timed with "with profile.stage(name):"; the stages
+        can contain each other (render contains write), so their times
+        do not add up to the total. When disabled (the default),
+        stage() returns an object doing nothing and count() does
+        nothing.
+    '''
+
+    def __init__(self):
+        self.disable()
+
+    def enable(self):
+        self.enabled = True
+        # name -> [calls, wall, cpu]
+        self.stages = {}
+        # name -> value
+        self.counters = {}
+        self.start = (time.perf_counter(), time.process_time())
+        self.stage = self._stage
+        self.count = self._count
+
+    def disable(self):
+        self.enabled = False
+        self.stages = {}
+        self.counters = {}
+        self.stage = lambda name: NO_STAGE
+        self.count = lambda name, n=1: None
+
+    def _stage(self, name):
+        return Stage(self.stages, name)
+
+    def _count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def output(self, stream):
+        """ Returns stream, counting what is written if enabled. """
+        if not self.enabled:
+            return stream
+        return CountingWriter(self, stream)
+
+    def report(self):
+        """ Returns the times and counters as a dict. """
+        wall, cpu = self.start
+        return {
+            'wall': time.perf_counter() - wall,
+            'cpu': time.process_time() - cpu,
+            'stages': dict((name, {'calls': calls, 'wall': w, 'cpu': c})
+                           for name, (calls, w, c) in self.stages.items()),
+            'counters': dict(self.counters),
+        }
+
+    def write_report(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.report(), f, indent=1, sort_keys=True)
+            f.write('\n')
+
+    def print_report(self, stream=None):
+        if stream is None:
+            stream = sys.stderr
+        r = self.report()
+        stream.write('%-20s %6s %10s %10s\n' %
+                     ('stage', 'calls', 'wall (s)', 'cpu (s)'))
+        stages = sorted(r['stages'].items(), key=lambda x: -x[1]['wall'])
+        for name, s in stages:
+            stream.write('%-20s %6d %10.3f %10.3f\n' %
+                         (name, s['calls'], s['wall'], s['cpu']))
+        stream.write('%-20s %6s %10.3f %10.3f\n' %
+                     ('total', '', r['wall'], r['cpu']))
+        for name, value in sorted(r['counters'].items()):
+            stream.write('%-27s %10d\n' % (name, value))
+
+
+class Stage(object):
+
+    def __init__(self, stages, name):
+        self.stages = stages
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        s = self.stages.get(self.name)
+        if s is None:
+            self.stages[self.name] = [1, wall, cpu]
+        else:
+            s[0] += 1
+            s[1] += wall
+            s[2] += cpu
+        return False
+
+
+class NoStage(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NO_STAGE = NoStage()
+
+
+class CountingWriter(object):
+    """ Times the writes, and counts the characters written. """
+
+    def __init__(self, profile, stream):
+        self.profile = profile
+        self.stream = stream
+
+    def write(self, s):
+        with self.profile.stage('write'):
+            self.stream.write(s)
+        self.profile.count('characters written', len(s))
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# The profile of the running program (see wrap_script_entry_point).
+profile = Profile()
@@ -1,7 +1,9 @@
 __version__ = '1.1'
 
+from .col_logging import setup_logging
+from .profiling import profile
+import logging
 import sys
-import traceback
 
 
 class UserError(Exception):
@@ -17,9 +19,36 @@ def wrap_script_entry_point(function, logger,
         :param exceptions_no_traceback: list of exceptions for which we 
          just print the error, and return 1.
         
+        The options for logging and profiling, accepted by all scripts,
+        are removed from the arguments before calling function (but
+        not after "--", where they are arguments like the others):
+        
+        --debug           log the debug messages too (default: INFO);
+        --profile         print the time of each stage at exit;
+        --profile=FILE    write it to FILE as JSON;
+        --cprofile=FILE   write the cProfile statistics to FILE.
     """
+    args, level = debug_option(sys.argv[1:])
+    setup_logging(level)
     try:
-        ret = function(sys.argv[1:])
+        args, report, cprofile_filename = profile_options(args)
+        if report is not None:
+            profile.enable()
+        profiler = None
+        if cprofile_filename is not None:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            ret = function(args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(cprofile_filename)
+            if report == '-':
+                profile.print_report()
+            elif report is not None:
+                profile.write_report(report)
         if ret is None:
             ret = 0
         sys.exit(ret)
@@ -27,5 +56,56 @@ def wrap_script_entry_point(function, logger,
         logger.error(str(e))
         sys.exit(1)
     except Exception as e:
+        import traceback
         logger.error(traceback.format_exc())
         sys.exit(2)
+
+
+def debug_option(args):
+    '''
+        Removes --debug from args, up to "--"; returns the other
+        arguments and the level for the logger (DEBUG if asked,
+        otherwise INFO).
+    '''
+    rest = []
+    level = logging.INFO
+    args = iter(args)
+    for a in args:
+        if a == '--':
+            rest.append(a)
+            rest.extend(args)
+        elif a == '--debug':
+            level = logging.DEBUG
+        else:
+            rest.append(a)
+    return rest, level
+
+
+def profile_options(args):
+    '''
+        Removes --profile[=FILE] and --cprofile[=]FILE from args, up to
+        "--"; returns the other arguments, the file for the report ("-"
+        for stderr, None if not asked) and the file for cProfile (or
+        None).
+    '''
+    rest = []
+    report = None
+    cprofile_filename = None
+    args = iter(args)
+    for a in args:
+        if a == '--':
+            rest.append(a)
+            rest.extend(args)
+        elif a == '--profile':
+            report = '-'
+        elif a.startswith('--profile='):
+            report = a[len('--profile='):]
+        elif a == '--cprofile':
+            cprofile_filename = next(args, None)
+            if cprofile_filename in [None, '--']:
+                raise UserError('--cprofile needs a file name.')
+        elif a.startswith('--cprofile='):
+            cprofile_filename = a[len('--cprofile='):]
+        else:
+            rest.append(a)
+    return rest, report, cprofile_filename